@@ -1,49 +1,55 @@
 import os
 import logging
-import pandas as pd
-import plotly.express as px
+import importlib
+import time
 from datetime import datetime, timedelta
 import pytz
 
 import streamlit as st
 from streamlit_option_menu import option_menu
-from st_aggrid import AgGrid, GridOptionsBuilder
-from fpdf import FPDF
-from io import BytesIO
 
 # Define o fuso horário de Fortaleza
 FORTALEZA_TZ = pytz.timezone("America/Fortaleza")
 
-# Importação dos módulos internos (mantidos sem alterações)
-from autenticacao import authenticate, add_user, is_admin, list_users
+# Importação dos módulos internos leves, usados pelo login e pelo menu.
+# pandas, plotly, matplotlib, fpdf e st_aggrid (e os módulos que dependem deles:
+# inventario, estoque, ubs) são importados dentro das páginas que os usam,
+# só na primeira vez em que a página é exibida.
+from autenticacao import TTL_ROLES, authenticate, add_user, add_users_em_lote, get_role, list_users, versao_roles
+from senhas import FilaSenhasCheia, estatisticas_senhas
 from chamados import (
     add_chamado,
     get_chamado_by_protocolo,
     list_chamados,
+    list_chamados_paginado,
+    filtros_periodo,
+    iter_paginas_chamados,
     list_chamados_em_aberto,
     buscar_no_inventario_por_patrimonio,
     finalizar_chamado,
-    calculate_working_hours,
-    reabrir_chamado
+    reabrir_chamado,
+    versao_chamados,
+    buscar_chamados_texto,
+    gerar_relatorio_chamados_pdf
 )
-from inventario import (
-    show_inventory_list,
-    cadastro_maquina,
-    get_machines_from_inventory,
-    dashboard_inventario
-)
-from ubs import get_ubs_list
-from setores import get_setores_list
-from estoque import manage_estoque, get_estoque
+from expediente import tempo_util_vetorizado, formatar_tempo_util
+from instrumentacao import definir_pagina, painel_consultas
+from tempo_real import INTERVALO_PAINEL, fragmento_periodico, houve_alteracao, parametro_url
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
 
+# Mantém o espelho local das tabelas de chamados/inventário atualizado em segundo plano
+import espelho
+espelho.iniciar_sincronizacao()
+
 # Inicialização da sessão (variáveis de login)
 if "logged_in" not in st.session_state:
     st.session_state["logged_in"] = False
 if "username" not in st.session_state:
     st.session_state["username"] = ""
+if "role" not in st.session_state:
+    st.session_state["role"] = None
 
 # Configuração da página (layout wide, favicon customizado)
 st.set_page_config(
@@ -104,17 +110,102 @@ def exibir_chamado(chamado):
         st.markdown("### Solução")
         st.markdown(chamado["solucao"])
 
+####################################
+# Quadro de Chamados em Aberto (ao vivo)
+####################################
+@fragmento_periodico(INTERVALO_PAINEL)
+def quadro_chamados_abertos():
+    """
+    Chamados em aberto, do mais antigo para o mais recente, atualizados sozinhos
+    a cada INTERVALO_PAINEL segundos. A cada atualização só uma sonda de uma
+    linha vai ao banco; a lista é recarregada quando algum chamado muda.
+    """
+    import pandas as pd
+
+    if houve_alteracao("painel_chamados", versao_chamados()) or "painel_chamados" not in st.session_state:
+        vistos = st.session_state.get("painel_chamados_ids")
+        abertos = list_chamados_em_aberto()
+        st.session_state["painel_chamados"] = abertos
+        st.session_state["painel_chamados_ids"] = {c["id"] for c in abertos}
+        novos = [c for c in abertos if vistos is not None and c["id"] not in vistos]
+        for chamado in novos:
+            st.toast(f"Novo chamado: {chamado.get('ubs')} - {chamado.get('tipo_defeito')}")
+
+    abertos = st.session_state["painel_chamados"]
+    agora = datetime.now(FORTALEZA_TZ)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Chamados em aberto", len(abertos))
+    col2.metric("Abertos hoje", sum(
+        1 for c in abertos if (c.get("hora_abertura") or "").startswith(agora.strftime("%d/%m/%Y"))
+    ))
+    col3.metric("UBSs com chamados", len({c.get("ubs") for c in abertos}))
+    st.caption(f"Atualizado às {agora.strftime('%H:%M:%S')}")
+    if not abertos:
+        st.write("Nenhum chamado em aberto.")
+        return
+
+    df = pd.DataFrame(abertos)
+    df["Tempo Util"] = [
+        "Erro" if pd.isnull(seg) else formatar_tempo_util(seg)
+        for seg in tempo_util_vetorizado(df["hora_abertura"], agora.replace(tzinfo=None))
+    ]
+    df["_abertura"] = pd.to_datetime(df["hora_abertura"], format="%d/%m/%Y %H:%M:%S", errors="coerce")
+    df = df.sort_values("_abertura")
+    colunas = [c for c in ["protocolo", "ubs", "setor", "tipo_defeito", "problema", "hora_abertura", "Tempo Util"] if c in df.columns]
+    st.dataframe(df[colunas], hide_index=True, use_container_width=True)
+
+# Modo painel (TV/monitor na sala do suporte): ?painel=<PAINEL_CHAMADOS_TOKEN>
+# exibe só o quadro de chamados em aberto, sem login nem menu
+_token_painel = os.getenv("PAINEL_CHAMADOS_TOKEN")
+if _token_painel and parametro_url("painel") == _token_painel:
+    definir_pagina("Painel de Chamados")
+    quadro_chamados_abertos()
+    st.stop()
+
+####################################
+# Role do Usuário Logado
+####################################
+def carregar_role_sessao():
+    """
+    Guarda na sessão a role do usuário logado (do cache de roles do processo).
+    """
+    try:
+        st.session_state["role"] = get_role(st.session_state["username"])
+    except Exception as e:
+        logging.warning(f"Erro ao carregar a role de {st.session_state['username']}: {e}")
+        st.session_state["role"] = None
+    st.session_state["versao_roles"] = versao_roles()
+    st.session_state["role_lida_em"] = time.monotonic()
+
+def usuario_admin():
+    """
+    Retorna True se o usuário logado for admin, sem consultar o banco a cada
+    interação: a role é lida no login e recarregada quando alguma role é
+    alterada neste processo (remove_user/update_user_role) ou, para alterações
+    feitas em outros processos, quando a leitura tem mais de TTL_ROLES segundos.
+    """
+    if not st.session_state["logged_in"]:
+        return False
+    if (
+        st.session_state.get("versao_roles") != versao_roles()
+        or time.monotonic() - st.session_state.get("role_lida_em", 0) > TTL_ROLES
+    ):
+        carregar_role_sessao()
+    return st.session_state["role"] == "admin"
+
 ####################################
 # Monta o Menu Principal
 ####################################
 def build_menu():
     if st.session_state["logged_in"]:
-        if is_admin(st.session_state["username"]):
+        if usuario_admin():
             return [
                 "Dashboard",
                 "Abrir Chamado",
                 "Buscar Chamado",
                 "Chamados Técnicos",
+                "Painel de Chamados",
+                "Chat",
                 "Inventário",
                 "Estoque",
                 "Administração",
@@ -126,39 +217,49 @@ def build_menu():
             return [
                 "Abrir Chamado",
                 "Buscar Chamado",
+                "Chat",
                 "Sair"
             ]
     else:
         return ["Login"]
 
+# Ícone de cada opção do menu (os menus de admin e de usuário têm opções diferentes)
+ICONES_MENU = {
+    "Dashboard": "speedometer",
+    "Abrir Chamado": "chat-left-text",
+    "Buscar Chamado": "search",
+    "Chamados Técnicos": "card-list",
+    "Painel de Chamados": "display",
+    "Chat": "chat-dots",
+    "Inventário": "clipboard-data",
+    "Estoque": "box-seam",
+    "Administração": "gear",
+    "Relatórios": "bar-chart-line",
+    "Exportar Dados": "download",
+    "Sair": "box-arrow-right"
+}
+
 menu_options = build_menu()
 
-# Cria menu horizontal com streamlit-option-menu
-selected = option_menu(
-    menu_title=None,
-    options=menu_options,
-    icons=[
-        "speedometer",  # Dashboard
-        "chat-left-text",  # Abrir Chamado
-        "search",           # Buscar Chamado
-        "card-list",        # Chamados Técnicos
-        "clipboard-data",   # Inventário
-        "box-seam",         # Estoque
-        "gear",             # Administração
-        "bar-chart-line",   # Relatórios
-        "download",         # Exportar Dados
-        "box-arrow-right"   # Sair
-    ],
-    menu_icon="cast",
-    default_index=0,
-    orientation="horizontal",
-    styles={
-        "container": {"padding": "5!important", "background-color": "#F8FAFC"},
-        "icon": {"color": "black", "font-size": "18px"},
-        "nav-link": {"font-size": "16px", "text-align": "center", "margin": "0px", "color": "black", "padding": "10px"},
-        "nav-link-selected": {"background-color": "#0275d8", "color": "white"},
-    }
-)
+# Cria menu horizontal com streamlit-option-menu. Antes do login o menu teria
+# só "Login": o componente é dispensado, pois carregá-lo importa o pandas
+if menu_options == ["Login"]:
+    selected = "Login"
+else:
+    selected = option_menu(
+        menu_title=None,
+        options=menu_options,
+        icons=[ICONES_MENU.get(opcao, "circle") for opcao in menu_options],
+        menu_icon="cast",
+        default_index=0,
+        orientation="horizontal",
+        styles={
+            "container": {"padding": "5!important", "background-color": "#F8FAFC"},
+            "icon": {"color": "black", "font-size": "18px"},
+            "nav-link": {"font-size": "16px", "text-align": "center", "margin": "0px", "color": "black", "padding": "10px"},
+            "nav-link-selected": {"background-color": "#0275d8", "color": "white"},
+        }
+    )
 
 ####################################
 # 1) Página de Login
@@ -170,10 +271,17 @@ def login_page():
     if st.button("Entrar"):
         if not username or not password:
             st.error("Preencha todos os campos.")
-        elif authenticate(username, password):
+            return
+        try:
+            autenticado = authenticate(username, password)
+        except FilaSenhasCheia as e:
+            st.warning(str(e))
+            return
+        if autenticado:
             st.success(f"Bem-vindo, {username}!")
             st.session_state["logged_in"] = True
             st.session_state["username"] = username
+            carregar_role_sessao()
         else:
             st.error("Usuário ou senha incorretos.")
 
@@ -181,11 +289,14 @@ def login_page():
 # 2) Página de Dashboard (Tendência Mensal e Semanal)
 ####################################
 def dashboard_page():
+    import pandas as pd
+    import plotly.express as px
+
     st.subheader("Dashboard - Administrativo")
     agora_fortaleza = datetime.now(FORTALEZA_TZ)
     st.markdown(f"**Horário local (Fortaleza):** {agora_fortaleza.strftime('%d/%m/%Y %H:%M:%S')}")
 
-    chamados = list_chamados()
+    chamados = list_chamados(colunas="id,hora_abertura,hora_fechamento")
     if not chamados:
         st.info("Nenhum chamado registrado.")
         return
@@ -202,19 +313,12 @@ def dashboard_page():
     col3.metric("Fechados", fechados)
 
     # Identifica chamados atrasados (mais de 48h úteis)
-    atrasados = []
-    for c in chamados:
-        if c.get("hora_fechamento") is None:
-            try:
-                abertura = datetime.strptime(c["hora_abertura"], '%d/%m/%Y %H:%M:%S')
-                agora_local = datetime.now(FORTALEZA_TZ)
-                tempo_util = calculate_working_hours(abertura, agora_local)
-                if tempo_util > timedelta(hours=24):
-                    atrasados.append(c)
-            except:
-                pass
+    df_abertos = df[df["hora_fechamento"].isnull()]
+    agora_local = datetime.now(FORTALEZA_TZ)
+    tempo_util_abertos = tempo_util_vetorizado(df_abertos["hora_abertura"], agora_local)
+    atrasados = int((tempo_util_abertos > timedelta(hours=24).total_seconds()).sum())
     if atrasados:
-        st.warning(f"Atenção: {len(atrasados)} chamados abertos há mais de 48h úteis!")
+        st.warning(f"Atenção: {atrasados} chamados abertos há mais de 48h úteis!")
 
     # Tendência Mensal
     df["mes"] = df["hora_abertura_dt"].dt.to_period("M").astype(str)
@@ -253,6 +357,9 @@ def dashboard_page():
 # 3) Página de Abrir Chamado
 ####################################
 def abrir_chamado_page():
+    from ubs import get_ubs_list
+    from setores import get_setores_list
+
     st.subheader("Abrir Chamado Técnico")
     patrimonio = st.text_input("Número de Patrimônio (opcional)")
     data_agendada = st.date_input("Data Agendada para Manutenção (opcional)")
@@ -312,6 +419,11 @@ def abrir_chamado_page():
 ####################################
 # 4) Página de Buscar Chamado
 ####################################
+RESULTADOS_POR_PAGINA = 20
+
+def _mudar_pagina_busca(passo):
+    st.session_state["busca_chamados_pagina"] = max(0, st.session_state.get("busca_chamados_pagina", 0) + passo)
+
 def buscar_chamado_page():
     st.subheader("Buscar Chamado")
     protocolo = st.text_input("Informe o número de protocolo do chamado")
@@ -326,12 +438,116 @@ def buscar_chamado_page():
         else:
             st.warning("Informe um protocolo.")
 
+    st.markdown("---")
+    st.subheader("Busca por Texto")
+    consulta = st.text_input(
+        "Termos do problema, solução, tipo de defeito ou patrimônio",
+        help='Use aspas para frases exatas ("tela azul") e -termo para excluir.'
+    )
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        from ubs import get_ubs_list
+        filtro_ubs = st.multiselect("UBS", get_ubs_list(), key="busca_chamados_ubs")
+    with col2:
+        situacao = st.selectbox("Situação", ["Todos", "Em aberto", "Finalizados"], key="busca_chamados_situacao")
+    with col3:
+        usar_periodo = st.checkbox("Filtrar por período de abertura")
+        periodo = st.date_input(
+            "Período", value=(datetime.now(FORTALEZA_TZ).date() - timedelta(days=90), datetime.now(FORTALEZA_TZ).date()),
+            disabled=not usar_periodo
+        )
+    if not consulta.strip():
+        return
+
+    data_inicio = data_fim = None
+    if usar_periodo and isinstance(periodo, tuple) and len(periodo) == 2:
+        data_inicio, data_fim = periodo
+    parametros = repr((consulta, filtro_ubs, situacao, data_inicio, data_fim))
+    # Nova busca ou filtros diferentes: volta para a primeira página
+    if st.session_state.get("busca_chamados_parametros") != parametros:
+        st.session_state["busca_chamados_parametros"] = parametros
+        st.session_state["busca_chamados_pagina"] = 0
+    pagina = st.session_state["busca_chamados_pagina"]
+
+    chamados, total = buscar_chamados_texto(
+        consulta,
+        ubs=filtro_ubs,
+        situacao={"Em aberto": "abertos", "Finalizados": "finalizados"}.get(situacao),
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+        limite=RESULTADOS_POR_PAGINA,
+        pagina=pagina
+    )
+    if not chamados:
+        st.info("Nenhum chamado encontrado.")
+        return
+
+    total_paginas = (total + RESULTADOS_POR_PAGINA - 1) // RESULTADOS_POR_PAGINA
+    st.markdown(f"**{total} chamados encontrados** (página {pagina + 1} de {total_paginas})")
+    for chamado in chamados:
+        situacao_chamado = "Finalizado" if chamado.get("hora_fechamento") else "Em aberto"
+        with st.expander(
+            f"Protocolo {chamado.get('protocolo')} - {chamado.get('ubs')} - "
+            f"{chamado.get('tipo_defeito')} ({chamado.get('hora_abertura')}, {situacao_chamado})"
+        ):
+            if chamado.get("trecho"):
+                st.markdown(f"> {chamado['trecho']}")
+            exibir_chamado(chamado)
+
+    col_ant, _, col_prox = st.columns([1, 2, 1])
+    col_ant.button("◀ Anteriores", on_click=_mudar_pagina_busca, args=(-1,), disabled=pagina == 0)
+    col_prox.button("Próximos ▶", on_click=_mudar_pagina_busca, args=(1,), disabled=pagina + 1 >= total_paginas)
+
 ####################################
 # 5) Página de Chamados Técnicos (Finalizar e Reabrir)
 ####################################
+CHAMADOS_POR_PAGINA = 50
+
+def _mudar_pagina_chamados(cursor=None, voltar=False):
+    cursores = st.session_state["chamados_cursores"]
+    if voltar:
+        if len(cursores) > 1:
+            cursores.pop()
+    else:
+        cursores.append(cursor)
+
 def chamados_tecnicos_page():
+    import pandas as pd
+    from st_aggrid import AgGrid, GridOptionsBuilder
+    from ubs import get_ubs_list
+    from estoque import get_estoque
+
     st.subheader("Chamados Técnicos")
-    chamados = list_chamados()
+    col1, col2 = st.columns(2)
+    with col1:
+        situacao = st.selectbox("Situação", ["Todos", "Em aberto", "Finalizados"])
+    with col2:
+        filtro_ubs = st.multiselect("Filtrar por UBS", get_ubs_list())
+
+    filtros = []
+    if situacao == "Em aberto":
+        filtros.append(("hora_fechamento", "is", None))
+    elif situacao == "Finalizados":
+        filtros.append(("hora_fechamento", "not.is", None))
+    if filtro_ubs:
+        filtros.append(("ubs", "in", filtro_ubs))
+
+    # Pilha com o cursor de cada página visitada; reinicia quando os filtros mudam
+    if st.session_state.get("chamados_filtros") != repr(filtros):
+        st.session_state["chamados_filtros"] = repr(filtros)
+        st.session_state["chamados_cursores"] = [None]
+    cursores = st.session_state["chamados_cursores"]
+
+    chamados, proximo_cursor = list_chamados_paginado(
+        filtros=filtros, desc=True, limite=CHAMADOS_POR_PAGINA, cursor=cursores[-1]
+    )
+    col_ant, col_pag, col_prox = st.columns([1, 2, 1])
+    col_ant.button("◀ Mais recentes", on_click=_mudar_pagina_chamados,
+                   kwargs={"voltar": True}, disabled=len(cursores) == 1)
+    col_pag.markdown(f"<center>Página {len(cursores)}</center>", unsafe_allow_html=True)
+    col_prox.button("Mais antigos ▶", on_click=_mudar_pagina_chamados,
+                    args=(proximo_cursor,), disabled=proximo_cursor is None)
+
     if not chamados:
         st.write("Nenhum chamado técnico encontrado.")
         return
@@ -342,19 +558,13 @@ def chamados_tecnicos_page():
         nova_ordem = ["protocolo", "id"] + [col for col in df.columns if col not in ["protocolo", "id"]]
         df = df[nova_ordem]
 
-    def calcula_tempo(row):
-        if pd.notnull(row.get("hora_fechamento")):
-            try:
-                abertura = datetime.strptime(row["hora_abertura"], '%d/%m/%Y %H:%M:%S')
-                fechamento = datetime.strptime(row["hora_fechamento"], '%d/%m/%Y %H:%M:%S')
-                tempo_util = calculate_working_hours(abertura, fechamento)
-                return str(tempo_util)
-            except:
-                return "Erro"
-        else:
-            return "Em aberto"
-
-    df["Tempo Util"] = df.apply(calcula_tempo, axis=1)
+    fechados = df["hora_fechamento"].notnull()
+    tempo_util_seg = tempo_util_vetorizado(df["hora_abertura"], df["hora_fechamento"])
+    df["Tempo Util"] = "Em aberto"
+    df.loc[fechados, "Tempo Util"] = [
+        "Erro" if pd.isnull(seg) else formatar_tempo_util(seg)
+        for seg in tempo_util_seg[fechados]
+    ]
 
     # Reordena para que "Tempo Util" apareça logo após "patrimonio"
     if "patrimonio" in df.columns:
@@ -373,8 +583,8 @@ def chamados_tecnicos_page():
     grid_options['domLayout'] = 'normal'
     AgGrid(df, gridOptions=grid_options, enable_enterprise_modules=False, theme='streamlit', height=400)
     
-    # Finalizar Chamado (para chamados em aberto)
-    df_aberto = df[df["hora_fechamento"].isnull()]
+    # Finalizar Chamado (todos os chamados em aberto, não só os da página)
+    df_aberto = pd.DataFrame(list_chamados_em_aberto())
     if df_aberto.empty:
         st.write("Não há chamados abertos para finalizar.")
     else:
@@ -407,8 +617,12 @@ def chamados_tecnicos_page():
         comentarios = st.text_area("Comentários adicionais (opcional)")
 
         estoque_data = get_estoque()
-        pieces_list = [item["nome"] for item in estoque_data] if estoque_data else []
-        pecas_selecionadas = st.multiselect("Selecione as peças utilizadas (se houver)", pieces_list)
+        pecas_por_id = {item["id"]: item for item in estoque_data} if estoque_data else {}
+        pecas_selecionadas = st.multiselect(
+            "Selecione as peças utilizadas (se houver)",
+            list(pecas_por_id),
+            format_func=lambda i: f"{pecas_por_id[i]['nome']} (saldo: {pecas_por_id[i]['quantidade']})"
+        )
 
         if st.button("Finalizar Chamado"):
             if solucao_final:
@@ -417,7 +631,7 @@ def chamados_tecnicos_page():
             else:
                 st.error("Informe a solução para finalizar o chamado.")
 
-    # Reabrir Chamado (para chamados fechados)
+    # Reabrir Chamado (para chamados fechados da página atual)
     df_fechado = df[df["hora_fechamento"].notnull()]
     if not df_fechado.empty:
         st.markdown("### Reabrir Chamado Técnico")
@@ -430,6 +644,8 @@ def chamados_tecnicos_page():
 # 6) Página de Inventário
 ####################################
 def inventario_page():
+    from inventario import show_inventory_list, cadastro_maquina, dashboard_inventario
+
     st.subheader("Inventário")
     menu_inventario = st.radio("Selecione uma opção:", ["Listar Inventário", "Cadastrar Máquina", "Dashboard Inventário"])
     if menu_inventario == "Listar Inventário":
@@ -440,10 +656,8 @@ def inventario_page():
         dashboard_inventario()
 
 ####################################
-# 7) Página de Estoque
+# 7) Página de Estoque (estoque.manage_estoque, ver PAGINAS)
 ####################################
-def estoque_page():
-    manage_estoque()
 
 ####################################
 # 8) Página de Administração
@@ -452,7 +666,7 @@ def administracao_page():
     st.subheader("Administração")
     admin_option = st.selectbox(
         "Opções de Administração",
-        ["Cadastro de Usuário", "Gerenciar UBSs", "Gerenciar Setores", "Lista de Usuários"]
+        ["Cadastro de Usuário", "Importar Usuários", "Gerenciar UBSs", "Gerenciar Setores", "Lista de Usuários", "Cache de Dados", "Consultas ao Banco"]
     )
     if admin_option == "Cadastro de Usuário":
         novo_user = st.text_input("Novo Usuário")
@@ -463,6 +677,38 @@ def administracao_page():
                 st.success("Usuário cadastrado com sucesso!")
             else:
                 st.error("Erro ao cadastrar usuário ou usuário já existe.")
+    elif admin_option == "Importar Usuários":
+        import csv
+        import io
+        st.markdown("Arquivo CSV com as colunas **username**, **senha** e, opcionalmente, **admin** (sim/não).")
+        arquivo = st.file_uploader("Lista de usuários", type=["csv"])
+        if arquivo is not None and st.button("Importar"):
+            texto = arquivo.getvalue().decode("utf-8-sig")
+            # Planilhas exportadas em português costumam usar ";" como separador
+            separador = ";" if ";" in texto.split("\n", 1)[0] else ","
+            linhas = csv.DictReader(io.StringIO(texto), delimiter=separador)
+            usuarios = [
+                (
+                    (linha.get("username") or "").strip(),
+                    linha.get("senha") or "",
+                    (linha.get("admin") or "").strip().lower() in ("sim", "s", "1", "true", "admin"),
+                )
+                for linha in linhas
+            ]
+            with st.spinner(f"Criando {len(usuarios)} usuários..."):
+                criados, ignorados = add_users_em_lote(usuarios)
+            st.success(f"{len(criados)} usuários criados.")
+            if ignorados:
+                st.warning(f"Ignorados (já existentes, repetidos ou incompletos): {', '.join(n or '(vazio)' for n in ignorados)}")
+        metricas = estatisticas_senhas()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Operações de senha", metricas["operacoes"])
+        col2.metric("Espera média na fila", f"{metricas['espera_media_s'] * 1000:.0f} ms")
+        col3.metric("Tempo médio do bcrypt", f"{metricas['execucao_media_s'] * 1000:.0f} ms")
+        st.caption(
+            f"Concorrência: {metricas['concorrencia']} | Em andamento: {metricas['em_andamento']} | "
+            f"Espera máxima: {metricas['espera_maxima_s'] * 1000:.0f} ms | Rejeitadas: {metricas['rejeitadas']}"
+        )
     elif admin_option == "Gerenciar UBSs":
         from ubs import manage_ubs
         manage_ubs()
@@ -475,11 +721,30 @@ def administracao_page():
             st.table(usuarios)
         else:
             st.write("Nenhum usuário cadastrado.")
+    elif admin_option == "Cache de Dados":
+        from cache_dados import CACHE_REFERENCIA
+        estatisticas = CACHE_REFERENCIA.estatisticas()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Acertos", estatisticas["acertos"])
+        col2.metric("Falhas", estatisticas["falhas"])
+        col3.metric("Taxa de Acerto", f"{estatisticas['taxa_acerto']:.0%}")
+        st.markdown(f"**Tempo de consulta economizado:** {estatisticas['segundos_economizados']:.1f} s")
+        st.markdown(f"**Tabelas em cache:** {', '.join(estatisticas['chaves']) or 'nenhuma'}")
+        if st.button("Limpar Cache"):
+            CACHE_REFERENCIA.invalidar()
+            st.success("Cache limpo.")
+    elif admin_option == "Consultas ao Banco":
+        painel_consultas()
 
 ####################################
 # 9) Página de Relatórios
 ####################################
 def relatorios_page():
+    import pandas as pd
+    import plotly.express as px
+    from st_aggrid import AgGrid, GridOptionsBuilder
+    from ubs import get_ubs_list
+
     st.subheader("Relatórios Completos - Estatísticas")
     st.markdown("### Filtros para Chamados")
     col1, col2, col3 = st.columns(3)
@@ -497,18 +762,14 @@ def relatorios_page():
     agora_fortaleza = datetime.now(FORTALEZA_TZ)
     st.markdown(f"**Horário local (Fortaleza):** {agora_fortaleza.strftime('%d/%m/%Y %H:%M:%S')}")
 
-    chamados = list_chamados()
+    # Período e UBSs são filtrados no servidor: só os chamados do período são baixados
+    chamados = list_chamados(filtros=filtros_periodo(start_date, end_date, filtro_ubs))
     if not chamados:
-        st.write("Nenhum chamado técnico encontrado.")
+        st.write("Nenhum chamado técnico encontrado no período.")
         return
 
-    df = pd.DataFrame(chamados)
-    df["hora_abertura_dt"] = pd.to_datetime(df["hora_abertura"], format='%d/%m/%Y %H:%M:%S', errors='coerce')
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
-    df_period = df[(df["hora_abertura_dt"] >= start_datetime) & (df["hora_abertura_dt"] <= end_datetime)]
-    if filtro_ubs:
-        df_period = df_period[df_period["ubs"].isin(filtro_ubs)]
+    df_period = pd.DataFrame(chamados).drop(columns=["aberto_em"], errors="ignore")
+    df_period["hora_abertura_dt"] = pd.to_datetime(df_period["hora_abertura"], format='%d/%m/%Y %H:%M:%S', errors='coerce')
 
     st.markdown("### Chamados Técnicos no Período")
     gb = GridOptionsBuilder.from_dataframe(df_period)
@@ -525,19 +786,7 @@ def relatorios_page():
     st.markdown(f"**Chamados Abertos (período):** {chamados_abertos}")
     st.markdown(f"**Chamados Fechados (período):** {chamados_fechados}")
 
-    def tempo_resolucao(row):
-        if pd.notnull(row["hora_fechamento"]):
-            try:
-                ab = datetime.strptime(row["hora_abertura"], '%d/%m/%Y %H:%M:%S')
-                fe = datetime.strptime(row["hora_fechamento"], '%d/%m/%Y %H:%M:%S')
-                delta = calculate_working_hours(ab, fe)
-                return delta.total_seconds()
-            except:
-                return None
-        else:
-            return None
-
-    df_period["tempo_resolucao_seg"] = df_period.apply(tempo_resolucao, axis=1)
+    df_period["tempo_resolucao_seg"] = tempo_util_vetorizado(df_period["hora_abertura"], df_period["hora_fechamento"])
     df_resolvidos = df_period.dropna(subset=["tempo_resolucao_seg"])
     if not df_resolvidos.empty:
         media_seg = df_resolvidos["tempo_resolucao_seg"].mean()
@@ -591,25 +840,7 @@ def relatorios_page():
 
     # Geração do PDF completo de chamados
     if st.button("Gerar Relatório Completo de Chamados em PDF"):
-        df_chamados = df_period.copy()
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.image("infocustec.png", x=10, y=8, w=30)
-        pdf.ln(35)
-        pdf.set_font("Arial", "B", 16)
-        pdf.cell(0, 10, "Relatório Completo de Chamados Técnicos", ln=True, align="C")
-        pdf.ln(10)
-        pdf.set_font("Arial", "", 10)
-        for idx, row in df_chamados.iterrows():
-            for col in df_chamados.columns:
-                pdf.cell(0, 8, f'{col}: {row[col]}', ln=True)
-            pdf.ln(5)
-
-        pdf_output = pdf.output(dest="S")
-        if isinstance(pdf_output, str):
-            pdf_output = pdf_output.encode("latin-1")
-        elif isinstance(pdf_output, bytearray):
-            pdf_output = bytes(pdf_output)
+        pdf_output = gerar_relatorio_chamados_pdf(df_period)
         st.download_button(
             label="Baixar Relatório Completo de Chamados",
             data=pdf_output,
@@ -621,12 +852,17 @@ def relatorios_page():
 # 10) Página de Exportar Dados
 ####################################
 def exportar_dados_page():
+    import pandas as pd
+    from inventario import get_machines_from_inventory
+
     st.subheader("Exportar Dados")
     st.markdown("### Exportar Chamados em CSV")
-    chamados = list_chamados()
-    if chamados:
-        df_chamados = pd.DataFrame(chamados)
-        csv_chamados = df_chamados.to_csv(index=False).encode("utf-8")
+    # Monta o CSV página a página, sem manter a tabela inteira em um DataFrame
+    partes_csv = []
+    for pagina in iter_paginas_chamados():
+        partes_csv.append(pd.DataFrame(pagina).to_csv(index=False, header=not partes_csv))
+    if partes_csv:
+        csv_chamados = "".join(partes_csv).encode("utf-8")
         st.download_button("Baixar Chamados CSV", data=csv_chamados, file_name="chamados.csv", mime="text/csv")
     else:
         st.write("Nenhum chamado para exportar.")
@@ -640,34 +876,68 @@ def exportar_dados_page():
     else:
         st.write("Nenhum item de inventário para exportar.")
 
+####################################
+# Painel de Chamados e Chat
+####################################
+def painel_chamados_page():
+    st.subheader("Painel de Chamados em Aberto")
+    quadro_chamados_abertos()
+
+def chat_page():
+    from chat import chat_admin_page, chat_usuario_page
+    if usuario_admin():
+        chat_admin_page()
+    else:
+        chat_usuario_page(st.session_state["username"])
+
 ####################################
 # 11) Função Sair
 ####################################
 def sair_page():
     st.session_state["logged_in"] = False
     st.session_state["username"] = ""
+    st.session_state["role"] = None
     st.success("Você saiu.")
 
 ####################################
 # Mapeamento das Páginas
 ####################################
-pages = {
+# Cada página é uma função deste arquivo ou uma referência "modulo:funcao",
+# importada apenas quando a página é exibida pela primeira vez
+PAGINAS = {
     "Login": login_page,
     "Dashboard": dashboard_page,
     "Abrir Chamado": abrir_chamado_page,
     "Buscar Chamado": buscar_chamado_page,
     "Chamados Técnicos": chamados_tecnicos_page,
+    "Painel de Chamados": painel_chamados_page,
+    "Chat": chat_page,
     "Inventário": inventario_page,
-    "Estoque": estoque_page,
+    "Estoque": "estoque:manage_estoque",
     "Administração": administracao_page,
     "Relatórios": relatorios_page,
     "Exportar Dados": exportar_dados_page,
     "Sair": sair_page
 }
 
+def obter_pagina(nome):
+    """
+    Retorna a função que desenha a página 'nome', importando o módulo
+    dela se a página for uma referência "modulo:funcao".
+    """
+    pagina = PAGINAS[nome]
+    if isinstance(pagina, str):
+        modulo, funcao = pagina.split(":")
+        pagina = getattr(importlib.import_module(modulo), funcao)
+    return pagina
+
 # Chama a página selecionada
-if selected in pages:
-    pages[selected]()
+if selected in PAGINAS:
+    # As consultas ao banco feitas a partir daqui são atribuídas a esta página
+    definir_pagina(selected)
+    obter_pagina(selected)()
+    if os.getenv("INSTRUMENTACAO_PAINEL") == "1" and usuario_admin():
+        painel_consultas(selected)
 else:
     st.write("Página não encontrada.")
 
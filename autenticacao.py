@@ -1,26 +1,71 @@
 # autenticacao.py
 
-import bcrypt
+import logging
+import os
+import threading
+
+from cache_dados import CacheReferencia
+from senhas import FilaSenhasCheia, gerar_hash, gerar_hashes, verificar_senha
 from supabase_client import supabase
 
+logger = logging.getLogger(__name__)
+
+# Cache das roles por usuário, compartilhado por todas as sessões do processo.
+# Invalidado por add_user, remove_user e update_user_role; o TTL (curto) cobre
+# alterações feitas por outros processos/servidores, que não veem a invalidação.
+TTL_ROLES = float(os.getenv("CACHE_ROLES_TTL_SEGUNDOS", "60"))
+CACHE_ROLES = CacheReferencia(ttl=TTL_ROLES)
+_versao_roles = 0
+_lock_versao = threading.Lock()
+
+
+def _invalidar_role(username):
+    global _versao_roles
+    CACHE_ROLES.invalidar(username)
+    with _lock_versao:
+        _versao_roles += 1
+
+
+def versao_roles():
+    """
+    Contador incrementado a cada alteração de role feita neste processo.
+    Permite que a sessão saiba, sem consultar o banco, que a role guardada nela
+    mudou. Alterações feitas em outros processos só aparecem após TTL_ROLES.
+    """
+    return _versao_roles
+
+
+def _carregar_role(username):
+    resp = supabase.table("usuarios").select("role").eq("username", username).execute()
+    return resp.data[0]["role"] if resp.data else None
+
+
+def get_role(username):
+    """
+    Retorna a role do usuário ('admin' ou 'user'), ou None se ele não existir.
+    Consulta o banco apenas na primeira vez (ou após invalidação/expiração).
+    Exceções da consulta são repassadas e não ficam em cache.
+    """
+    return CACHE_ROLES.obter(username, lambda: _carregar_role(username))
+
 def authenticate(username, password):
     """
     Verifica se 'username' existe na tabela 'usuarios' do Supabase
     e se a senha 'password' confere com o hash armazenado (bcrypt).
     Retorna True se autenticar, False caso contrário.
+    Levanta FilaSenhasCheia se o pool de senhas estiver saturado.
     """
     try:
         resp = supabase.table("usuarios").select("password").eq("username", username).execute()
         data = resp.data
         if data:
-            stored = data[0]['password']  # Hash armazenado como string
-            # Converte para bytes se necessário
-            if isinstance(stored, str):
-                stored = stored.encode('utf-8')
-            # Verifica a senha
-            if bcrypt.checkpw(password.encode('utf-8'), stored):
+            # Verifica a senha com o hash armazenado (no pool de senhas, fora da thread do script)
+            if verificar_senha(password, data[0]['password']):
                 return True
         return False
+    except FilaSenhasCheia:
+        # Servidor sobrecarregado: não é senha incorreta, quem chamou avisa o usuário
+        raise
     except Exception as e:
         print(f"Erro na autenticação: {e}")
         return False
@@ -41,25 +86,62 @@ def add_user(username, password, is_admin=False):
             return False
         
         # Hash da senha
-        hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed = gerar_hash(password)
         role = 'admin' if is_admin else 'user'
         supabase.table("usuarios").insert({"username": username, "password": hashed, "role": role}).execute()
+        _invalidar_role(username)
         print(f"Usuário '{username}' criado como {role}.")
         return True
     except Exception as e:
         print(f"Erro ao adicionar usuário: {e}")
         return False
 
+def add_users_em_lote(usuarios):
+    """
+    Cria vários usuários de uma vez (importação de listas de funcionários).
+    - usuarios: lista de tuplas (username, password, is_admin)
+    Usuários já existentes ou repetidos na lista são ignorados. As senhas são
+    hasheadas em paralelo no pool de senhas e os registros inseridos em um único insert.
+    Retorna (criados, ignorados), listas de usernames.
+    """
+    try:
+        nomes = list(dict.fromkeys(u[0] for u in usuarios if u[0]))
+        existentes = set()
+        for i in range(0, len(nomes), 200):
+            resp = supabase.table("usuarios").select("username").in_("username", nomes[i:i + 200]).execute()
+            existentes.update(u["username"] for u in resp.data)
+
+        novos, ignorados, vistos = [], [], set()
+        for username, password, admin in usuarios:
+            if not username or not password or username in existentes or username in vistos:
+                ignorados.append(username)
+                continue
+            vistos.add(username)
+            novos.append((username, password, admin))
+        if not novos:
+            return [], ignorados
+
+        hashes = gerar_hashes([password for _, password, _ in novos])
+        registros = [
+            {"username": username, "password": hashed, "role": 'admin' if admin else 'user'}
+            for (username, _, admin), hashed in zip(novos, hashes)
+        ]
+        supabase.table("usuarios").insert(registros).execute()
+        for username, _, _ in novos:
+            _invalidar_role(username)
+        logger.info("%s usuários criados em lote.", len(registros))
+        return [r["username"] for r in registros], ignorados
+    except Exception as e:
+        logger.warning("Erro ao adicionar usuários em lote: %s", e)
+        return [], [u[0] for u in usuarios]
+
 def is_admin(username):
     """
     Retorna True se o usuário tiver role='admin', caso contrário False.
+    Usa o cache de roles (ver get_role).
     """
     try:
-        resp = supabase.table("usuarios").select("role").eq("username", username).execute()
-        data = resp.data
-        if data and data[0]['role'] == 'admin':
-            return True
-        return False
+        return get_role(username) == 'admin'
     except Exception as e:
         print(f"Erro ao verificar admin: {e}")
         return False
@@ -82,6 +164,7 @@ def remove_user(admin_username, target_username):
     if is_admin(admin_username):
         try:
             supabase.table("usuarios").delete().eq("username", target_username).execute()
+            _invalidar_role(target_username)
             print(f"Usuário '{target_username}' removido.")
             return True
         except Exception as e:
@@ -100,6 +183,7 @@ def update_user_role(admin_username, target_username, new_role):
         return False
     try:
         supabase.table("usuarios").update({"role": new_role}).eq("username", target_username).execute()
+        _invalidar_role(target_username)
         print(f"Função do usuário '{target_username}' atualizada para '{new_role}'.")
         return True
     except Exception as e:
@@ -114,7 +198,7 @@ def force_change_password(admin_username, target_username, new_password):
         print("Apenas administradores podem alterar a senha de usuários.")
         return False
     try:
-        hashed = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed = gerar_hash(new_password)
         supabase.table("usuarios").update({"password": hashed}).eq("username", target_username).execute()
         print(f"Senha do usuário '{target_username}' atualizada pelo admin '{admin_username}'.")
         return True
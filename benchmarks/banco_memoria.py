@@ -0,0 +1,414 @@
+# benchmarks/banco_memoria.py
+import bisect
+import functools
+import itertools
+import re
+import threading
+import time
+from datetime import datetime
+
+from postgrest.exceptions import APIError
+
+# Limite de linhas por resposta do PostgREST no Supabase (max-rows)
+MAX_LINHAS_PADRAO = 1000
+
+_DATA_ISO = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}")
+
+
+class Resposta:
+    """
+    Mesmo formato do APIResponse do supabase-py: 'data' e 'count'.
+    """
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+@functools.lru_cache(maxsize=None)
+def _texto_comparavel(valor):
+    if _DATA_ISO.match(valor):
+        try:
+            return datetime.fromisoformat(valor.replace("Z", "+00:00"))
+        except ValueError:
+            return valor
+    if re.fullmatch(r"-?\d+(\.\d+)?", valor.strip()):
+        return float(valor)
+    return valor
+
+
+def _comparavel(valor):
+    """
+    Aproxima a conversão de tipos do PostgREST: timestamps ISO viram datetime
+    (comparando fusos diferentes corretamente) e strings numéricas viram números.
+    """
+    if isinstance(valor, str):
+        return _texto_comparavel(valor)
+    if isinstance(valor, bool):
+        return valor
+    if isinstance(valor, int):
+        return float(valor)
+    return valor
+
+
+def _igual(a, b):
+    if a is None or b is None:
+        return False
+    ca, cb = _comparavel(a), _comparavel(b)
+    if type(ca) is not type(cb):
+        return str(a) == str(b)
+    return ca == cb
+
+
+def _comparar(a, b, operador):
+    if a is None or b is None:
+        return False
+    ca, cb = _comparavel(a), _comparavel(b)
+    if type(ca) is not type(cb):
+        ca, cb = str(a), str(b)
+    try:
+        if operador == "gt":
+            return ca > cb
+        if operador == "gte":
+            return ca >= cb
+        if operador == "lt":
+            return ca < cb
+        return ca <= cb
+    except TypeError:
+        return False
+
+
+def _padrao_like(padrao, ignorar_caixa):
+    regex = "".join(
+        ".*" if c in "%*" else "." if c == "_" else re.escape(c) for c in padrao
+    )
+    return re.compile(f"^{regex}$", re.IGNORECASE | re.DOTALL if ignorar_caixa else re.DOTALL)
+
+
+def _valor_is(valor):
+    if valor is None or str(valor).lower() == "null":
+        return None
+    return {"true": True, "false": False}.get(str(valor).lower(), valor)
+
+
+def _condicao(coluna, operador, valor):
+    """
+    Retorna uma função registro -> bool para um filtro do PostgREST.
+    """
+    if operador == "eq":
+        return lambda r: _igual(r.get(coluna), valor)
+    if operador == "neq":
+        return lambda r: r.get(coluna) is not None and not _igual(r.get(coluna), valor)
+    if operador in ("gt", "gte", "lt", "lte"):
+        return lambda r: _comparar(r.get(coluna), valor, operador)
+    if operador in ("like", "ilike"):
+        padrao = _padrao_like(str(valor), operador == "ilike")
+        return lambda r: r.get(coluna) is not None and bool(padrao.match(str(r.get(coluna))))
+    if operador == "in":
+        valores = list(valor)
+        return lambda r: any(_igual(r.get(coluna), v) for v in valores)
+    if operador == "is":
+        alvo = _valor_is(valor)
+        return lambda r: r.get(coluna) is alvo if alvo in (None, True, False) else r.get(coluna) == alvo
+    raise ValueError(f"Operador não suportado no banco em memória: {operador}")
+
+
+def _condicoes_or(expressao):
+    """
+    Interpreta a sintaxe de or_(): "col.op.valor,col.op.valor".
+    """
+    condicoes = []
+    for parte in expressao.split(","):
+        coluna, operador, valor = parte.strip().split(".", 2)
+        negar = False
+        if operador == "not":
+            operador, valor = valor.split(".", 1)
+            negar = True
+        if operador == "in":
+            valor = [v.strip().strip('"') for v in valor.strip("()").split(",")]
+        cond = _condicao(coluna, operador, valor)
+        condicoes.append((lambda c: lambda r: not c(r))(cond) if negar else cond)
+    return lambda r: any(c(r) for c in condicoes)
+
+
+class ConsultaMemoria:
+    """
+    Subconjunto do construtor de consultas do supabase-py usado pelo app:
+    select/insert/update/upsert/delete, filtros (eq, neq, gt, gte, lt, lte,
+    like, ilike, in_, is_, or_ e o prefixo not_), order, range e limit.
+    """
+
+    def __init__(self, banco, tabela):
+        self._banco = banco
+        self._tabela = tabela
+        self._operacao = "select"
+        self._colunas = "*"
+        self._contar = False
+        self._dados = None
+        self._condicoes = []
+        self._negar = False
+        self._ordens = []
+        self._inicio = 0
+        self._fim = None
+        self._id_minimo = None
+        self._ids_em = None
+
+    # Operações
+    def select(self, colunas="*", count=None, **kwargs):
+        self._operacao = "select"
+        self._colunas = colunas
+        self._contar = count is not None
+        return self
+
+    def insert(self, dados, **kwargs):
+        self._operacao = "insert"
+        self._dados = dados
+        return self
+
+    def upsert(self, dados, **kwargs):
+        self._operacao = "upsert"
+        self._dados = dados
+        return self
+
+    def update(self, dados, **kwargs):
+        self._operacao = "update"
+        self._dados = dados
+        return self
+
+    def delete(self, **kwargs):
+        self._operacao = "delete"
+        return self
+
+    # Filtros
+    @property
+    def not_(self):
+        self._negar = True
+        return self
+
+    def _filtrar(self, condicao, coluna=None, operador=None, valor=None):
+        if coluna == "id" and operador in ("gt", "gte") and not self._negar:
+            # Cursor por id: o banco pula direto para a posição (como o índice da chave primária)
+            self._id_minimo = (operador, valor)
+        if coluna == "id" and operador == "in" and not self._negar:
+            # Lista de ids: busca cada um pelo índice da chave primária
+            self._ids_em = list(valor)
+        if self._negar:
+            self._negar = False
+            original = condicao
+            condicao = lambda r: not original(r)
+        self._condicoes.append(condicao)
+        return self
+
+    def eq(self, coluna, valor):
+        return self._filtrar(_condicao(coluna, "eq", valor))
+
+    def neq(self, coluna, valor):
+        return self._filtrar(_condicao(coluna, "neq", valor))
+
+    def gt(self, coluna, valor):
+        return self._filtrar(_condicao(coluna, "gt", valor), coluna, "gt", valor)
+
+    def gte(self, coluna, valor):
+        return self._filtrar(_condicao(coluna, "gte", valor), coluna, "gte", valor)
+
+    def lt(self, coluna, valor):
+        return self._filtrar(_condicao(coluna, "lt", valor))
+
+    def lte(self, coluna, valor):
+        return self._filtrar(_condicao(coluna, "lte", valor))
+
+    def like(self, coluna, padrao):
+        return self._filtrar(_condicao(coluna, "like", padrao))
+
+    def ilike(self, coluna, padrao):
+        return self._filtrar(_condicao(coluna, "ilike", padrao))
+
+    def in_(self, coluna, valores):
+        return self._filtrar(_condicao(coluna, "in", valores), coluna, "in", valores)
+
+    def is_(self, coluna, valor):
+        return self._filtrar(_condicao(coluna, "is", valor))
+
+    def or_(self, expressao, **kwargs):
+        return self._filtrar(_condicoes_or(expressao))
+
+    # Ordenação e paginação
+    def order(self, coluna, desc=False, nullsfirst=None, **kwargs):
+        self._ordens.append((coluna, desc, desc if nullsfirst is None else nullsfirst))
+        return self
+
+    def range(self, inicio, fim, **kwargs):
+        self._inicio, self._fim = inicio, fim
+        return self
+
+    def limit(self, quantidade, **kwargs):
+        self._fim = self._inicio + quantidade - 1
+        return self
+
+    def execute(self):
+        return self._banco._executar(self)
+
+
+class BancoMemoria:
+    """
+    Substituto em memória do cliente do Supabase, para benchmarks sem rede.
+    - tabelas: dicionário nome -> lista de registros (ids preenchidos na inserção)
+    - visoes: dicionário nome -> função(banco) que devolve as linhas da view
+    - funcoes: dicionário nome -> função(banco, **params) para rpc()
+    - latencia_ms: atraso artificial por requisição, simulando a rede
+    Funções rpc não registradas levantam APIError com código PGRST202, como no
+    Supabase quando a função não existe, para exercitar os caminhos alternativos.
+    """
+
+    def __init__(self, tabelas=None, visoes=None, funcoes=None, latencia_ms=0.0, max_linhas=MAX_LINHAS_PADRAO):
+        self.tabelas = {nome: list(linhas) for nome, linhas in (tabelas or {}).items()}
+        self.visoes = dict(visoes or {})
+        self.funcoes = dict(funcoes or {})
+        self.latencia_ms = latencia_ms
+        self.max_linhas = max_linhas
+        self.requisicoes = 0
+        self.segundos_no_banco = 0.0
+        self._lock = threading.Lock()
+        self._indices_id = {}
+        self._proximos_ids = {
+            nome: max((r.get("id") or 0 for r in linhas), default=0) + 1
+            for nome, linhas in self.tabelas.items()
+        }
+
+    def table(self, nome):
+        return ConsultaMemoria(self, nome)
+
+    from_ = table
+
+    def rpc(self, funcao, params=None, **kwargs):
+        banco = self
+
+        class _Rpc:
+            def execute(self):
+                banco._esperar()
+                inicio = time.perf_counter()
+                try:
+                    return self._chamar()
+                finally:
+                    banco.segundos_no_banco += time.perf_counter() - inicio
+
+            def _chamar(self):
+                if funcao not in banco.funcoes:
+                    raise APIError({
+                        "code": "PGRST202",
+                        "message": f"Could not find the function public.{funcao}",
+                    })
+                with banco._lock:
+                    return Resposta(banco.funcoes[funcao](banco, **(params or {})))
+
+        return _Rpc()
+
+    def _esperar(self):
+        self.requisicoes += 1
+        if self.latencia_ms:
+            time.sleep(self.latencia_ms / 1000)
+
+    def _linhas(self, tabela):
+        if tabela in self.visoes:
+            return self.visoes[tabela](self)
+        return self.tabelas.setdefault(tabela, [])
+
+    def _inserir(self, tabela, registro):
+        registro = dict(registro)
+        if registro.get("id") is None:
+            registro["id"] = self._proximos_ids.get(tabela, 1)
+        self._proximos_ids[tabela] = max(self._proximos_ids.get(tabela, 1), registro["id"] + 1)
+        self.tabelas.setdefault(tabela, []).append(registro)
+        return registro
+
+    def _ids_em_ordem(self, tabela, linhas):
+        """
+        Lista dos ids de 'tabela' se os registros estiverem em ordem de id
+        (inserções recebem ids crescentes), ou None se não estiverem.
+        """
+        chave = (len(linhas), id(linhas))
+        indice = self._indices_id.get(tabela)
+        if indice is None or indice[0] != chave:
+            ids = [r.get("id") or 0 for r in linhas]
+            indice = (chave, ids if ids == sorted(ids) else None)
+            self._indices_id[tabela] = indice
+        return indice[1]
+
+    def _posicao_id(self, ids, operador, valor):
+        """
+        Posição do primeiro registro acima do cursor de id (como o índice da chave primária).
+        """
+        valor = int(float(valor))
+        return bisect.bisect_right(ids, valor) if operador == "gt" else bisect.bisect_left(ids, valor)
+
+    def _executar(self, consulta):
+        self._esperar()
+        inicio = time.perf_counter()
+        try:
+            return self._executar_consulta(consulta)
+        finally:
+            self.segundos_no_banco += time.perf_counter() - inicio
+
+    def _executar_consulta(self, consulta):
+        with self._lock:
+            linhas = self._linhas(consulta._tabela)
+            if consulta._operacao in ("insert", "upsert"):
+                dados = consulta._dados if isinstance(consulta._dados, list) else [consulta._dados]
+                inseridos = []
+                for registro in dados:
+                    existente = None
+                    if consulta._operacao == "upsert" and registro.get("id") is not None:
+                        existente = next((r for r in linhas if r.get("id") == registro["id"]), None)
+                    if existente is not None:
+                        existente.update(registro)
+                        inseridos.append(dict(existente))
+                    else:
+                        inseridos.append(dict(self._inserir(consulta._tabela, registro)))
+                return Resposta(inseridos)
+
+            ids = None if consulta._tabela in self.visoes else self._ids_em_ordem(consulta._tabela, linhas)
+            candidatas = linhas
+            if ids is not None and consulta._ids_em is not None:
+                posicoes = sorted({bisect.bisect_left(ids, int(float(v))) for v in consulta._ids_em})
+                candidatas = [linhas[p] for p in posicoes if p < len(linhas)]
+            elif ids is not None and consulta._id_minimo is not None:
+                candidatas = linhas[self._posicao_id(ids, *consulta._id_minimo):]
+            filtradas = (r for r in candidatas if all(c(r) for c in consulta._condicoes))
+
+            fim = consulta._fim
+            if consulta._operacao == "select":
+                fim = min(consulta._inicio + self.max_linhas - 1, fim if fim is not None else float("inf"))
+            ordem_natural = ids is not None and all(
+                coluna == "id" and not desc for coluna, desc, _ in consulta._ordens
+            )
+            if consulta._operacao == "select" and ordem_natural and not consulta._contar:
+                # Já em ordem de id: basta ler até completar a página
+                selecionadas = list(itertools.islice(filtradas, int(fim) + 1))
+            else:
+                selecionadas = list(filtradas)
+
+            if consulta._operacao == "update":
+                for registro in selecionadas:
+                    registro.update(consulta._dados)
+                return Resposta([dict(r) for r in selecionadas])
+            if consulta._operacao == "delete":
+                removidas = {id(r) for r in selecionadas}
+                linhas[:] = [r for r in linhas if id(r) not in removidas]
+                return Resposta([dict(r) for r in selecionadas])
+
+            for coluna, desc, nulos_primeiro in ([] if ordem_natural else reversed(consulta._ordens)):
+                presentes = [r for r in selecionadas if r.get(coluna) is not None]
+                nulos = [r for r in selecionadas if r.get(coluna) is None]
+                presentes.sort(key=lambda r: _comparavel(r[coluna]), reverse=desc)
+                selecionadas = nulos + presentes if nulos_primeiro else presentes + nulos
+
+            total = len(selecionadas)
+            pagina = selecionadas[consulta._inicio:int(fim) + 1]
+
+            colunas = consulta._colunas
+            if colunas.strip() == "*":
+                dados = [dict(r) for r in pagina]
+            else:
+                nomes = [c.strip() for c in colunas.split(",") if c.strip()]
+                dados = [{c: r.get(c) for c in nomes} for r in pagina]
+            return Resposta(dados, total if consulta._contar else None)
@@ -0,0 +1,265 @@
+# benchmarks/dados_sinteticos.py
+import random
+from datetime import datetime, timedelta
+
+import pytz
+
+from benchmarks.banco_memoria import BancoMemoria
+
+FORTALEZA_TZ = pytz.timezone("America/Fortaleza")
+FORMATO_DATA_HORA = "%d/%m/%Y %H:%M:%S"
+
+# Data fixa de referência: o mesmo conjunto de dados em todas as execuções
+REFERENCIA_PADRAO = datetime(2025, 6, 30, 17, 0, 0)
+
+TAMANHOS_PADRAO = {
+    "ubs": 50,
+    "inventario": 5000,
+    "chamados": 100000,
+    "estoque": 40,
+    "chat_messages": 20000,
+    "usuarios": 30,
+}
+
+BAIRROS = [
+    "Centro", "Fazendinha", "Nova Aldeota", "Boa Vista", "Cacimbas", "Ladeira",
+    "Coqueiro", "Violete", "Lagoa da Cruz", "Arapari", "Baleia", "Marinheiros",
+    "Deserto", "Assunção", "Bela Vista", "Cruxati", "Calugi", "Picos",
+]
+SETORES = [
+    "Recepção", "Farmácia", "Consultório Médico", "Consultório Odontológico",
+    "Enfermagem", "Vacinação", "Administração", "Triagem", "Laboratório",
+    "Almoxarifado", "Coordenação", "Sala de Curativos",
+]
+TIPOS_EQUIPAMENTO = ["Computador", "Impressora", "Monitor", "Nobreak", "Estabilizador", "Notebook"]
+MARCAS = ["Dell", "HP", "Lenovo", "Positivo", "Epson", "Brother", "Samsung", "SMS"]
+STATUS = ["Ativo", "Ativo", "Ativo", "Em Manutenção", "Inativo"]
+TIPOS_DEFEITO = [
+    "Computador não liga", "Computador lento", "Sem internet", "Impressora sem tinta",
+    "Impressora atolando papel", "Tela azul", "Monitor sem imagem", "Teclado com defeito",
+    "Mouse com defeito", "Sistema travando", "Instalação de software", "Nobreak apitando",
+]
+SOLUCOES = [
+    "Troca de fonte", "Limpeza interna", "Reinstalação do sistema", "Troca de cabo de rede",
+    "Configuração da impressora", "Troca de toner", "Atualização de drivers", "Troca de memória RAM",
+]
+PECAS = [
+    "Fonte ATX", "Memória RAM 8GB", "SSD 240GB", "Cabo de rede", "Toner HP 85A",
+    "Teclado USB", "Mouse USB", "Cabo HDMI", "Placa de rede", "Bateria Nobreak",
+]
+
+
+def _momento_util(rng, inicio, fim):
+    """
+    Instante aleatório entre 'inicio' e 'fim', em dia útil e no horário de expediente.
+    """
+    while True:
+        momento = inicio + timedelta(seconds=rng.uniform(0, (fim - inicio).total_seconds()))
+        if momento.weekday() < 5 and 7 <= momento.hour < 18:
+            return momento.replace(microsecond=0)
+
+
+def _iso_fortaleza(momento):
+    return FORTALEZA_TZ.localize(momento).isoformat()
+
+
+def gerar_dados(tamanhos=None, semente=42, referencia=REFERENCIA_PADRAO, anos=3):
+    """
+    Gera um dicionário tabela -> lista de registros com o formato das tabelas
+    do Supabase usadas pelo app. Com a mesma 'semente' e 'referencia' o
+    resultado é idêntico, para comparar execuções.
+    """
+    tamanhos = {**TAMANHOS_PADRAO, **(tamanhos or {})}
+    rng = random.Random(semente)
+    inicio_periodo = referencia - timedelta(days=365 * anos)
+
+    ubs = [
+        {"id": i + 1, "nome_ubs": f"UBS {BAIRROS[i % len(BAIRROS)]} {i // len(BAIRROS) + 1}"}
+        for i in range(tamanhos["ubs"])
+    ]
+    nomes_ubs = [u["nome_ubs"] for u in ubs]
+    setores = [{"id": i + 1, "nome_setor": nome} for i, nome in enumerate(SETORES)]
+
+    usuarios = [{"id": 1, "username": "admin", "password": "$2b$12$benchmark", "role": "admin"}]
+    usuarios += [
+        {"id": i + 2, "username": f"usuario{i + 1}", "password": "$2b$12$benchmark",
+         "role": "admin" if i < 3 else "user"}
+        for i in range(tamanhos["usuarios"] - 1)
+    ]
+    nomes_usuarios = [u["username"] for u in usuarios]
+
+    inventario = []
+    for i in range(tamanhos["inventario"]):
+        aquisicao = _momento_util(rng, inicio_periodo - timedelta(days=365 * 2), referencia)
+        inventario.append({
+            "id": i + 1,
+            "numero_patrimonio": str(100000 + i),
+            "tipo": rng.choice(TIPOS_EQUIPAMENTO),
+            "marca": rng.choice(MARCAS),
+            "modelo": f"Modelo {rng.randint(100, 999)}",
+            "numero_serie": f"SN{rng.randint(10 ** 7, 10 ** 8 - 1)}",
+            "status": rng.choice(STATUS),
+            "localizacao": rng.choice(nomes_ubs),
+            "propria_locada": rng.choice(["Própria", "Locada"]),
+            "setor": rng.choice(SETORES),
+            "data_aquisicao": aquisicao.strftime("%d/%m/%Y"),
+            "data_garantia_fim": (aquisicao + timedelta(days=365 * 3)).strftime("%d/%m/%Y"),
+            "updated_at": _iso_fortaleza(aquisicao),
+        })
+    patrimonios = [item["numero_patrimonio"] for item in inventario]
+
+    estoque = [
+        {"id": i + 1, "nome": PECAS[i % len(PECAS)] + ("" if i < len(PECAS) else f" ({i // len(PECAS) + 1})"),
+         "quantidade": 0, "descricao": "", "nota_fiscal": f"NF{1000 + i}",
+         "data_adicao": inicio_periodo.strftime(FORMATO_DATA_HORA)}
+        for i in range(tamanhos["estoque"])
+    ]
+    movimentos = [
+        {"id": i + 1, "peca_id": peca["id"], "tipo": "ajuste", "quantidade": rng.randint(50, 500),
+         "chamado_id": None, "criado_em": _iso_fortaleza(inicio_periodo)}
+        for i, peca in enumerate(estoque)
+    ]
+
+    # Chamados em ordem cronológica, como na tabela real (id e protocolo crescentes)
+    aberturas = sorted(
+        _momento_util(rng, inicio_periodo, referencia) for _ in range(tamanhos["chamados"])
+    )
+    chamados, pecas_usadas, historico = [], [], []
+    for i, abertura in enumerate(aberturas):
+        recente = (referencia - abertura) < timedelta(days=20)
+        fechado = rng.random() < (0.5 if recente else 0.97)
+        fechamento = None
+        if fechado:
+            fechamento = min(abertura + timedelta(hours=rng.expovariate(1 / 30)), referencia)
+        patrimonio = rng.choice(patrimonios) if rng.random() < 0.7 else None
+        chamado = {
+            "id": i + 1,
+            "username": rng.choice(nomes_usuarios),
+            "ubs": rng.choice(nomes_ubs),
+            "setor": rng.choice(SETORES),
+            "tipo_defeito": rng.choice(TIPOS_DEFEITO),
+            "problema": f"Descrição do problema {i + 1}",
+            "hora_abertura": abertura.strftime(FORMATO_DATA_HORA),
+            "hora_fechamento": fechamento.strftime(FORMATO_DATA_HORA) if fechamento else None,
+            "solucao": rng.choice(SOLUCOES) if fechamento else None,
+            "protocolo": i + 1,
+            "patrimonio": patrimonio,
+            "aberto_em": _iso_fortaleza(abertura),
+            "updated_at": _iso_fortaleza(fechamento or abertura),
+        }
+        chamados.append(chamado)
+        if fechamento and rng.random() < 0.3:
+            for _ in range(rng.randint(1, 2)):
+                peca = rng.choice(estoque)
+                pecas_usadas.append({
+                    "id": len(pecas_usadas) + 1, "chamado_id": chamado["id"],
+                    "peca_nome": peca["nome"], "data_uso": chamado["hora_fechamento"],
+                    "updated_at": chamado["updated_at"],
+                })
+                movimentos.append({
+                    "id": len(movimentos) + 1, "peca_id": peca["id"], "tipo": "saida",
+                    "quantidade": -1, "chamado_id": chamado["id"], "criado_em": chamado["updated_at"],
+                })
+        if fechamento and patrimonio:
+            historico.append({
+                "id": len(historico) + 1, "numero_patrimonio": patrimonio,
+                "descricao": f"Manutenção: {chamado['solucao']}.",
+                "data_manutencao": chamado["hora_fechamento"],
+                "updated_at": chamado["updated_at"],
+            })
+
+    mensagens = []
+    for i in range(tamanhos["chat_messages"]):
+        usuario = rng.choice(nomes_usuarios[1:] or nomes_usuarios)
+        do_usuario = rng.random() < 0.5
+        momento = _momento_util(rng, inicio_periodo, referencia)
+        mensagens.append({
+            "id": i + 1,
+            "remetente": usuario if do_usuario else "admin",
+            "destinatario": "admin" if do_usuario else usuario,
+            "mensagem": f"Mensagem {i + 1}",
+            "timestamp": momento.strftime(FORMATO_DATA_HORA),
+        })
+
+    return {
+        "ubs": ubs,
+        "setores": setores,
+        "usuarios": usuarios,
+        "inventario": inventario,
+        "chamados": chamados,
+        "pecas_usadas": pecas_usadas,
+        "historico_manutencao": historico,
+        "estoque": estoque,
+        "estoque_movimentos": movimentos,
+        "chat_messages": mensagens,
+        "chat_leituras": [],
+        "protocolo_contador": [{"id": 1, "ultimo": len(chamados)}],
+    }
+
+
+def _estoque_com_saldo(banco):
+    saldos = {}
+    for movimento in banco.tabelas.get("estoque_movimentos", []):
+        saldos[movimento["peca_id"]] = saldos.get(movimento["peca_id"], 0) + movimento["quantidade"]
+    return [
+        {**peca, "quantidade": saldos.get(peca["id"], 0)}
+        for peca in banco.tabelas.get("estoque", [])
+    ]
+
+
+def _reservar_protocolos(banco, quantidade=1):
+    contador = banco.tabelas["protocolo_contador"][0]
+    quantidade = max(int(quantidade), 1)
+    contador["ultimo"] += quantidade
+    return contador["ultimo"] - quantidade + 1
+
+
+def _caixa_entrada_chat(banco, p_leitor, p_caixa="admin"):
+    leituras = {
+        l["usuario"]: l["ultimo_id_lido"]
+        for l in banco.tabelas.get("chat_leituras", []) if l["leitor"] == p_leitor
+    }
+    conversas = {}
+    for msg in banco.tabelas.get("chat_messages", []):
+        if p_caixa not in (msg["remetente"], msg["destinatario"]):
+            continue
+        usuario = msg["destinatario"] if msg["remetente"] == p_caixa else msg["remetente"]
+        conversa = conversas.setdefault(usuario, {"usuario": usuario, "ultimo_id": 0, "nao_lidas": 0})
+        if msg["id"] > conversa["ultimo_id"]:
+            conversa.update({
+                "ultimo_id": msg["id"], "ultimo_remetente": msg["remetente"],
+                "ultima_mensagem": msg["mensagem"], "ultimo_timestamp": msg["timestamp"],
+            })
+        if msg["remetente"] != p_caixa and msg["id"] > leituras.get(usuario, 0):
+            conversa["nao_lidas"] += 1
+    return sorted(conversas.values(), key=lambda c: (c["nao_lidas"] > 0, c["ultimo_id"]), reverse=True)
+
+
+def _marcar_chat_lido(banco, p_leitor, p_usuario, p_ultimo_id):
+    leituras = banco.tabelas.setdefault("chat_leituras", [])
+    for leitura in leituras:
+        if leitura["leitor"] == p_leitor and leitura["usuario"] == p_usuario:
+            leitura["ultimo_id_lido"] = max(leitura["ultimo_id_lido"], p_ultimo_id)
+            return None
+    leituras.append({"leitor": p_leitor, "usuario": p_usuario, "ultimo_id_lido": p_ultimo_id})
+    return None
+
+
+def criar_banco(dados=None, latencia_ms=0.0, **kwargs):
+    """
+    Cria um BancoMemoria com os dados sintéticos (gerados com 'kwargs' se
+    'dados' não for informado), a view estoque_com_saldo e as funções SQL usadas pelo app
+    (reservar_protocolos, caixa_entrada_chat, marcar_chat_lido).
+    """
+    if dados is None:
+        dados = gerar_dados(**kwargs)
+    return BancoMemoria(
+        tabelas=dados,
+        visoes={"estoque_com_saldo": _estoque_com_saldo},
+        funcoes={
+            "reservar_protocolos": _reservar_protocolos,
+            "caixa_entrada_chat": _caixa_entrada_chat,
+            "marcar_chat_lido": _marcar_chat_lido,
+        },
+        latencia_ms=latencia_ms,
+    )
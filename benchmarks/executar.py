@@ -0,0 +1,254 @@
+# benchmarks/executar.py
+"""
+Executa os benchmarks do app contra o banco em memória e grava um relatório JSON.
+
+    python -m benchmarks.executar                       # dados completos
+    python -m benchmarks.executar --escala 0.1          # 10% dos dados (rápido)
+    python -m benchmarks.executar --comparar anterior.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Ambiente do app antes de qualquer importação dele: sem Supabase real,
+# sem espelho local e matplotlib sem interface gráfica
+os.environ.setdefault("SUPABASE_URL", "http://benchmark.invalid")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+os.environ["ESPELHO_LOCAL"] = "0"
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from benchmarks.dados_sinteticos import REFERENCIA_PADRAO, TAMANHOS_PADRAO, criar_banco, gerar_dados
+
+# Tabelas cujo volume acompanha --escala (as de referência mantêm o tamanho)
+TABELAS_ESCALADAS = ("inventario", "chamados", "chat_messages")
+# Chamados desenhados no benchmark do motor de PDF (páginas por segundo)
+LINHAS_RELATORIO_STREAMING = 10000
+
+
+def _preparar_app(banco):
+    """
+    Aponta o app para o banco em memória e importa o OS700 (sem servidor do
+    Streamlit, os comandos st.* apenas não desenham nada).
+    """
+    os.chdir(RAIZ)
+    import streamlit.config
+    import streamlit.logger
+    import supabase_client
+
+    # Sem servidor, cada comando st.* avisaria da falta de ScriptRunContext.
+    # A leitura da configuração do Streamlit (feita na primeira consulta a uma
+    # opção) volta os loggers ao nível de logger.level: ela é forçada aqui,
+    # antes de baixar o nível, para não acontecer durante a importação do OS700.
+    streamlit.config.get_config_options()
+    streamlit.logger.set_log_level("error")
+    supabase_client.definir_cliente(banco)
+    import OS700
+
+    logging.getLogger("matplotlib").setLevel(logging.WARNING)
+    return OS700
+
+
+def _medir(nome, funcao, banco, repeticoes, antes=None):
+    """
+    Executa 'funcao' uma vez para aquecer e depois 'repeticoes' vezes, medindo
+    o tempo de cada execução. Da última execução guarda as requisições ao banco,
+    o tempo gasto dentro do banco em memória e as linhas/bytes lidos.
+    """
+    import instrumentacao
+
+    instrumentacao.definir_pagina(f"benchmark:{nome}")
+    if antes:
+        antes()
+    funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        if antes:
+            antes()
+        instrumentacao.limpar_historico()
+        requisicoes, no_banco = banco.requisicoes, banco.segundos_no_banco
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    consultas = instrumentacao.consultas_recentes()
+    resultado = {
+        "repeticoes": repeticoes,
+        "min_s": round(min(tempos), 4),
+        "mediana_s": round(statistics.median(tempos), 4),
+        "media_s": round(statistics.mean(tempos), 4),
+        "requisicoes": banco.requisicoes - requisicoes,
+        "segundos_no_banco": round(banco.segundos_no_banco - no_banco, 4),
+        "linhas_lidas": sum(c["linhas"] for c in consultas),
+        "bytes_lidos": sum(c["bytes"] or 0 for c in consultas),
+    }
+    print(f"{nome:<32} {resultado['mediana_s']:>9.4f} s  ({resultado['requisicoes']} requisições)", flush=True)
+    return resultado
+
+
+def executar(escala=1.0, semente=42, repeticoes=3, latencia_ms=0.0, dias_relatorio=30, cache_quente=False):
+    """
+    Gera os dados, executa todos os benchmarks e retorna o relatório (dicionário).
+    """
+    tamanhos = {
+        tabela: max(1, int(quantidade * escala)) if tabela in TABELAS_ESCALADAS else quantidade
+        for tabela, quantidade in TAMANHOS_PADRAO.items()
+    }
+    inicio = time.perf_counter()
+    dados = gerar_dados(tamanhos, semente=semente)
+    geracao = time.perf_counter() - inicio
+    banco = criar_banco(dados, latencia_ms=latencia_ms)
+    app = _preparar_app(banco)
+
+    import pandas as pd
+    import streamlit as st
+    from cache_dados import CACHE_REFERENCIA
+    from chamados import (
+        COLUNAS_RELATORIO_CHAMADOS, buscar_chamados_texto, calculate_working_hours, filtros_periodo,
+        gerar_relatorio_chamados_pdf, list_chamados
+    )
+    from expediente import tempo_util_vetorizado
+    from inventario import dashboard_inventario, gerar_relatorio_inventario_pdf
+    from relatorio_pdf import RelatorioPDF
+
+    def limpar_cache():
+        if not cache_quente:
+            CACHE_REFERENCIA.invalidar()
+
+    fechados = [c for c in dados["chamados"] if c["hora_fechamento"]]
+    pares = [
+        (datetime.strptime(c["hora_abertura"], "%d/%m/%Y %H:%M:%S"),
+         datetime.strptime(c["hora_fechamento"], "%d/%m/%Y %H:%M:%S"))
+        for c in fechados[:10000]
+    ]
+    aberturas = pd.Series([c["hora_abertura"] for c in fechados])
+    fechamentos = pd.Series([c["hora_fechamento"] for c in fechados])
+
+    fim_periodo = REFERENCIA_PADRAO.date()
+    inicio_periodo = fim_periodo - timedelta(days=dias_relatorio)
+
+    def relatorios():
+        # Os campos de data da página recebem o período do benchmark
+        with mock.patch.object(st, "date_input", side_effect=[inicio_periodo, fim_periodo]):
+            app.relatorios_page()
+
+    df_inventario = pd.DataFrame(dados["inventario"])
+    df_chamados_periodo = pd.DataFrame(
+        list_chamados(filtros=filtros_periodo(inicio_periodo, fim_periodo))
+    ).drop(columns=["aberto_em"], errors="ignore")
+
+    # Motor de PDF sozinho: chamados lidos de um gerador, sem DataFrame
+    paginas_streaming = {}
+
+    def relatorio_streaming():
+        relatorio = RelatorioPDF("Relatório Completo de Chamados Técnicos")
+        relatorio.tabela(COLUNAS_RELATORIO_CHAMADOS, (c for c in dados["chamados"][:LINHAS_RELATORIO_STREAMING]))
+        paginas_streaming["paginas"] = relatorio.page_no()
+        relatorio.saida()
+
+    benchmarks = {
+        "calculate_working_hours": lambda: [calculate_working_hours(a, f) for a, f in pares],
+        "tempo_util_vetorizado": lambda: tempo_util_vetorizado(aberturas, fechamentos),
+        "dashboard_page": app.dashboard_page,
+        "relatorios_page": relatorios,
+        "dashboard_inventario": dashboard_inventario,
+        "gerar_relatorio_inventario_pdf": lambda: gerar_relatorio_inventario_pdf(df_inventario),
+        "gerar_relatorio_chamados_pdf": lambda: gerar_relatorio_chamados_pdf(df_chamados_periodo),
+        "relatorio_pdf_streaming": relatorio_streaming,
+        # Índice local da busca (sem a função buscar_chamados no banco em memória)
+        "buscar_chamados_texto": lambda: [
+            buscar_chamados_texto(consulta, situacao=situacao)
+            for consulta, situacao in (("tela azul", None), ("impressora toner", "finalizados"), (fechados[0]["patrimonio"] or "100001", None))
+        ],
+    }
+
+    resultados = {}
+    for nome, funcao in benchmarks.items():
+        resultados[nome] = _medir(nome, funcao, banco, repeticoes, antes=limpar_cache)
+
+    streaming = resultados["relatorio_pdf_streaming"]
+    streaming["paginas"] = paginas_streaming["paginas"]
+    streaming["paginas_por_segundo"] = round(paginas_streaming["paginas"] / streaming["mediana_s"], 1)
+    print(f"{'':<32} {streaming['paginas_por_segundo']:>9.1f} páginas/s ({streaming['paginas']} páginas)")
+
+    return {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": {
+            "escala": escala,
+            "semente": semente,
+            "repeticoes": repeticoes,
+            "latencia_ms": latencia_ms,
+            "dias_relatorio": dias_relatorio,
+            "cache_quente": cache_quente,
+            "referencia": REFERENCIA_PADRAO.isoformat(),
+        },
+        "tamanhos": {tabela: len(linhas) for tabela, linhas in dados.items()},
+        "geracao_dados_s": round(geracao, 3),
+        "resultados": resultados,
+    }
+
+
+def comparar(atual, anterior):
+    """
+    Imprime a variação da mediana de cada benchmark em relação a um relatório anterior.
+    """
+    print(f"\n{'benchmark':<32} {'anterior':>10} {'atual':>10} {'variação':>10}")
+    for nome, resultado in atual["resultados"].items():
+        antes = anterior.get("resultados", {}).get(nome)
+        if not antes:
+            print(f"{nome:<32} {'-':>10} {resultado['mediana_s']:>10.4f} {'novo':>10}")
+            continue
+        variacao = (resultado["mediana_s"] / antes["mediana_s"] - 1) if antes["mediana_s"] else 0.0
+        print(f"{nome:<32} {antes['mediana_s']:>10.4f} {resultado['mediana_s']:>10.4f} {variacao:>+10.1%}")
+    if atual.get("parametros") != anterior.get("parametros"):
+        print("Atenção: os parâmetros das execuções são diferentes.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do OS700 com banco em memória.")
+    parser.add_argument("--escala", type=float, default=1.0, help="fração do volume de dados padrão")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="atraso simulado por requisição")
+    parser.add_argument("--dias-relatorio", type=int, default=30, help="período da página de relatórios")
+    parser.add_argument("--cache-quente", action="store_true", help="não limpar o cache entre execuções")
+    parser.add_argument("--saida", help="arquivo JSON do relatório (padrão: benchmarks/resultados/)")
+    parser.add_argument("--comparar", help="relatório JSON anterior para comparação")
+    args = parser.parse_args(argv)
+
+    relatorio = executar(
+        escala=args.escala,
+        semente=args.semente,
+        repeticoes=args.repeticoes,
+        latencia_ms=args.latencia_ms,
+        dias_relatorio=args.dias_relatorio,
+        cache_quente=args.cache_quente,
+    )
+
+    saida = args.saida or os.path.join(
+        RAIZ, "benchmarks", "resultados", f"relatorio-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    print(f"\nRelatório gravado em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            comparar(relatorio, json.load(arquivo))
+
+
+if __name__ == "__main__":
+    main()
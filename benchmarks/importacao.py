@@ -0,0 +1,164 @@
+# benchmarks/importacao.py
+"""
+Mede o custo de inicialização do OS700 (como após um deploy ou reinício do
+container): cada medição roda em um processo Python novo, sem cache de módulos.
+
+    python -m benchmarks.importacao
+    python -m benchmarks.importacao --repeticoes 5 --comparar anterior.json
+
+Relata o tempo de importação do OS700 (que desenha a página de login), os
+módulos pesados carregados por ela e o custo, a frio, de cada módulo do app
+e das bibliotecas que as páginas importam sob demanda.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos medidos individualmente (bibliotecas e módulos do app)
+MODULOS = [
+    "streamlit",
+    "streamlit_option_menu",
+    "supabase",
+    "bcrypt",
+    "pandas",
+    "plotly.express",
+    "matplotlib.pyplot",
+    "fpdf",
+    "st_aggrid",
+    "twilio.rest",
+    "autenticacao",
+    "chamados",
+    "ubs",
+    "setores",
+    "estoque",
+    "inventario",
+]
+
+# Bibliotecas que não devem ser carregadas para desenhar a página de login
+PESADOS = ["pandas", "plotly.express", "matplotlib", "fpdf", "st_aggrid", "twilio", "inventario", "estoque", "ubs"]
+
+_LINHA_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+
+
+def _ambiente():
+    ambiente = dict(os.environ)
+    ambiente.setdefault("SUPABASE_URL", "http://benchmark.invalid")
+    ambiente.setdefault("SUPABASE_KEY", "benchmark")
+    ambiente["ESPELHO_LOCAL"] = "0"
+    ambiente.setdefault("MPLBACKEND", "Agg")
+    return ambiente
+
+
+def _importar(modulo):
+    """
+    Importa 'modulo' em um processo novo com -X importtime. Retorna o tempo
+    cumulativo (s), os filhos diretos com seus tempos e os módulos pesados carregados.
+    """
+    codigo = (
+        "import json, sys\n"
+        f"import {modulo}\n"
+        f"print(json.dumps([m for m in {PESADOS!r} if m in sys.modules]))\n"
+    )
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=RAIZ, env=_ambiente(), capture_output=True, text=True,
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {modulo}: {processo.stderr.strip().splitlines()[-1:]}")
+
+    total = None
+    filhos = {}
+    # -X importtime lista os módulos depois de seus filhos; a indentação indica a profundidade
+    for linha in processo.stderr.splitlines():
+        encontrada = _LINHA_IMPORTTIME.match(linha)
+        if not encontrada:
+            continue
+        cumulativo = int(encontrada.group(2)) / 1e6
+        profundidade = (len(encontrada.group(3)) - 1) // 2
+        nome = encontrada.group(4)
+        if profundidade == 0 and nome == modulo:
+            total = cumulativo
+        elif profundidade == 1:
+            filhos[nome] = filhos.get(nome, 0) + cumulativo
+    if total is None:
+        # Já importado pelo interpretador na inicialização
+        total = 0.0
+    carregados = json.loads(processo.stdout.strip().splitlines()[-1])
+    return total, filhos, carregados
+
+
+def executar(repeticoes=3):
+    """
+    Mede o OS700 e cada módulo de MODULOS 'repeticoes' vezes (mediana).
+    """
+    tempos_os700, filhos_os700, carregados = [], {}, []
+    for _ in range(repeticoes):
+        total, filhos, carregados = _importar("OS700")
+        tempos_os700.append(total)
+        for nome, tempo in filhos.items():
+            filhos_os700.setdefault(nome, []).append(tempo)
+
+    modulos = {}
+    for modulo in MODULOS:
+        tempos = [_importar(modulo)[0] for _ in range(repeticoes)]
+        modulos[modulo] = round(statistics.median(tempos), 4)
+        print(f"{modulo:<24} {modulos[modulo]:>8.3f} s", flush=True)
+
+    importacoes_os700 = sorted(
+        ((nome, round(statistics.median(tempos), 4)) for nome, tempos in filhos_os700.items()),
+        key=lambda item: item[1], reverse=True,
+    )
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "repeticoes": repeticoes,
+        "os700_login_s": round(statistics.median(tempos_os700), 4),
+        "pesados_no_login": carregados,
+        "importacoes_os700": dict(importacoes_os700[:20]),
+        "modulos": modulos,
+    }
+    print(f"\n{'OS700 (página de login)':<24} {relatorio['os700_login_s']:>8.3f} s")
+    print(f"Módulos pesados carregados no login: {', '.join(carregados) or 'nenhum'}")
+    return relatorio
+
+
+def comparar(atual, anterior):
+    print(f"\n{'módulo':<24} {'anterior':>10} {'atual':>10}")
+    print(f"{'OS700 (login)':<24} {anterior.get('os700_login_s', 0):>10.3f} {atual['os700_login_s']:>10.3f}")
+    for modulo, tempo in atual["modulos"].items():
+        antes = anterior.get("modulos", {}).get(modulo)
+        print(f"{modulo:<24} {antes if antes is not None else '-':>10} {tempo:>10.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Custo de inicialização do OS700 por módulo.")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--saida", help="arquivo JSON do relatório (padrão: benchmarks/resultados/)")
+    parser.add_argument("--comparar", help="relatório JSON anterior para comparação")
+    args = parser.parse_args(argv)
+
+    relatorio = executar(args.repeticoes)
+    saida = args.saida or os.path.join(
+        RAIZ, "benchmarks", "resultados", f"importacao-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    print(f"Relatório gravado em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            comparar(relatorio, json.load(arquivo))
+
+
+if __name__ == "__main__":
+    main()
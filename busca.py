@@ -0,0 +1,177 @@
+# busca.py
+import functools
+import re
+import threading
+import unicodedata
+
+_SEPARADORES = re.compile(r"[^0-9a-z]+")
+
+
+@functools.lru_cache(maxsize=65536)
+def _normalizar_texto(texto):
+    texto = texto.lower()
+    if not texto.isascii():
+        texto = unicodedata.normalize("NFKD", texto)
+        texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return _SEPARADORES.sub(" ", texto).strip()
+
+
+def normalizar(texto):
+    """
+    Texto em minúsculas, sem acentos e com qualquer sequência de pontuação ou
+    espaços trocada por um espaço ("Manutenção/Impressora" -> "manutencao impressora").
+    """
+    if texto is None:
+        return ""
+    # Marca, tipo, setor e UBS se repetem muito: o cache evita normalizar de novo
+    return _normalizar_texto(str(texto))
+
+
+def _trigramas(termo):
+    return {termo[i:i + 3] for i in range(len(termo) - 2)}
+
+
+class IndiceBusca:
+    """
+    Índice invertido em memória para busca por trechos de texto em registros
+    com 'id' (ex.: inventário):
+      - as palavras de cada registro vêm dos 'campos', normalizadas por normalizar();
+      - cada palavra aponta para os ids que a contêm, e cada trigrama para as
+        palavras do vocabulário que o contêm (o vocabulário é bem menor que os
+        registros, pois marca, tipo, setor e UBS se repetem);
+      - termos com 3+ caracteres são procurados dentro das palavras (pelos
+        trigramas, conferindo o trecho); termos menores, no início das palavras;
+      - todos os termos da busca precisam aparecer (E).
+    sincronizar() reindexa apenas os registros novos, alterados ou removidos.
+    Compartilhado pelas sessões do processo: as operações são protegidas por um lock.
+    """
+
+    def __init__(self, campos):
+        self.campos = tuple(campos)
+        self._lock = threading.Lock()
+        self._valores = {}     # id -> tupla com os valores dos campos
+        self._palavras_registro = {}  # id -> palavras normalizadas do registro
+        self._palavras = {}    # palavra -> ids
+        self._trigramas = {}   # trigrama -> palavras
+
+    def __len__(self):
+        return len(self._valores)
+
+    def _remover(self, id_registro):
+        self._valores.pop(id_registro, None)
+        for palavra in self._palavras_registro.pop(id_registro, ()):
+            ids = self._palavras[palavra]
+            ids.discard(id_registro)
+            if not ids:
+                del self._palavras[palavra]
+                for trigrama in _trigramas(palavra):
+                    palavras = self._trigramas[trigrama]
+                    palavras.discard(palavra)
+                    if not palavras:
+                        del self._trigramas[trigrama]
+
+    def _adicionar(self, id_registro, valores):
+        palavras = set(" ".join(normalizar(v) for v in valores if v not in (None, "")).split())
+        self._valores[id_registro] = valores
+        self._palavras_registro[id_registro] = palavras
+        for palavra in palavras:
+            ids = self._palavras.get(palavra)
+            if ids is None:
+                ids = self._palavras[palavra] = set()
+                for trigrama in _trigramas(palavra):
+                    self._trigramas.setdefault(trigrama, set()).add(palavra)
+            ids.add(id_registro)
+
+    def atualizar(self, registros):
+        """
+        Indexa (ou reindexa, se algum campo mudou) os registros informados.
+        Retorna a quantidade de registros reindexados.
+        """
+        with self._lock:
+            return self._atualizar(registros)
+
+    def _atualizar(self, registros):
+        alterados = 0
+        for registro in registros:
+            id_registro = registro["id"]
+            valores = tuple(registro.get(campo) for campo in self.campos)
+            if self._valores.get(id_registro) == valores:
+                continue
+            self._remover(id_registro)
+            self._adicionar(id_registro, valores)
+            alterados += 1
+        return alterados
+
+    def remover(self, *ids):
+        with self._lock:
+            for id_registro in ids:
+                self._remover(id_registro)
+
+    def sincronizar(self, registros):
+        """
+        Deixa o índice igual à lista completa 'registros': indexa os novos e
+        alterados e remove os que não estão mais na lista.
+        Retorna a quantidade de registros reindexados ou removidos.
+        """
+        presentes = {registro["id"] for registro in registros}
+        with self._lock:
+            removidos = [id_registro for id_registro in self._valores if id_registro not in presentes]
+            for id_registro in removidos:
+                self._remover(id_registro)
+            return self._atualizar(registros) + len(removidos)
+
+    def _palavras_com(self, termo):
+        if len(termo) < 3:
+            return [palavra for palavra in self._palavras if palavra.startswith(termo)]
+        candidatas = None
+        # Trigramas mais raros primeiro: a interseção diminui mais rápido
+        for trigrama in sorted(_trigramas(termo), key=lambda t: len(self._trigramas.get(t, ()))):
+            palavras = self._trigramas.get(trigrama)
+            if not palavras:
+                return []
+            candidatas = set(palavras) if candidatas is None else candidatas & palavras
+            if not candidatas:
+                return []
+        return [palavra for palavra in candidatas if termo in palavra]
+
+    def buscar(self, consulta):
+        """
+        Retorna o conjunto de ids dos registros que contêm todos os termos de
+        'consulta' (sem diferenciar maiúsculas nem acentos). Consulta vazia
+        retorna todos os ids.
+        """
+        termos = set(normalizar(consulta).split())
+        with self._lock:
+            if not termos:
+                return set(self._valores)
+            resultado = None
+            for termo in sorted(termos, key=len, reverse=True):
+                encontrados = set()
+                for palavra in self._palavras_com(termo):
+                    encontrados |= self._palavras[palavra]
+                resultado = encontrados if resultado is None else resultado & encontrados
+                if not resultado:
+                    return set()
+            return resultado
+
+    def pontuar(self, ids, consulta, pesos):
+        """
+        Relevância de cada id para 'consulta': para cada termo, soma o peso de
+        cada campo (pesos: campo -> peso) em que o termo aparece.
+        Retorna um dicionário id -> pontuação.
+        """
+        termos = set(normalizar(consulta).split())
+        posicoes = [(self.campos.index(campo), peso) for campo, peso in pesos.items() if campo in self.campos]
+        pontuacoes = {}
+        with self._lock:
+            for id_registro in ids:
+                valores = self._valores.get(id_registro)
+                if valores is None:
+                    continue
+                pontuacoes[id_registro] = sum(
+                    peso
+                    for posicao, peso in posicoes
+                    for termo in termos
+                    if termo in normalizar(valores[posicao])
+                )
+        return pontuacoes
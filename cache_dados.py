@@ -0,0 +1,88 @@
+# cache_dados.py
+import copy
+import os
+import threading
+import time
+
+# Tempo de vida padrão (segundos) das tabelas de referência em cache
+TTL_PADRAO = float(os.getenv("CACHE_TTL_SEGUNDOS", "300"))
+
+
+class CacheReferencia:
+    """
+    Cache compartilhado pelo processo (todas as sessões do Streamlit) para
+    tabelas pequenas e pouco alteradas, como UBSs, setores e estoque.
+      - Cada chave expira após 'ttl' segundos.
+      - As funções que alteram a tabela chamam invalidar() logo após a escrita.
+      - Os valores são copiados na leitura, pois as páginas alteram as listas recebidas.
+    Mantém contadores de acertos/falhas e uma estimativa do tempo de consulta economizado.
+    """
+
+    def __init__(self, ttl=TTL_PADRAO):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas = {}   # chave -> (expira_em, valor, duracao_carga)
+        self._geracoes = {}   # chave -> contador incrementado a cada invalidação
+        self._geracao_global = 0  # incrementado por invalidar() sem chaves
+        self.acertos = 0
+        self.falhas = 0
+        self.segundos_economizados = 0.0
+
+    def obter(self, chave, carregar):
+        """
+        Retorna o valor em cache para 'chave' ou, se ausente/expirado, chama
+        carregar() e guarda o resultado. Exceções de carregar() não são
+        guardadas e são repassadas a quem chamou.
+        """
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada[0] > agora:
+                self.acertos += 1
+                self.segundos_economizados += entrada[2]
+                return copy.deepcopy(entrada[1])
+            self.falhas += 1
+            geracao = (self._geracao_global, self._geracoes.get(chave, 0))
+
+        inicio = time.perf_counter()
+        valor = carregar()
+        duracao = time.perf_counter() - inicio
+
+        with self._lock:
+            # Se houve invalidação durante a carga, o valor pode estar velho: não guarda
+            if (self._geracao_global, self._geracoes.get(chave, 0)) == geracao:
+                self._entradas[chave] = (time.monotonic() + self.ttl, valor, duracao)
+        return copy.deepcopy(valor)
+
+    def invalidar(self, *chaves):
+        """
+        Remove as chaves informadas do cache (ou todas, se nenhuma for informada,
+        incluindo as que estão sendo carregadas e ainda não foram guardadas).
+        """
+        with self._lock:
+            if not chaves:
+                self._entradas.clear()
+                self._geracao_global += 1
+                return
+            for chave in chaves:
+                self._entradas.pop(chave, None)
+                self._geracoes[chave] = self._geracoes.get(chave, 0) + 1
+
+    def estatisticas(self):
+        """
+        Retorna um dicionário com acertos, falhas, taxa de acerto, tempo de
+        consulta economizado (estimado pela duração da última carga) e chaves em cache.
+        """
+        with self._lock:
+            total = self.acertos + self.falhas
+            return {
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": (self.acertos / total) if total else 0.0,
+                "segundos_economizados": round(self.segundos_economizados, 3),
+                "chaves": sorted(self._entradas),
+            }
+
+
+# Instância única usada pelos módulos ubs, setores e estoque
+CACHE_REFERENCIA = CacheReferencia()
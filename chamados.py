@@ -1,17 +1,26 @@
+import logging
 import os
 import streamlit as st
 from supabase_client import supabase
 from datetime import datetime, timedelta
 import pytz
-from twilio.rest import Client
+from expediente import CALENDARIO_PADRAO
+import espelho
+import notificacoes
+from cache_dados import CACHE_REFERENCIA
+from busca import IndiceBusca
+
+logger = logging.getLogger(__name__)
 
 # Define o fuso de Fortaleza
 FORTALEZA_TZ = pytz.timezone("America/Fortaleza")
 
 def send_whatsapp_message(message_body):
     """
-    Envia a mensagem de WhatsApp para cada técnico listado na variável de ambiente
+    Enfileira a mensagem de WhatsApp para cada técnico listado na variável de ambiente
     TECHNICIAN_WHATSAPP_NUMBER (números separados por vírgula).
+    O envio é feito em segundo plano pelo worker de notificacoes.py, com retentativas,
+    então quem abriu o chamado não espera pelo Twilio.
     """
     account_sid = os.getenv("TWILIO_ACCOUNT_SID")
     auth_token = os.getenv("TWILIO_AUTH_TOKEN")
@@ -22,31 +31,34 @@ def send_whatsapp_message(message_body):
         st.error("Variáveis de ambiente do Twilio não configuradas corretamente.")
         return
     
-    # Separa os números (supondo que estejam separados por vírgula)
-    numbers_list = [num.strip() for num in technician_numbers.split(",") if num.strip()]
-    
-    for number in numbers_list:
-        # Garante que o número esteja no formato "whatsapp:+..."
-        to_whatsapp_number = number if number.startswith("whatsapp:") else f"whatsapp:{number}"
-        try:
-            client = Client(account_sid, auth_token)
-            client.messages.create(
-                body=message_body,
-                from_=from_whatsapp_number,
-                to=to_whatsapp_number
-            )
-        except Exception as e:
-            st.error(f"Erro ao enviar mensagem para {to_whatsapp_number}: {e}")
+    try:
+        notificacoes.enfileirar_whatsapp_tecnicos(message_body)
+    except Exception as e:
+        st.error(f"Erro ao enfileirar mensagem de WhatsApp: {e}")
 
-def gerar_protocolo_sequencial():
+def reservar_protocolos(quantidade=1):
+    """
+    Reserva 'quantidade' protocolos consecutivos em uma única chamada ao banco,
+    usando a função reservar_protocolos (ver sql/001_protocolo_contador.sql).
+    O contador é atualizado atomicamente, então aberturas simultâneas nunca
+    recebem o mesmo número. Útil também para importações em lote.
+    Retorna um range com os protocolos reservados ou None em caso de erro.
+    Levanta ValueError se 'quantidade' for menor que 1 (nada é reservado).
+    """
+    if quantidade < 1:
+        raise ValueError(f"Quantidade de protocolos inválida: {quantidade}")
     try:
-        resp = supabase.table("chamados").select("protocolo", count="exact").execute()
-        protocolos = [item["protocolo"] for item in resp.data if item.get("protocolo") is not None]
-        return max(protocolos, default=0) + 1
+        resp = supabase.rpc("reservar_protocolos", {"quantidade": quantidade}).execute()
+        primeiro = int(resp.data)
+        return range(primeiro, primeiro + quantidade)
     except Exception as e:
         st.error(f"Erro ao gerar protocolo: {e}")
         return None
 
+def gerar_protocolo_sequencial():
+    protocolos = reservar_protocolos(1)
+    return protocolos[0] if protocolos else None
+
 def get_chamado_by_protocolo(protocolo):
     try:
         resp = supabase.table("chamados").select("*").eq("protocolo", protocolo).execute()
@@ -84,7 +96,8 @@ def add_chamado(username, ubs, setor, tipo_defeito, problema, machine=None, patr
             return None
 
         # Gera horário local de Fortaleza
-        hora_local = datetime.now(FORTALEZA_TZ).strftime('%d/%m/%Y %H:%M:%S')
+        agora = datetime.now(FORTALEZA_TZ)
+        hora_local = agora.strftime('%d/%m/%Y %H:%M:%S')
 
         data = {
             "username": username,
@@ -93,11 +106,13 @@ def add_chamado(username, ubs, setor, tipo_defeito, problema, machine=None, patr
             "tipo_defeito": tipo_defeito,
             "problema": problema,
             "hora_abertura": hora_local,
+            "aberto_em": agora.replace(microsecond=0).isoformat(),
             "protocolo": protocolo,
             "machine": machine,
             "patrimonio": patrimonio
         }
         supabase.table("chamados").insert(data).execute()
+        espelho.sincronizar_apos_escrita("chamados")
         
         # Envio de mensagem via WhatsApp para os técnicos
         message_body = f"Novo chamado aberto: Protocolo {protocolo}. UBS: {ubs}. Problema: {tipo_defeito}"
@@ -109,63 +124,200 @@ def add_chamado(username, ubs, setor, tipo_defeito, problema, machine=None, patr
         st.error(f"Erro ao adicionar chamado: {e}")
         return None
 
+def _finalizar_chamado_em_lote(id_chamado, solucao, pecas_usadas, hora_fechamento_local, pecas_ids=None):
+    """
+    Caminho alternativo quando a função finalizar_chamado não existe no banco:
+    uma requisição por tabela (o UPDATE já devolve o patrimônio do chamado).
+    """
+    pecas_ids = pecas_ids or [None] * len(pecas_usadas)
+    resp = supabase.table("chamados").update({
+        "solucao": solucao,
+        "hora_fechamento": hora_fechamento_local
+    }).eq("id", id_chamado).execute()
+    patrimonio = resp.data[0].get("patrimonio") if resp.data else None
+
+    if pecas_usadas:
+        supabase.table("pecas_usadas").insert([
+            {"chamado_id": id_chamado, "peca_nome": peca, "data_uso": hora_fechamento_local}
+            for peca in pecas_usadas
+        ]).execute()
+        # Peças sem id: uma única consulta pelos nomes (a de menor id, como em sql/005)
+        sem_id = sorted({peca for peca, peca_id in zip(pecas_usadas, pecas_ids) if peca_id is None})
+        ids_por_nome = {}
+        if sem_id:
+            resp = supabase.table("estoque").select("id,nome").in_("nome", sem_id).order("id").execute()
+            for linha in resp.data or []:
+                ids_por_nome.setdefault(linha["nome"], linha["id"])
+        # Uma saída por peça usada, todas em uma única inserção
+        saidas, nao_encontradas = [], []
+        for peca, peca_id in zip(pecas_usadas, pecas_ids):
+            peca_id = peca_id if peca_id is not None else ids_por_nome.get(peca)
+            if peca_id is None:
+                nao_encontradas.append(peca)
+                continue
+            saidas.append({"peca_id": peca_id, "tipo": "saida", "quantidade": -1, "chamado_id": id_chamado})
+        if saidas:
+            supabase.table("estoque_movimentos").insert(saidas).execute()
+        mensagem = f"Baixa efetuada no estoque: {len(saidas)} peça(s)."
+        if nao_encontradas:
+            st.warning(f"{mensagem} Não encontradas no estoque: {', '.join(sorted(set(nao_encontradas)))}.")
+        else:
+            st.success(mensagem)
+
+    if patrimonio:
+        descricao = f"Manutenção: {solucao}. Peças utilizadas: {', '.join(pecas_usadas) if pecas_usadas else 'Nenhuma'}."
+        supabase.table("historico_manutencao").insert({
+            "numero_patrimonio": patrimonio,
+            "descricao": descricao,
+            "data_manutencao": hora_fechamento_local
+        }).execute()
+
 def finalizar_chamado(id_chamado, solucao, pecas_usadas=None):
     """
     Finaliza um chamado, definindo a hora de fechamento com o fuso horário de Fortaleza (UTC−3).
-    Também insere as peças usadas e registra histórico de manutenção.
+    Também insere as peças usadas, dá baixa no estoque e registra histórico de manutenção,
+    tudo em uma única transação pela função finalizar_chamado (ver sql/004_finalizar_chamado.sql
+    e sql/005_estoque_movimentos.sql).
+    'pecas_usadas' aceita nomes ou ids de peças do estoque; com ids a baixa vai
+    direto para a peça escolhida, mesmo que haja peças com o mesmo nome.
     """
     try:
         hora_fechamento_local = datetime.now(FORTALEZA_TZ).strftime('%d/%m/%Y %H:%M:%S')
 
-        supabase.table("chamados").update({
-            "solucao": solucao,
-            "hora_fechamento": hora_fechamento_local
-        }).eq("id", id_chamado).execute()
-        
         # Se nenhuma entrada de peças for fornecida, pergunta ao usuário
         if pecas_usadas is None:
             pecas_input = st.text_area("Informe as peças utilizadas (separadas por vírgula)")
             pecas_usadas = [p.strip() for p in pecas_input.split(",") if p.strip()] if pecas_input else []
-        
-        # Se houver peças usadas, insere na tabela pecas_usadas e dá baixa no estoque
-        if pecas_usadas:
-            for peca in pecas_usadas:
-                supabase.table("pecas_usadas").insert({
-                    "chamado_id": id_chamado,
-                    "peca_nome": peca,
-                    "data_uso": hora_fechamento_local
-                }).execute()
-                from estoque import dar_baixa_estoque
-                dar_baixa_estoque(peca, quantidade_usada=1)
-        
-        resp = supabase.table("chamados").select("patrimonio").eq("id", id_chamado).execute()
-        if resp.data and len(resp.data) > 0:
-            patrimonio = resp.data[0].get("patrimonio")
-        else:
-            patrimonio = None
-
-        if patrimonio:
-            descricao = f"Manutenção: {solucao}. Peças utilizadas: {', '.join(pecas_usadas) if pecas_usadas else 'Nenhuma'}."
-            supabase.table("historico_manutencao").insert({
-                "numero_patrimonio": patrimonio,
-                "descricao": descricao,
-                "data_manutencao": hora_fechamento_local
+        pecas_ids = [None] * len(pecas_usadas)
+        if any(isinstance(p, int) for p in pecas_usadas):
+            from estoque import get_estoque
+            nomes = {item["id"]: item["nome"] for item in get_estoque()}
+            pecas_ids = [p if isinstance(p, int) else None for p in pecas_usadas]
+            pecas_usadas = [nomes.get(p, str(p)) if isinstance(p, int) else p for p in pecas_usadas]
+        pecas_usadas = list(pecas_usadas)
+
+        try:
+            supabase.rpc("finalizar_chamado", {
+                "p_chamado_id": id_chamado,
+                "p_solucao": solucao,
+                "p_pecas": pecas_usadas,
+                "p_hora_fechamento": hora_fechamento_local,
+                "p_pecas_ids": pecas_ids
             }).execute()
-        
+        except Exception as e:
+            # PGRST202: função ainda não criada no banco
+            if getattr(e, "code", None) != "PGRST202":
+                raise
+            _finalizar_chamado_em_lote(id_chamado, solucao, pecas_usadas, hora_fechamento_local, pecas_ids)
+
+        CACHE_REFERENCIA.invalidar("estoque")
+        espelho.sincronizar_apos_escrita("chamados", "pecas_usadas", "historico_manutencao")
         st.success(f"Chamado {id_chamado} finalizado.")
     except Exception as e:
         st.error(f"Erro ao finalizar chamado: {e}")
 
-def list_chamados():
+# Colunas únicas e crescentes que podem servir de cursor na paginação
+COLUNAS_CURSOR = ("id", "protocolo")
+
+# Limite padrão de linhas por requisição do PostgREST no Supabase
+TAMANHO_PAGINA_PADRAO = 1000
+
+def aplicar_filtros(query, filtros):
     """
-    Retorna todos os chamados da tabela 'chamados'.
+    Aplica filtros no servidor a uma query do Supabase.
+    'filtros' é uma lista de tuplas (coluna, operador, valor), com operador em
+    eq, neq, gt, gte, lt, lte, like, ilike, in ou is. O prefixo "not." nega o
+    filtro, ex.: ("hora_fechamento", "not.is", None).
+    """
+    for coluna, operador, valor in filtros or []:
+        if operador.startswith("not."):
+            query = query.not_
+            operador = operador[len("not."):]
+        if operador == "in":
+            query = query.in_(coluna, list(valor))
+        elif operador == "is":
+            query = query.is_(coluna, valor)
+        else:
+            query = getattr(query, operador)(coluna, valor)
+    return query
+
+def list_chamados_paginado(colunas="*", filtros=None, ordem="id", desc=False,
+                           limite=100, cursor=None):
+    """
+    Retorna uma página de chamados usando paginação por cursor (keyset).
+      - colunas: colunas a buscar, como string ("id,ubs") ou lista; padrão "*"
+      - filtros: lista de tuplas (coluna, operador, valor), ver aplicar_filtros
+      - ordem: coluna do cursor, "id" ou "protocolo"
+      - desc: se True, do mais recente para o mais antigo
+      - limite: quantidade máxima de registros na página
+      - cursor: valor de 'ordem' do último registro da página anterior
+    Retorna (registros, proximo_cursor); proximo_cursor é None na última página.
     """
+    if ordem not in COLUNAS_CURSOR:
+        raise ValueError(f"Ordenação por cursor deve usar uma de {COLUNAS_CURSOR}.")
+    if not isinstance(colunas, str):
+        colunas = ",".join(colunas)
+    if colunas != "*" and ordem not in colunas.split(","):
+        colunas = f"{colunas},{ordem}"
     try:
-        resp = supabase.table("chamados").select("*").execute()
-        return resp.data
+        if espelho.disponivel("chamados"):
+            registros = espelho.consultar("chamados", colunas, filtros, ordem, desc, limite, cursor)
+            proximo_cursor = registros[-1][ordem] if len(registros) == limite else None
+            return registros, proximo_cursor
+        query = aplicar_filtros(supabase.table("chamados").select(colunas), filtros)
+        if cursor is not None:
+            query = query.lt(ordem, cursor) if desc else query.gt(ordem, cursor)
+        resp = query.order(ordem, desc=desc).limit(limite).execute()
+        registros = resp.data or []
+        proximo_cursor = registros[-1][ordem] if len(registros) == limite else None
+        return registros, proximo_cursor
     except Exception as e:
         st.error(f"Erro ao listar chamados: {e}")
-        return []
+        return [], None
+
+def iter_paginas_chamados(colunas="*", filtros=None, ordem="id", desc=False,
+                          tamanho_pagina=TAMANHO_PAGINA_PADRAO):
+    """
+    Percorre todas as páginas de chamados que atendem aos filtros,
+    gerando uma lista de registros por página.
+    """
+    cursor = None
+    while True:
+        registros, cursor = list_chamados_paginado(
+            colunas, filtros, ordem, desc, tamanho_pagina, cursor
+        )
+        if registros:
+            yield registros
+        if cursor is None:
+            break
+
+def filtros_periodo(data_inicio, data_fim, ubs=None):
+    """
+    Monta filtros de servidor para chamados abertos entre 'data_inicio' e
+    'data_fim' (datas inclusivas, horário de Fortaleza), usando a coluna
+    indexada aberto_em (ver sql/002_chamados_aberto_em.sql).
+    Se 'ubs' for uma lista não vazia, restringe também às UBSs informadas.
+    """
+    inicio = FORTALEZA_TZ.localize(datetime.combine(data_inicio, datetime.min.time()))
+    fim = FORTALEZA_TZ.localize(datetime.combine(data_fim, datetime.max.time()))
+    filtros = [
+        ("aberto_em", "gte", inicio.isoformat()),
+        ("aberto_em", "lte", fim.isoformat()),
+    ]
+    if ubs:
+        filtros.append(("ubs", "in", list(ubs)))
+    return filtros
+
+def list_chamados(colunas="*", filtros=None):
+    """
+    Retorna todos os chamados da tabela 'chamados'.
+    Busca página a página (o PostgREST limita cada resposta), trazendo apenas
+    as 'colunas' pedidas e aplicando os 'filtros' no servidor.
+    """
+    chamados = []
+    for pagina in iter_paginas_chamados(colunas, filtros):
+        chamados.extend(pagina)
+    return chamados
 
 def list_chamados_em_aberto():
     """
@@ -178,57 +330,142 @@ def list_chamados_em_aberto():
         st.error(f"Erro ao listar chamados abertos: {e}")
         return []
 
+def versao_chamados():
+    """
+    Sonda barata de alterações na tabela chamados: retorna (id, updated_at) do
+    chamado alterado por último (updated_at muda ao abrir, finalizar ou reabrir;
+    ver sql/003_espelho_delta.sql). Lê uma única linha pelo índice (updated_at, id).
+    Retorna None em caso de erro.
+    """
+    try:
+        resp = (
+            supabase.table("chamados").select("id, updated_at")
+            .order("updated_at", desc=True).order("id", desc=True).limit(1).execute()
+        )
+        return (resp.data[0]["id"], resp.data[0]["updated_at"]) if resp.data else (0, None)
+    except Exception as e:
+        logger.warning("Erro ao verificar alterações nos chamados: %s", e)
+        return None
+
+# Busca textual local, usada enquanto a função buscar_chamados não existir no
+# banco (sql/008_chamados_busca_texto.sql): índice compartilhado pelo processo,
+# sincronizado só quando versao_chamados() indica alteração. As colunas dos
+# filtros ficam junto, para filtrar sem novas consultas.
+CAMPOS_BUSCA_CHAMADOS = ("tipo_defeito", "patrimonio", "problema", "solucao")
+PESOS_BUSCA_CHAMADOS = {"tipo_defeito": 4, "patrimonio": 4, "problema": 2, "solucao": 1}
+INDICE_CHAMADOS = IndiceBusca(CAMPOS_BUSCA_CHAMADOS)
+_filtros_indice_chamados = {}  # id -> (ubs, fechado, aberto_em)
+_versao_indice_chamados = None
+
+def _sincronizar_indice_chamados():
+    global _filtros_indice_chamados, _versao_indice_chamados
+    versao = versao_chamados()
+    if versao is not None and versao == _versao_indice_chamados and len(INDICE_CHAMADOS):
+        return
+    registros = list_chamados("id,ubs,hora_fechamento,aberto_em," + ",".join(CAMPOS_BUSCA_CHAMADOS))
+    INDICE_CHAMADOS.sincronizar(registros)
+    _filtros_indice_chamados = {
+        r["id"]: (
+            r.get("ubs"),
+            r.get("hora_fechamento") is not None,
+            datetime.fromisoformat(r["aberto_em"]) if r.get("aberto_em") else None,
+        )
+        for r in registros
+    }
+    _versao_indice_chamados = versao
+
+def _buscar_chamados_local(consulta, ubs, situacao, periodo, limite, pagina):
+    _sincronizar_indice_chamados()
+    ids = INDICE_CHAMADOS.buscar(consulta)
+    inicio, fim = (datetime.fromisoformat(periodo[0][2]), datetime.fromisoformat(periodo[1][2])) if periodo else (None, None)
+    ubs = set(ubs or [])
+    selecionados = []
+    for id_chamado in ids:
+        ubs_chamado, fechado, aberto_em = _filtros_indice_chamados.get(id_chamado, (None, False, None))
+        if ubs and ubs_chamado not in ubs:
+            continue
+        if situacao and fechado != (situacao == "finalizados"):
+            continue
+        if inicio and (aberto_em is None or not inicio <= aberto_em <= fim):
+            continue
+        selecionados.append(id_chamado)
+
+    pontuacoes = INDICE_CHAMADOS.pontuar(selecionados, consulta, PESOS_BUSCA_CHAMADOS)
+    ordenados = sorted(selecionados, key=lambda i: (pontuacoes.get(i, 0), i), reverse=True)
+    ids_pagina = ordenados[pagina * limite:(pagina + 1) * limite]
+    if not ids_pagina:
+        return [], len(ordenados)
+    registros = {c["id"]: c for c in list_chamados("*", [("id", "in", ids_pagina)])}
+    resultado = []
+    for id_chamado in ids_pagina:
+        chamado = registros.get(id_chamado)
+        if chamado:
+            trecho = " ".join(filter(None, [chamado.get("problema"), chamado.get("solucao")]))
+            resultado.append({**chamado, "relevancia": pontuacoes.get(id_chamado, 0), "trecho": trecho[:200]})
+    return resultado, len(ordenados)
+
+def buscar_chamados_texto(consulta, ubs=None, situacao=None, data_inicio=None, data_fim=None,
+                          limite=20, pagina=0):
+    """
+    Busca textual com relevância em tipo_defeito, patrimonio, problema e solucao.
+      - consulta: termos da busca; no banco aceita "frase entre aspas" e -termo
+      - ubs: lista de UBSs (opcional)
+      - situacao: "abertos", "finalizados" ou None (todos)
+      - data_inicio/data_fim: período de abertura (datas, opcionais)
+      - limite/pagina: tamanho e número (a partir de 0) da página de resultados
+    Retorna (chamados, total). Cada chamado traz também 'relevancia' e 'trecho'.
+    Usa a função buscar_chamados do banco (índice GIN); sem ela, um índice local.
+    """
+    periodo = filtros_periodo(data_inicio, data_fim) if data_inicio and data_fim else []
+    try:
+        resp = supabase.rpc("buscar_chamados", {
+            "p_consulta": consulta,
+            "p_ubs": list(ubs) if ubs else None,
+            "p_situacao": situacao,
+            "p_inicio": periodo[0][2] if periodo else None,
+            "p_fim": periodo[1][2] if periodo else None,
+            "p_limite": limite,
+            "p_offset": pagina * limite
+        }).execute()
+        linhas = resp.data or []
+        chamados = [
+            {**linha["chamado"], "relevancia": linha["relevancia"], "trecho": linha["trecho"]}
+            for linha in linhas
+        ]
+        return chamados, (linhas[0]["total"] if linhas else 0)
+    except Exception as e:
+        # PGRST202: função ainda não criada no banco
+        if getattr(e, "code", None) != "PGRST202":
+            st.error(f"Erro na busca de chamados: {e}")
+            return [], 0
+        return _buscar_chamados_local(consulta, ubs, situacao, periodo, limite, pagina)
+
 def get_chamados_por_patrimonio(patrimonio):
     """
     Retorna todos os chamados vinculados a um patrimônio específico.
     """
     try:
+        if espelho.disponivel("chamados"):
+            return espelho.consultar("chamados", filtros=[("patrimonio", "eq", patrimonio)])
         resp = supabase.table("chamados").select("*").eq("patrimonio", patrimonio).execute()
         return resp.data if resp.data else []
     except Exception as e:
         st.error(f"Erro ao buscar chamados para o patrimônio {patrimonio}: {e}")
         return []
 
-def calculate_working_hours(start, end):
+def calculate_working_hours(start, end, calendario=None):
     """
     Calcula o tempo útil entre 'start' e 'end', considerando o expediente:
       - Manhã: 08:00 a 12:00
       - Tarde: 13:00 a 17:00
     Ignora sábados e domingos.
     Retorna um objeto timedelta com o tempo útil.
+    O cálculo usa a soma acumulada de um CalendarioExpediente (tempo constante);
+    passe 'calendario' para considerar feriados (ver expediente.calendario_itapipoca).
     """
-    if start >= end:
-        return timedelta(0)
-    
-    total_seconds = 0
-    current = start
-
-    while current < end:
-        # Se for sábado (5) ou domingo (6), pula para o próximo dia
-        if current.weekday() >= 5:
-            current = datetime.combine(current.date() + timedelta(days=1), datetime.min.time())
-            continue
-
-        morning_start = current.replace(hour=8, minute=0, second=0, microsecond=0)
-        morning_end = current.replace(hour=12, minute=0, second=0, microsecond=0)
-        afternoon_start = current.replace(hour=13, minute=0, second=0, microsecond=0)
-        afternoon_end = current.replace(hour=17, minute=0, second=0, microsecond=0)
-
-        if end > morning_start:
-            interval_start = max(current, morning_start)
-            interval_end = min(end, morning_end)
-            if interval_end > interval_start:
-                total_seconds += (interval_end - interval_start).total_seconds()
-        
-        if end > afternoon_start:
-            interval_start = max(current, afternoon_start)
-            interval_end = min(end, afternoon_end)
-            if interval_end > interval_start:
-                total_seconds += (interval_end - interval_start).total_seconds()
-        
-        current = datetime.combine(current.date() + timedelta(days=1), datetime.min.time())
-    
-    return timedelta(seconds=total_seconds)
+    if calendario is None:
+        calendario = CALENDARIO_PADRAO
+    return calendario.tempo_util(start, end)
 
 def reabrir_chamado(id_chamado, remover_historico=False):
     """
@@ -266,7 +503,36 @@ def reabrir_chamado(id_chamado, remover_historico=False):
                 .eq("data_manutencao", old_hora_fechamento) \
                 .execute()
 
+        espelho.sincronizar_apos_escrita("chamados", "historico_manutencao")
         st.success(f"Chamado {id_chamado} reaberto com sucesso!")
     except Exception as e:
         st.error(f"Erro ao reabrir chamado: {e}")
 
+# Colunas do relatório de chamados: (campo, rótulo, largura relativa)
+COLUNAS_RELATORIO_CHAMADOS = [
+    ("protocolo", "Protocolo", 1.4),
+    ("hora_abertura", "Abertura", 2.5),
+    ("hora_fechamento", "Fechamento", 2.5),
+    ("ubs", "UBS", 2.0),
+    ("setor", "Setor", 1.7),
+    ("tipo_defeito", "Tipo de Defeito", 2.0),
+    ("problema", "Problema", 3.0),
+    ("solucao", "Solução", 2.4),
+    ("patrimonio", "Patrimônio", 1.5),
+    ("username", "Usuário", 1.4),
+]
+
+def gerar_relatorio_chamados_pdf(chamados):
+    """
+    Gera o PDF do relatório completo de chamados (uma linha da tabela por chamado).
+    'chamados' pode ser um DataFrame ou qualquer iterável de dicionários
+    (ex.: um gerador sobre iter_paginas_chamados), lido uma linha por vez.
+    Retorna os bytes do PDF.
+    """
+    from relatorio_pdf import RelatorioPDF, linhas_dataframe
+
+    if hasattr(chamados, "itertuples"):
+        chamados = linhas_dataframe(chamados, [coluna[0] for coluna in COLUNAS_RELATORIO_CHAMADOS])
+    relatorio = RelatorioPDF("Relatório Completo de Chamados Técnicos")
+    relatorio.tabela(COLUNAS_RELATORIO_CHAMADOS, chamados)
+    return relatorio.saida()
@@ -1,14 +1,14 @@
 # chat.py
-from supabase import create_client, Client
+import logging
 import streamlit as st
 from datetime import datetime
 
-# Obtenha suas credenciais do Supabase a partir dos secrets do Streamlit
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
+# Cliente compartilhado (os secrets de nível raiz do Streamlit também ficam
+# disponíveis como variáveis de ambiente, lidas por supabase_client)
+from supabase_client import supabase
+from tempo_real import INTERVALO_CHAT, fragmento_periodico, houve_alteracao, recarregar_pagina
 
-# Cria o cliente do Supabase
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+logger = logging.getLogger(__name__)
 
 def create_chat_table():
     """
@@ -42,71 +42,241 @@ def salvar_mensagem(remetente, destinatario, mensagem):
         st.error(f"Erro ao salvar mensagem: {e}")
         return None
 
-def ler_mensagens(filtro_usuario=None):
+# Quantidade de mensagens carregadas ao abrir uma conversa e a cada "Mensagens anteriores"
+MENSAGENS_POR_PAGINA = 50
+
+def ler_mensagens(filtro_usuario=None, apos_id=None, antes_id=None, limite=None):
     """
-    Retorna o histórico de mensagens da tabela 'chat_messages'.
+    Retorna mensagens da tabela 'chat_messages', em ordem crescente de id.
     Se filtro_usuario for fornecido, retorna as mensagens onde o remetente ou destinatario
     é igual a esse usuário.
+    - apos_id: apenas as mensagens com id maior (novas desde a última leitura)
+    - antes_id: apenas as mensagens com id menor (histórico mais antigo)
+    - limite: quantidade máxima; sem apos_id, retorna as 'limite' mais recentes
     """
     try:
+        query = supabase.table("chat_messages").select("*")
         if filtro_usuario:
             # A função or_ permite filtrar mensagens em que o usuário é remetente ou destinatario.
             query_filter = f"remetente.eq.{filtro_usuario},destinatario.eq.{filtro_usuario}"
-            response = supabase.table("chat_messages").select("*").or_(query_filter).order("id", desc=False).execute()
-        else:
-            response = supabase.table("chat_messages").select("*").order("id", desc=False).execute()
-        return response.data
+            query = query.or_(query_filter)
+        if apos_id is not None:
+            query = query.gt("id", apos_id)
+        if antes_id is not None:
+            query = query.lt("id", antes_id)
+        # Com limite (e sem cursor de novas mensagens), busca do fim para o começo
+        mais_recentes = limite is not None and apos_id is None
+        query = query.order("id", desc=mais_recentes)
+        if limite is not None:
+            query = query.limit(limite)
+        response = query.execute()
+        return list(reversed(response.data)) if mais_recentes else response.data
     except Exception as e:
         st.error(f"Erro ao ler mensagens: {e}")
         return []
 
+def carregar_conversa(filtro_usuario=None):
+    """
+    Retorna o histórico da conversa guardado na sessão, buscando no banco apenas
+    as mensagens com id maior que a última já carregada. Na primeira chamada
+    carrega as MENSAGENS_POR_PAGINA mais recentes.
+    O estado fica em st.session_state["chat_conversas"][filtro_usuario]:
+      - mensagens: lista em ordem crescente de id
+      - tem_anteriores: se pode haver mensagens mais antigas no banco
+    """
+    conversas = st.session_state.setdefault("chat_conversas", {})
+    conversa = conversas.get(filtro_usuario)
+    if conversa is None or not conversa["mensagens"]:
+        mensagens = ler_mensagens(filtro_usuario, limite=MENSAGENS_POR_PAGINA)
+        conversa = {"mensagens": mensagens, "tem_anteriores": len(mensagens) == MENSAGENS_POR_PAGINA}
+        conversas[filtro_usuario] = conversa
+    else:
+        conversa["mensagens"].extend(
+            ler_mensagens(filtro_usuario, apos_id=conversa["mensagens"][-1]["id"])
+        )
+    return conversa
+
+def carregar_anteriores(filtro_usuario=None):
+    """
+    Acrescenta ao início da conversa da sessão as MENSAGENS_POR_PAGINA
+    mensagens anteriores à mais antiga já carregada.
+    """
+    conversa = st.session_state.get("chat_conversas", {}).get(filtro_usuario)
+    if conversa is None or not conversa["mensagens"]:
+        return
+    anteriores = ler_mensagens(
+        filtro_usuario, antes_id=conversa["mensagens"][0]["id"], limite=MENSAGENS_POR_PAGINA
+    )
+    conversa["mensagens"][:0] = anteriores
+    conversa["tem_anteriores"] = len(anteriores) == MENSAGENS_POR_PAGINA
+
+def exibir_mensagens(mensagens, rotulo):
+    """
+    Desenha as mensagens em um único bloco de markdown. 'rotulo(msg)'
+    retorna o nome exibido para o remetente.
+    """
+    st.markdown("  \n".join(
+        f"**{rotulo(msg)} ({msg['timestamp']}):** {msg['mensagem']}" for msg in mensagens
+    ))
+
+def ultimo_id_mensagens():
+    """
+    Sonda barata de novas mensagens: retorna o maior id de 'chat_messages'
+    (uma única linha, pela chave primária) ou None em caso de erro.
+    """
+    try:
+        resp = supabase.table("chat_messages").select("id").order("id", desc=True).limit(1).execute()
+        return resp.data[0]["id"] if resp.data else 0
+    except Exception as e:
+        logger.warning("Erro ao verificar novas mensagens: %s", e)
+        return None
+
+# Quantidade de mensagens recentes agrupadas quando a função caixa_entrada_chat
+# ainda não foi criada no banco (sql/007_chat_caixa_entrada.sql)
+MENSAGENS_CAIXA_SEM_RPC = 1000
+
+def _caixa_entrada_local(leitor, caixa):
+    """
+    Monta a caixa de entrada a partir das mensagens mais recentes, com os
+    cursores de leitura guardados na sessão. Usada só enquanto a função
+    caixa_entrada_chat não existir no banco.
+    """
+    leituras = st.session_state.setdefault("chat_leituras", {})
+    conversas = {}
+    for msg in ler_mensagens(caixa, limite=MENSAGENS_CAIXA_SEM_RPC):
+        usuario = msg["destinatario"] if msg["remetente"] == caixa else msg["remetente"]
+        conversa = conversas.setdefault(usuario, {"usuario": usuario, "nao_lidas": 0})
+        conversa.update({
+            "ultimo_id": msg["id"],
+            "ultimo_remetente": msg["remetente"],
+            "ultima_mensagem": msg["mensagem"],
+            "ultimo_timestamp": msg["timestamp"],
+        })
+        if msg["remetente"] != caixa and msg["id"] > leituras.get((leitor, usuario), 0):
+            conversa["nao_lidas"] += 1
+    return sorted(conversas.values(), key=lambda c: (c["nao_lidas"] > 0, c["ultimo_id"]), reverse=True)
+
+def caixa_entrada(leitor, caixa="admin"):
+    """
+    Retorna as conversas da caixa 'caixa' (uma por usuário), com a última
+    mensagem e a quantidade de mensagens não lidas por 'leitor'. As conversas
+    com mensagens não lidas vêm primeiro, depois as mais recentes.
+    A agregação é feita no banco (função caixa_entrada_chat), sem baixar as mensagens.
+    """
+    try:
+        resp = supabase.rpc("caixa_entrada_chat", {"p_leitor": leitor, "p_caixa": caixa}).execute()
+        return resp.data or []
+    except Exception as e:
+        # PGRST202: função ainda não criada no banco
+        if getattr(e, "code", None) != "PGRST202":
+            st.error(f"Erro ao carregar a caixa de entrada: {e}")
+            return []
+        return _caixa_entrada_local(leitor, caixa)
+
+def marcar_lido(leitor, usuario, ultimo_id):
+    """
+    Avança o cursor de leitura de 'leitor' na conversa com 'usuario' até 'ultimo_id'.
+    """
+    try:
+        supabase.rpc("marcar_chat_lido", {
+            "p_leitor": leitor, "p_usuario": usuario, "p_ultimo_id": ultimo_id
+        }).execute()
+    except Exception as e:
+        if getattr(e, "code", None) != "PGRST202":
+            st.error(f"Erro ao marcar conversa como lida: {e}")
+            return
+        leituras = st.session_state.setdefault("chat_leituras", {})
+        leituras[(leitor, usuario)] = max(leituras.get((leitor, usuario), 0), ultimo_id)
+
+@fragmento_periodico(INTERVALO_CHAT)
+def _conversa_usuario(username):
+    # Atualizada sozinha a cada INTERVALO_CHAT segundos: busca só as mensagens novas
+    conversa = carregar_conversa(username)
+    if conversa["tem_anteriores"] and st.button("Mensagens anteriores", key="anteriores_usuario"):
+        carregar_anteriores(username)
+    if conversa["mensagens"]:
+        exibir_mensagens(
+            conversa["mensagens"],
+            lambda msg: "Você" if msg["remetente"] == username else "Suporte",
+        )
+    else:
+        st.write("Nenhuma mensagem encontrada.")
+
 def chat_usuario_page(username):
     """
     Página de chat para o usuário.
-    Exibe a conversa (mensagens enviadas e recebidas) e permite enviar novas mensagens.
+    Exibe a conversa (mensagens enviadas e recebidas), atualizada automaticamente,
+    e permite enviar novas mensagens.
     """
     st.subheader("Chat com Suporte")
-    historico = ler_mensagens(filtro_usuario=username)
-    if historico:
-        for msg in historico:
-            if msg["remetente"] == username:
-                st.markdown(f"**Você ({msg['timestamp']}):** {msg['mensagem']}")
-            else:
-                st.markdown(f"**Suporte ({msg['timestamp']}):** {msg['mensagem']}")
-    else:
-        st.write("Nenhuma mensagem encontrada.")
+    _conversa_usuario(username)
     
     user_input = st.text_input("Digite sua mensagem:", key="chat_input_usuario")
     if st.button("Enviar", key="enviar_usuario"):
         if user_input:
             salvar_mensagem(remetente=username, destinatario="admin", mensagem=user_input)
             st.success("Mensagem enviada!")
-            # Em vez de forçar rerun, oferecemos um botão de atualizar
-    if st.button("Atualizar Conversa", key="atualizar_usuario"):
-        st.experimental_rerun()  # Caso seu ambiente permita, isso atualiza a página
+
+@fragmento_periodico(INTERVALO_CHAT)
+def _caixa_e_conversa_admin(leitor):
+    # Atualizados sozinhos a cada INTERVALO_CHAT segundos. A caixa de entrada
+    # (consulta agregada) só é recalculada quando a sonda indica mensagem nova.
+    ultimo_id = ultimo_id_mensagens()
+    if houve_alteracao("chat_admin", ultimo_id) or "chat_caixa" not in st.session_state:
+        st.session_state["chat_caixa"] = caixa_entrada(leitor)
+    conversas = st.session_state["chat_caixa"]
+    resumo = {c["usuario"]: c for c in conversas}
+    nao_lidas = sum(c["nao_lidas"] for c in conversas)
+    st.markdown(f"**Conversas:** {len(conversas)} | **Não lidas:** {nao_lidas}")
+
+    def descrever(usuario):
+        conversa = resumo[usuario]
+        pendentes = f" ({conversa['nao_lidas']} não lidas)" if conversa["nao_lidas"] else ""
+        return f"{usuario}{pendentes} - {conversa['ultimo_timestamp']}: {conversa['ultima_mensagem'][:60]}"
+
+    selecionado = st.selectbox(
+        "Conversa", [None] + list(resumo),
+        format_func=lambda usuario: "Escolha uma conversa" if usuario is None else descrever(usuario),
+        key="chat_conversa_admin"
+    )
+    outro = st.text_input("Ou abra a conversa com outro usuário:", key="chat_filtro")
+    usuario = outro.strip() or selecionado
+    if st.session_state.get("chat_usuario_aberto") != usuario:
+        # A caixa "Responder" fica fora do fragmento: redesenha a página
+        # para ela passar a responder à conversa escolhida
+        st.session_state["chat_usuario_aberto"] = usuario
+        recarregar_pagina()
+    if not usuario:
+        return
+
+    conversa = carregar_conversa(usuario)
+    if conversa["tem_anteriores"] and st.button("Mensagens anteriores", key="anteriores_admin"):
+        carregar_anteriores(usuario)
+    if conversa["mensagens"]:
+        exibir_mensagens(conversa["mensagens"], lambda msg: msg["remetente"])
+        if usuario in resumo and resumo[usuario]["nao_lidas"]:
+            marcar_lido(leitor, usuario, conversa["mensagens"][-1]["id"])
+            # Recalcula os contadores na próxima atualização
+            st.session_state.pop("chat_caixa", None)
+    else:
+        st.write("Nenhuma mensagem encontrada.")
 
 def chat_admin_page():
     """
     Página de chat para o administrador.
-    Permite filtrar por usuário e enviar respostas.
+    Mostra a caixa de entrada (uma linha por conversa, com as não lidas) e a
+    conversa escolhida, carregando apenas as mensagens dela, ambas atualizadas
+    automaticamente, e permite responder.
     """
     st.subheader("Chat - Administrador")
-    filtro = st.text_input("Filtrar por usuário (deixe vazio para todas):", key="chat_filtro")
-    if filtro:
-        historico = ler_mensagens(filtro_usuario=filtro)
-    else:
-        historico = ler_mensagens()
-    
-    if historico:
-        for msg in historico:
-            st.markdown(f"**{msg['remetente']} ({msg['timestamp']}):** {msg['mensagem']}")
-    else:
-        st.write("Nenhuma mensagem encontrada.")
+    leitor = st.session_state.get("username") or "admin"
+    _caixa_e_conversa_admin(leitor)
+    usuario = st.session_state.get("chat_usuario_aberto")
+    if not usuario:
+        return
     
     resposta = st.text_input("Responder:", key="chat_input_admin")
     if st.button("Enviar Resposta", key="enviar_admin"):
-        if resposta and filtro:
-            salvar_mensagem(remetente="admin", destinatario=filtro, mensagem=resposta)
+        if resposta:
+            salvar_mensagem(remetente="admin", destinatario=usuario, mensagem=resposta)
             st.success("Resposta enviada!")
-    if st.button("Atualizar Conversa", key="atualizar_admin"):
-        st.experimental_rerun()
\ No newline at end of file
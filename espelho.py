@@ -0,0 +1,335 @@
+# espelho.py
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from supabase_client import supabase
+
+logger = logging.getLogger(__name__)
+
+# Espelho local (SQLite) das tabelas usadas pelas páginas de análise.
+# Desative com ESPELHO_LOCAL=0 para consultar sempre o Supabase.
+ESPELHO_ATIVO = os.getenv("ESPELHO_LOCAL", "1") != "0"
+CAMINHO_ESPELHO = os.getenv("ESPELHO_PATH", "espelho_local.db")
+INTERVALO_SINCRONIZACAO = float(os.getenv("ESPELHO_INTERVALO_SEGUNDOS", "30"))
+
+# Janela de sobreposição que cobre transações confirmadas fora de ordem
+# (reaplicar uma linha é inofensivo, perder uma não)
+SOBREPOSICAO = timedelta(seconds=60)
+TAMANHO_PAGINA = 1000
+
+# Tabelas espelhadas e as colunas trazidas de cada uma (imagens ficam de fora)
+TABELAS = {
+    "chamados": "*",
+    "inventario": (
+        "id,numero_patrimonio,tipo,marca,modelo,numero_serie,status,localizacao,"
+        "propria_locada,setor,data_aquisicao,data_garantia_fim,imagem_hash,updated_at"
+    ),
+    "pecas_usadas": "*",
+    "historico_manutencao": "*",
+}
+
+# Colunas timestamptz: guardadas e comparadas como texto ISO em UTC
+COLUNAS_DATA = ("aberto_em", "updated_at")
+
+# Índices de expressão criados no SQLite para os filtros mais usados
+COLUNAS_INDEXADAS = {
+    "chamados": ("protocolo", "ubs", "aberto_em", "patrimonio", "hora_fechamento"),
+    "inventario": ("numero_patrimonio", "localizacao"),
+    "pecas_usadas": ("chamado_id",),
+    "historico_manutencao": ("numero_patrimonio",),
+}
+
+OPERADORES = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+_local = threading.local()
+_locks = {tabela: threading.Lock() for tabela in TABELAS}
+_sincronizadas = set()
+_lock_thread = threading.Lock()
+_thread = None
+
+
+###########################
+# Armazenamento local
+###########################
+
+def _conexao():
+    """
+    Uma conexão SQLite por thread (o Streamlit atende cada sessão em sua thread).
+    """
+    con = getattr(_local, "con", None)
+    if con is None:
+        con = sqlite3.connect(CAMINHO_ESPELHO, timeout=30)
+        con.execute("pragma journal_mode=wal")
+        con.execute("pragma synchronous=normal")
+        _criar_esquema(con)
+        _local.con = con
+    return con
+
+
+def _criar_esquema(con):
+    with con:
+        con.execute(
+            "create table if not exists registros ("
+            " tabela text not null, id integer not null, dados text not null,"
+            " primary key (tabela, id))"
+        )
+        con.execute(
+            "create table if not exists marcas ("
+            " tabela text primary key, atualizado_ate text, excluido_ate text,"
+            " sincronizado_em real)"
+        )
+        for tabela, colunas in COLUNAS_INDEXADAS.items():
+            for coluna in colunas:
+                con.execute(
+                    f"create index if not exists idx_{tabela}_{coluna} "
+                    f"on registros (tabela, {_expressao(coluna)})"
+                )
+
+
+def _expressao(coluna):
+    if not re.fullmatch(r"\w+", coluna):
+        raise ValueError(f"Nome de coluna inválido: {coluna!r}")
+    if coluna == "id":
+        return "id"
+    return f"json_extract(dados, '$.{coluna}')"
+
+
+def _para_utc(valor):
+    """
+    Normaliza um timestamp ISO (com fuso) para texto ISO em UTC, que ordena
+    corretamente como string.
+    """
+    if isinstance(valor, str):
+        valor = datetime.fromisoformat(valor.replace("Z", "+00:00"))
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=timezone.utc)
+    return valor.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _normalizar(registro):
+    for coluna in COLUNAS_DATA:
+        if registro.get(coluna):
+            registro[coluna] = _para_utc(registro[coluna])
+    return registro
+
+
+###########################
+# Sincronização incremental
+###########################
+
+def _buscar_paginado(montar_query):
+    """
+    Percorre uma consulta ordenada em páginas de TAMANHO_PAGINA linhas.
+    """
+    inicio = 0
+    while True:
+        resp = montar_query().range(inicio, inicio + TAMANHO_PAGINA - 1).execute()
+        linhas = resp.data or []
+        yield linhas
+        if len(linhas) < TAMANHO_PAGINA:
+            break
+        inicio += TAMANHO_PAGINA
+
+
+def sincronizar(tabela):
+    """
+    Traz do Supabase as linhas de 'tabela' criadas ou alteradas desde a última
+    marca d'água (coluna updated_at) e aplica as exclusões registradas em
+    registros_excluidos (ver sql/003_espelho_delta.sql).
+    Retorna a quantidade de linhas gravadas e removidas.
+    """
+    with _locks[tabela]:
+        con = _conexao()
+        marca = con.execute(
+            "select atualizado_ate, excluido_ate from marcas where tabela = ?", (tabela,)
+        ).fetchone()
+        atualizado_ate, excluido_ate = marca if marca else (None, None)
+
+        def query_alteracoes():
+            query = supabase.table(tabela).select(TABELAS[tabela])
+            if atualizado_ate:
+                limite = datetime.fromisoformat(atualizado_ate) - SOBREPOSICAO
+                query = query.gt("updated_at", limite.isoformat())
+            return query.order("updated_at").order("id")
+
+        gravadas = 0
+        maior_atualizacao = atualizado_ate
+        for linhas in _buscar_paginado(query_alteracoes):
+            linhas = [_normalizar(linha) for linha in linhas]
+            with con:
+                con.executemany(
+                    "insert or replace into registros (tabela, id, dados) values (?, ?, ?)",
+                    [(tabela, linha["id"], json.dumps(linha, default=str)) for linha in linhas],
+                )
+            gravadas += len(linhas)
+            for linha in linhas:
+                if linha.get("updated_at") and (maior_atualizacao is None or linha["updated_at"] > maior_atualizacao):
+                    maior_atualizacao = linha["updated_at"]
+
+        def query_exclusoes():
+            query = supabase.table("registros_excluidos").select("registro_id,excluido_em").eq("tabela", tabela)
+            if excluido_ate:
+                limite = datetime.fromisoformat(excluido_ate) - SOBREPOSICAO
+                query = query.gt("excluido_em", limite.isoformat())
+            return query.order("excluido_em").order("id")
+
+        removidas = 0
+        maior_exclusao = excluido_ate
+        for linhas in _buscar_paginado(query_exclusoes):
+            with con:
+                con.executemany(
+                    "delete from registros where tabela = ? and id = ?",
+                    [(tabela, linha["registro_id"]) for linha in linhas],
+                )
+            removidas += len(linhas)
+            for linha in linhas:
+                excluido_em = _para_utc(linha["excluido_em"])
+                if maior_exclusao is None or excluido_em > maior_exclusao:
+                    maior_exclusao = excluido_em
+
+        with con:
+            con.execute(
+                "insert or replace into marcas (tabela, atualizado_ate, excluido_ate, sincronizado_em)"
+                " values (?, ?, ?, ?)",
+                (tabela, maior_atualizacao, maior_exclusao, time.time()),
+            )
+        _sincronizadas.add(tabela)
+        return gravadas, removidas
+
+
+def sincronizar_tudo():
+    for tabela in TABELAS:
+        try:
+            sincronizar(tabela)
+        except Exception as e:
+            logger.warning("Erro ao sincronizar espelho de %s: %s", tabela, e)
+
+
+def sincronizar_apos_escrita(*tabelas):
+    """
+    Chamado pelas funções que gravam no Supabase: atualiza imediatamente o
+    espelho das tabelas alteradas, para que a próxima leitura já veja a mudança.
+    """
+    for tabela in tabelas:
+        if tabela in _sincronizadas:
+            try:
+                sincronizar(tabela)
+            except Exception as e:
+                # Sem a atualização o espelho ficaria defasado: volta a consultar o Supabase
+                _sincronizadas.discard(tabela)
+                logger.warning("Erro ao sincronizar espelho de %s: %s", tabela, e)
+
+
+def _laco_sincronizacao(intervalo):
+    while True:
+        sincronizar_tudo()
+        time.sleep(intervalo)
+
+
+def iniciar_sincronizacao(intervalo=INTERVALO_SINCRONIZACAO):
+    """
+    Inicia (uma única vez por processo) a thread que mantém o espelho atualizado.
+    """
+    global _thread
+    if not ESPELHO_ATIVO:
+        return
+    with _lock_thread:
+        if _thread is not None and _thread.is_alive():
+            return
+        _thread = threading.Thread(
+            target=_laco_sincronizacao, args=(intervalo,), name="espelho-sync", daemon=True
+        )
+        _thread.start()
+
+
+###########################
+# Consultas
+###########################
+
+def disponivel(tabela):
+    """
+    True se o espelho de 'tabela' já foi sincronizado neste processo.
+    Enquanto não estiver, as funções de leitura consultam o Supabase diretamente.
+    """
+    return ESPELHO_ATIVO and tabela in _sincronizadas
+
+
+def _variantes(valor):
+    """
+    O PostgREST converte '123' para o tipo da coluna; no SQLite o JSON guarda
+    números e textos separadamente, então strings numéricas casam com ambos.
+    """
+    if isinstance(valor, str) and re.fullmatch(r"-?\d+", valor.strip()):
+        return [valor, int(valor)]
+    return [valor]
+
+
+def consultar(tabela, colunas="*", filtros=None, ordem="id", desc=False, limite=None, cursor=None):
+    """
+    Consulta o espelho local com a mesma semântica de chamados.aplicar_filtros:
+    'filtros' é uma lista de tuplas (coluna, operador, valor).
+    Retorna uma lista de dicionários com as 'colunas' pedidas.
+    """
+    clausulas = ["tabela = ?"]
+    parametros = [tabela]
+    for coluna, operador, valor in filtros or []:
+        negar = operador.startswith("not.")
+        if negar:
+            operador = operador[len("not."):]
+        expressao = _expressao(coluna)
+        if coluna in COLUNAS_DATA and operador in OPERADORES:
+            valor = _para_utc(valor)
+
+        if operador == "in":
+            valores = [v for item in valor for v in _variantes(item)]
+            sql = f"{expressao} in ({', '.join('?' * len(valores))})" if valores else "0"
+            parametros += valores
+        elif operador == "is":
+            if valor is None:
+                sql = f"{expressao} is null"
+            else:
+                sql = f"{expressao} = ?"
+                parametros.append(valor)
+        elif operador in ("like", "ilike"):
+            sql = f"{expressao} like ?"
+            parametros.append(valor.replace("*", "%"))
+        elif operador in ("eq", "neq"):
+            variantes = _variantes(valor)
+            sql = f"{expressao} in ({', '.join('?' * len(variantes))})"
+            if operador == "neq":
+                sql = f"not ({sql})"
+            parametros += variantes
+        else:
+            sql = f"{expressao} {OPERADORES[operador]} ?"
+            parametros.append(valor)
+        clausulas.append(f"not ({sql})" if negar else sql)
+
+    if cursor is not None:
+        clausulas.append(f"{_expressao(ordem)} {'<' if desc else '>'} ?")
+        parametros.append(cursor)
+
+    sql = (
+        f"select dados from registros where {' and '.join(clausulas)}"
+        f" order by {_expressao(ordem)} {'desc' if desc else 'asc'}"
+    )
+    if limite:
+        sql += " limit ?"
+        parametros.append(limite)
+
+    linhas = _conexao().execute(sql, parametros).fetchall()
+    if colunas == "*":
+        return [json.loads(dados) for (dados,) in linhas]
+    if isinstance(colunas, str):
+        colunas = colunas.split(",")
+    colunas = [c.strip() for c in colunas]
+    registros = []
+    for (dados,) in linhas:
+        registro = json.loads(dados)
+        registros.append({c: registro.get(c) for c in colunas})
+    return registros
@@ -2,22 +2,72 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from supabase_client import supabase
+from cache_dados import CACHE_REFERENCIA
+
+def _carregar_estoque():
+    resp = supabase.table("estoque_com_saldo").select("*").order("id").execute()
+    return resp.data if resp.data else []
 
 def get_estoque():
     """
     Retorna a lista de peças no estoque.
     Cada registro possui: id, nome, quantidade, descricao, nota_fiscal e data_adicao.
+    A quantidade é o saldo calculado a partir do livro de movimentações
+    (view estoque_com_saldo, ver sql/005_estoque_movimentos.sql).
+    A lista fica em cache (CACHE_REFERENCIA) até expirar ou até uma alteração no estoque.
     """
     try:
-        resp = supabase.table("estoque").select("*").execute()
-        return resp.data if resp.data else []
+        return CACHE_REFERENCIA.obter("estoque", _carregar_estoque)
     except Exception as e:
         st.error(f"Erro ao recuperar estoque: {e}")
         return []
 
+def registrar_movimento(peca_id, tipo, quantidade, chamado_id=None):
+    """
+    Acrescenta um movimento ao livro do estoque.
+    - tipo: 'entrada', 'saida' ou 'ajuste'
+    - quantidade: com sinal (saídas negativas)
+    Movimentos nunca são alterados, então baixas simultâneas não se perdem.
+    """
+    supabase.table("estoque_movimentos").insert({
+        "peca_id": peca_id,
+        "tipo": tipo,
+        "quantidade": quantidade,
+        "chamado_id": chamado_id
+    }).execute()
+    CACHE_REFERENCIA.invalidar("estoque")
+
+def get_movimentos(peca_id=None, limite=100):
+    """
+    Retorna os movimentos mais recentes do livro, opcionalmente de uma peça.
+    """
+    try:
+        query = supabase.table("estoque_movimentos").select("*")
+        if peca_id is not None:
+            query = query.eq("peca_id", peca_id)
+        resp = query.order("id", desc=True).limit(limite).execute()
+        return resp.data if resp.data else []
+    except Exception as e:
+        st.error(f"Erro ao recuperar movimentações do estoque: {e}")
+        return []
+
+def consolidar_saldos():
+    """
+    Grava em estoque_saldos o saldo consolidado de cada peça, para que o cálculo
+    do saldo atual só precise somar os movimentos posteriores.
+    Retorna a quantidade de peças consolidadas.
+    """
+    try:
+        resp = supabase.rpc("consolidar_saldos_estoque", {}).execute()
+        return resp.data or 0
+    except Exception as e:
+        st.error(f"Erro ao consolidar saldos do estoque: {e}")
+        return 0
+
 def add_peca(nome, quantidade, descricao="", nota_fiscal=None, data_adicao=None):
     """
     Adiciona uma peça ao estoque.
+    - quantidade: registrada como movimento de entrada no livro.
     - data_adicao: se não fornecida, usa a data/hora atual.
     - nota_fiscal: opcional.
     """
@@ -31,7 +81,10 @@ def add_peca(nome, quantidade, descricao="", nota_fiscal=None, data_adicao=None)
             "nota_fiscal": nota_fiscal,
             "data_adicao": data_adicao
         }
-        supabase.table("estoque").insert(data).execute()
+        resp = supabase.table("estoque").insert(data).execute()
+        if quantidade:
+            registrar_movimento(resp.data[0]["id"], "entrada", int(quantidade))
+        CACHE_REFERENCIA.invalidar("estoque")
         st.success("Peça adicionada ao estoque com sucesso!")
     except Exception as e:
         st.error(f"Erro ao adicionar peça: {e}")
@@ -39,45 +92,51 @@ def add_peca(nome, quantidade, descricao="", nota_fiscal=None, data_adicao=None)
 def update_peca(id_peca, new_values):
     """
     Atualiza os dados da peça identificada pelo id.
+    Uma nova 'quantidade' é registrada como ajuste no livro (diferença para o saldo atual).
     """
     try:
-        supabase.table("estoque").update(new_values).eq("id", id_peca).execute()
+        new_values = dict(new_values)
+        quantidade = new_values.pop("quantidade", None)
+        if new_values:
+            supabase.table("estoque").update(new_values).eq("id", id_peca).execute()
+        if quantidade is not None:
+            supabase.rpc("ajustar_saldo_estoque", {"p_peca_id": id_peca, "p_saldo": int(quantidade)}).execute()
+        CACHE_REFERENCIA.invalidar("estoque")
         st.success("Peça atualizada com sucesso!")
     except Exception as e:
         st.error(f"Erro ao atualizar peça: {e}")
 
 def delete_peca(id_peca):
     """
-    Remove uma peça do estoque.
+    Remove uma peça do estoque (e, em cascata, seus movimentos).
     """
     try:
         supabase.table("estoque").delete().eq("id", id_peca).execute()
+        CACHE_REFERENCIA.invalidar("estoque")
         st.success("Peça excluída com sucesso!")
     except Exception as e:
         st.error(f"Erro ao excluir peça: {e}")
 
-def dar_baixa_estoque(peca_nome, quantidade_usada=1):
+def dar_baixa_estoque(peca_nome, quantidade_usada=1, chamado_id=None, peca_id=None):
     """
-    Dá baixa no estoque: reduz a quantidade da peça 'peca_nome' pelo valor 'quantidade_usada'.
-    Se a quantidade resultar negativa, ela é ajustada para zero.
+    Dá baixa no estoque: registra uma saída de 'quantidade_usada' unidades da peça.
+    A peça é identificada por 'peca_id' ou, na falta dele, pelo nome (a de menor id).
     """
     try:
-        resp = supabase.table("estoque").select("*").eq("nome", peca_nome).execute()
-        if not resp.data:
-            st.warning(f"Peça '{peca_nome}' não encontrada no estoque.")
-            return
-        item = resp.data[0]
-        nova_quantidade = item.get("quantidade", 0) - quantidade_usada
-        if nova_quantidade < 0:
-            nova_quantidade = 0
-        supabase.table("estoque").update({"quantidade": nova_quantidade}).eq("id", item["id"]).execute()
-        st.success(f"Baixa efetuada: {peca_nome} agora possui {nova_quantidade} unidades.")
+        if peca_id is None:
+            resp = supabase.table("estoque").select("id").eq("nome", peca_nome).order("id").limit(1).execute()
+            if not resp.data:
+                st.warning(f"Peça '{peca_nome}' não encontrada no estoque.")
+                return
+            peca_id = resp.data[0]["id"]
+        registrar_movimento(peca_id, "saida", -quantidade_usada, chamado_id)
+        st.success(f"Baixa efetuada: {quantidade_usada} unidade(s) de {peca_nome}.")
     except Exception as e:
         st.error(f"Erro ao dar baixa no estoque: {e}")
 
 def manage_estoque():
     st.subheader("Gerenciar Estoque de Peças de Informática")
-    action = st.selectbox("Ação", ["Listar", "Adicionar", "Editar", "Remover"])
+    action = st.selectbox("Ação", ["Listar", "Adicionar", "Editar", "Remover", "Movimentações"])
     
     if action == "Listar":
         estoque_data = get_estoque()
@@ -135,3 +194,21 @@ def manage_estoque():
                 delete_peca(id_peca)
         else:
             st.write("Estoque vazio para remoção.")
+
+    elif action == "Movimentações":
+        estoque_data = get_estoque()
+        nomes = {item["id"]: item["nome"] for item in estoque_data}
+        peca_id = st.selectbox(
+            "Peça", [None] + list(nomes),
+            format_func=lambda i: "Todas" if i is None else f"{nomes[i]} (ID {i})"
+        )
+        movimentos = get_movimentos(peca_id)
+        if movimentos:
+            df = pd.DataFrame(movimentos)
+            df["peca"] = df["peca_id"].map(nomes)
+            st.dataframe(df)
+        else:
+            st.write("Nenhuma movimentação registrada.")
+        if st.button("Consolidar Saldos"):
+            pecas = consolidar_saldos()
+            st.success(f"Saldos consolidados para {pecas} peça(s).")
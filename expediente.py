@@ -0,0 +1,363 @@
+# expediente.py
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+
+# Expediente padrão das UBSs: manhã 08:00-12:00 e tarde 13:00-17:00, de segunda a sexta
+JANELAS_PADRAO = ((time(8, 0), time(12, 0)), (time(13, 0), time(17, 0)))
+DIAS_UTEIS_PADRAO = (0, 1, 2, 3, 4)
+
+# Folga (em dias) usada ao estender a tabela acumulada, para que extensões sejam raras
+MARGEM_DIAS = 366
+
+MICROS_POR_SEGUNDO = 1_000_000
+
+# Formato de data/hora usado nas colunas hora_abertura e hora_fechamento
+FORMATO_DATA_HORA = "%d/%m/%Y %H:%M:%S"
+
+
+def _micros_do_dia(t):
+    """
+    Converte um datetime.time em microssegundos desde a meia-noite.
+    """
+    return ((t.hour * 60 + t.minute) * 60 + t.second) * MICROS_POR_SEGUNDO + t.microsecond
+
+
+def _como_data(valor):
+    """
+    Aceita date, datetime ou string 'dd/mm/aaaa' / 'aaaa-mm-dd' e retorna um date.
+    """
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    valor = str(valor).strip()
+    if "/" in valor:
+        return datetime.strptime(valor, "%d/%m/%Y").date()
+    return date.fromisoformat(valor)
+
+
+class CalendarioExpediente:
+    """
+    Calendário de expediente com a soma acumulada de tempo útil por dia.
+
+    Para cada dia do intervalo coberto guarda quantos microssegundos úteis existem
+    antes dele; assim o tempo útil entre dois instantes é a diferença entre duas
+    posições, calculada em tempo constante, independente de quantos dias separam
+    os instantes ou de quantos feriados existem.
+      - janelas: sequência de pares (início, fim) de datetime.time com o expediente do dia
+      - dias_uteis: dias da semana trabalhados (0 = segunda ... 6 = domingo)
+      - feriados: datas (date, datetime ou string) sem expediente
+    """
+
+    def __init__(self, janelas=JANELAS_PADRAO, dias_uteis=DIAS_UTEIS_PADRAO, feriados=()):
+        self.janelas = tuple(
+            (_micros_do_dia(inicio), _micros_do_dia(fim))
+            for inicio, fim in janelas
+            if fim > inicio
+        )
+        self.dias_uteis = frozenset(dias_uteis)
+        self.feriados = frozenset(_como_data(f) for f in feriados)
+        self.micros_por_dia = sum(fim - inicio for inicio, fim in self.janelas)
+        self._lock = threading.Lock()
+        # Cópia NumPy da tabela, criada sob demanda para os cálculos vetorizados
+        self._tabela_np = None
+        # (data_base, acumulado, util): acumulado[i] = microssegundos úteis antes do dia base+i
+        self._tabela = (date.today(), [0], [])
+
+        hoje = date.today()
+        self._garantir(hoje - timedelta(days=5 * 365), hoje + timedelta(days=MARGEM_DIAS))
+
+    def eh_dia_util(self, dia):
+        dia = _como_data(dia)
+        return dia.weekday() in self.dias_uteis and dia not in self.feriados
+
+    def _garantir(self, primeiro, ultimo):
+        """
+        Garante que a tabela acumulada cubra os dias de 'primeiro' a 'ultimo'.
+        A tabela é reconstruída com folga e trocada de uma só vez, então leitores
+        concorrentes sempre enxergam uma versão consistente.
+        """
+        base, acumulado, util = self._tabela
+        if base <= primeiro and (ultimo - base).days < len(util):
+            return self._tabela
+        with self._lock:
+            base, acumulado, util = self._tabela
+            if base <= primeiro and (ultimo - base).days < len(util):
+                return self._tabela
+            if util:
+                primeiro = min(primeiro, base)
+                ultimo = max(ultimo, base + timedelta(days=len(util) - 1))
+            nova_base = primeiro - timedelta(days=MARGEM_DIAS)
+            total_dias = (ultimo - nova_base).days + 1 + MARGEM_DIAS
+
+            novo_acumulado = [0] * (total_dias + 1)
+            novo_util = [False] * total_dias
+            total = 0
+            for i in range(total_dias):
+                novo_acumulado[i] = total
+                if self.eh_dia_util(nova_base + timedelta(days=i)):
+                    novo_util[i] = True
+                    total += self.micros_por_dia
+            novo_acumulado[total_dias] = total
+
+            self._tabela = (nova_base, novo_acumulado, novo_util)
+            return self._tabela
+
+    def micros_uteis_no_dia(self, micros):
+        """
+        Microssegundos de expediente decorridos entre a meia-noite e 'micros'
+        (microssegundos desde a meia-noite) em um dia útil.
+        """
+        total = 0
+        for inicio, fim in self.janelas:
+            if micros > inicio:
+                total += (micros if micros < fim else fim) - inicio
+        return total
+
+    def _posicao_em(self, tabela, instante):
+        base, acumulado, util = tabela
+        dia = instante.date()
+        indice = (dia - base).days
+        posicao = acumulado[indice]
+        if util[indice]:
+            posicao += self.micros_uteis_no_dia(_micros_do_dia(instante.time()))
+        return posicao
+
+    def posicao(self, instante):
+        """
+        Microssegundos úteis acumulados desde o início da tabela até 'instante'.
+        Usa o relógio local do próprio datetime (com ou sem fuso).
+        Posições só são comparáveis entre si se vierem da mesma tabela: para
+        diferenças, use tempo_util() ou tempos_uteis().
+        """
+        dia = instante.date()
+        return self._posicao_em(self._garantir(dia, dia), instante)
+
+    def tempo_util(self, inicio, fim):
+        """
+        Retorna um timedelta com o tempo útil entre 'inicio' e 'fim'.
+        Se 'inicio' >= 'fim', retorna timedelta(0).
+        """
+        if inicio >= fim:
+            return timedelta(0)
+        # As duas posições vêm da mesma tabela: uma extensão entre as duas
+        # leituras mudaria a base e tornaria a subtração inválida
+        tabela = self._garantir(inicio.date(), fim.date())
+        return timedelta(microseconds=self._posicao_em(tabela, fim) - self._posicao_em(tabela, inicio))
+
+    def _tabela_numpy(self, tabela):
+        import numpy as np
+
+        tabela_np = self._tabela_np
+        if tabela_np is None or tabela_np[0] is not tabela:
+            tabela_np = self._tabela_np = (
+                tabela,
+                np.asarray(tabela[1], dtype=np.int64),
+                np.asarray(tabela[2], dtype=bool),
+            )
+        return tabela_np
+
+    def _posicoes_em(self, tabela, instantes):
+        import numpy as np
+
+        _, acumulado_np, util_np = self._tabela_numpy(tabela)
+        dias = instantes.astype("datetime64[D]")
+        indices = (dias - np.datetime64(tabela[0], "D")).astype(np.int64)
+        micros = (instantes - dias).astype(np.int64)
+        no_dia = np.zeros(micros.shape, dtype=np.int64)
+        for inicio, fim in self.janelas:
+            no_dia += np.clip(micros - inicio, 0, fim - inicio)
+        return acumulado_np[indices] + np.where(util_np[indices], no_dia, 0)
+
+    def posicoes(self, instantes):
+        """
+        Versão vetorizada de posicao(): recebe um array datetime64 (sem NaT) e
+        retorna um array int64 com os microssegundos úteis acumulados.
+        """
+        import numpy as np
+
+        instantes = np.asarray(instantes, dtype="datetime64[us]")
+        if instantes.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        dias = instantes.astype("datetime64[D]")
+        return self._posicoes_em(self._garantir(dias.min().item(), dias.max().item()), instantes)
+
+    def tempos_uteis(self, inicios, fins):
+        """
+        Versão vetorizada de tempo_util(): recebe dois arrays datetime64 (sem
+        NaT) do mesmo tamanho e retorna um array int64 com os microssegundos
+        úteis entre cada par (0 quando o início não é anterior ao fim).
+        As posições de início e fim vêm da mesma tabela.
+        """
+        import numpy as np
+
+        inicios = np.asarray(inicios, dtype="datetime64[us]")
+        fins = np.asarray(fins, dtype="datetime64[us]")
+        if inicios.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        dias_inicio = inicios.astype("datetime64[D]")
+        dias_fim = fins.astype("datetime64[D]")
+        primeiro = min(dias_inicio.min(), dias_fim.min()).item()
+        ultimo = max(dias_inicio.max(), dias_fim.max()).item()
+        tabela = self._garantir(primeiro, ultimo)
+        micros = self._posicoes_em(tabela, fins) - self._posicoes_em(tabela, inicios)
+        return np.where(fins > inicios, micros, 0)
+
+
+###########################
+# Cálculo em lote (DataFrames)
+###########################
+
+def _para_datetime(valores, formato, indice):
+    """
+    Converte strings no formato 'formato' (ou datetimes) em uma Series datetime64
+    ingênua, com o relógio local preservado. Valores inválidos viram NaT.
+    """
+    import pandas as pd
+
+    if isinstance(valores, (datetime, date, str)) or valores is None:
+        if isinstance(valores, datetime) and valores.tzinfo is not None:
+            valores = valores.replace(tzinfo=None)
+        valores = [valores] * len(indice)
+    serie = pd.Series(valores, index=indice) if not isinstance(valores, pd.Series) else valores
+    if not pd.api.types.is_datetime64_any_dtype(serie):
+        serie = pd.to_datetime(serie, format=formato, errors="coerce")
+    elif getattr(serie.dt, "tz", None) is not None:
+        serie = serie.dt.tz_localize(None)
+    return serie
+
+
+def tempo_util_vetorizado(aberturas, fechamentos, calendario=None, formato=FORMATO_DATA_HORA):
+    """
+    Calcula o tempo útil (em segundos) de vários chamados de uma vez.
+      - aberturas: Series/array com hora_abertura (strings em 'formato' ou datetimes)
+      - fechamentos: Series/array com hora_fechamento, ou um único datetime (ex.: agora)
+    Retorna uma Series float com o mesmo índice de 'aberturas'; linhas com data ausente
+    ou inválida ficam NaN. Os valores são idênticos a calculate_working_hours().
+    """
+    import numpy as np
+    import pandas as pd
+
+    if calendario is None:
+        calendario = CALENDARIO_PADRAO
+    if isinstance(aberturas, pd.Series):
+        indice = aberturas.index
+    else:
+        aberturas = list(aberturas)
+        indice = pd.RangeIndex(len(aberturas))
+    if isinstance(fechamentos, pd.Series):
+        fechamentos = fechamentos.to_numpy()
+
+    inicio = _para_datetime(aberturas, formato, indice)
+    fim = _para_datetime(fechamentos, formato, indice)
+    resultado = pd.Series(np.nan, index=indice, dtype=float)
+
+    validos = (inicio.notna() & fim.notna()).to_numpy()
+    if not validos.any():
+        return resultado
+    ini = inicio.to_numpy()[validos]
+    fi = fim.to_numpy()[validos]
+    micros = calendario.tempos_uteis(ini, fi)
+    resultado.iloc[np.flatnonzero(validos)] = micros / MICROS_POR_SEGUNDO
+    return resultado
+
+
+def formatar_tempo_util(segundos):
+    """
+    Formata segundos úteis como str(timedelta), igual à coluna 'Tempo Util' original.
+    """
+    return str(timedelta(microseconds=round(segundos * MICROS_POR_SEGUNDO)))
+
+
+###########################
+# Feriados
+###########################
+
+def domingo_de_pascoa(ano):
+    """
+    Data do domingo de Páscoa (algoritmo de Meeus/Jones/Butcher).
+    """
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def feriados_nacionais(ano):
+    """
+    Feriados nacionais e pontos facultativos de repartições públicas no ano:
+    datas fixas, Carnaval (segunda e terça), Sexta-feira Santa e Corpus Christi.
+    """
+    pascoa = domingo_de_pascoa(ano)
+    fixos = [
+        (1, 1), (4, 21), (5, 1), (9, 7), (10, 12), (11, 2), (11, 15), (12, 25)
+    ]
+    if ano >= 2024:
+        fixos.append((11, 20))  # Dia da Consciência Negra (Lei 14.759/2023)
+    datas = [date(ano, mes, dia) for mes, dia in fixos]
+    datas += [
+        pascoa - timedelta(days=48),
+        pascoa - timedelta(days=47),
+        pascoa - timedelta(days=2),
+        pascoa + timedelta(days=60),
+    ]
+    return datas
+
+
+def feriados_ceara(ano):
+    """
+    Feriados estaduais do Ceará: São José (19/03) e Data Magna (25/03).
+    """
+    return [date(ano, 3, 19), date(ano, 3, 25)]
+
+
+def feriados_municipais(ano, datas=None):
+    """
+    Feriados municipais de Itapipoca no ano.
+    'datas' é uma string 'dd/mm,dd/mm,...'; se omitida, é lida da variável de
+    ambiente FERIADOS_MUNICIPAIS, pois o calendário municipal muda por decreto.
+    """
+    if datas is None:
+        datas = os.getenv("FERIADOS_MUNICIPAIS", "")
+    feriados = []
+    for item in datas.split(","):
+        item = item.strip()
+        if item:
+            dia, mes = item.split("/")[:2]
+            feriados.append(date(ano, int(mes), int(dia)))
+    return feriados
+
+
+def feriados_itapipoca(anos, extras=()):
+    """
+    Lista de feriados nacionais, estaduais e municipais para os anos informados,
+    acrescida das datas em 'extras' (pontos facultativos decretados, por exemplo).
+    """
+    feriados = [_como_data(f) for f in extras]
+    for ano in anos:
+        feriados += feriados_nacionais(ano)
+        feriados += feriados_ceara(ano)
+        feriados += feriados_municipais(ano)
+    return feriados
+
+
+def calendario_itapipoca(anos=None, extras=()):
+    """
+    Calendário com o expediente padrão e os feriados de Itapipoca.
+    Por padrão cobre de 2020 até o ano seguinte ao atual.
+    """
+    if anos is None:
+        anos = range(2020, date.today().year + 2)
+    return CalendarioExpediente(feriados=feriados_itapipoca(anos, extras))
+
+
+# Calendário usado por calculate_working_hours: expediente padrão, sem feriados
+CALENDARIO_PADRAO = CalendarioExpediente()
@@ -0,0 +1,90 @@
+# graficos.py
+import functools
+import io
+import os
+import threading
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Gráficos renderizados em memória (PNG em bytes), sem arquivos temporários e
+# sem o pyplot: cada chamada cria a sua própria Figure, então sessões
+# simultâneas não disputam a figura "atual" nem acumulam figuras abertas.
+# Os PNGs ficam em cache pelo conteúdo (tipo, dados e textos do gráfico):
+# gerar de novo o mesmo relatório ou painel não chama o matplotlib.
+
+# Quantidade de gráficos guardados no cache do processo
+CACHE_MAXIMO = int(os.getenv("GRAFICOS_CACHE_MAXIMO", "128"))
+DPI = 100
+
+# O matplotlib não é seguro para threads ao desenhar (fontes e texto são compartilhados)
+_lock = threading.Lock()
+
+
+def _png(fig):
+    saida = io.BytesIO()
+    FigureCanvasAgg(fig)
+    fig.tight_layout()
+    fig.savefig(saida, format="png", dpi=DPI)
+    return saida.getvalue()
+
+
+@functools.lru_cache(maxsize=CACHE_MAXIMO)
+def _barras(rotulos, series, titulo, eixo_x, eixo_y, cores, horizontal, rotacao, tamanho):
+    with _lock:
+        return _desenhar_barras(rotulos, series, titulo, eixo_x, eixo_y, cores, horizontal, rotacao, tamanho)
+
+
+def _desenhar_barras(rotulos, series, titulo, eixo_x, eixo_y, cores, horizontal, rotacao, tamanho):
+    fig = Figure(figsize=tamanho)
+    ax = fig.add_subplot()
+    posicoes = range(len(rotulos))
+    espessura = 0.8 / len(series)
+    for numero, (nome, valores) in enumerate(series):
+        deslocamento = (numero - (len(series) - 1) / 2) * espessura
+        barras = [posicao + deslocamento for posicao in posicoes]
+        cor = cores[numero] if numero < len(cores) else None
+        if horizontal:
+            ax.barh(barras, valores, height=espessura, color=cor, label=nome)
+        else:
+            ax.bar(barras, valores, width=espessura, color=cor, label=nome)
+    if horizontal:
+        ax.set_yticks(list(posicoes), rotulos)
+        ax.invert_yaxis()
+    else:
+        ax.set_xticks(list(posicoes), rotulos, rotation=rotacao, ha="right" if rotacao else "center")
+    if len(series) > 1:
+        ax.legend()
+    ax.set_title(titulo)
+    ax.set_xlabel(eixo_x)
+    ax.set_ylabel(eixo_y)
+    return _png(fig)
+
+
+def grafico_barras(rotulos, valores, titulo="", eixo_x="", eixo_y="", cor=None,
+                   horizontal=False, rotacao=0, tamanho=(6.4, 4.8)):
+    """
+    PNG (bytes) de um gráfico de barras com uma barra por rótulo
+    (horizontal=True: barras deitadas, o primeiro rótulo no topo).
+    Gráficos com os mesmos dados e textos vêm do cache.
+    """
+    return grafico_barras_agrupadas(
+        rotulos, {"": valores}, titulo, eixo_x, eixo_y, [cor] if cor else (),
+        horizontal, rotacao, tamanho,
+    )
+
+
+def grafico_barras_agrupadas(rotulos, series, titulo="", eixo_x="", eixo_y="", cores=(),
+                             horizontal=False, rotacao=0, tamanho=(6.4, 4.8)):
+    """
+    PNG (bytes) de um gráfico com, para cada rótulo, uma barra de cada série
+    ('series': nome -> valores na ordem dos rótulos), com legenda se houver
+    mais de uma série. Gráficos com os mesmos dados e textos vêm do cache.
+    """
+    # Chave do cache: tuplas de tipos simples (Series/arrays viram listas de números)
+    return _barras(
+        tuple(str(rotulo) for rotulo in rotulos),
+        tuple((str(nome), tuple(float(v) for v in valores)) for nome, valores in series.items()),
+        titulo, eixo_x, eixo_y, tuple(cores), horizontal, rotacao, tuple(tamanho),
+    )
+
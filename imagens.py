@@ -0,0 +1,268 @@
+# imagens.py
+import functools
+import hashlib
+import io
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Fotos do inventário guardadas fora da tabela, endereçadas pelo conteúdo: cada
+# imagem é gravada uma única vez sob o SHA-256 dos seus bytes e a linha do
+# inventário guarda só esse hash (coluna imagem_hash). Na gravação também é
+# gerada uma miniatura JPEG para as listagens; a imagem original só é lida no
+# detalhe do item. Fotos antigas (coluna image_data) continuam sendo lidas
+# enquanto a coluna existir; para migrá-las: python -m imagens, com
+# IMAGENS_ARMAZENAMENTO definido explicitamente
+#   IMAGENS_ARMAZENAMENTO=supabase  bucket IMAGENS_BUCKET do Supabase Storage (padrão)
+#   IMAGENS_ARMAZENAMENTO=local     pasta IMAGENS_DIR (desenvolvimento: a pasta
+#                                   não sobrevive a um novo deploy hospedado
+#                                   nem é vista por outras réplicas)
+
+ARMAZENAMENTO = os.getenv("IMAGENS_ARMAZENAMENTO", "supabase")
+DIRETORIO = os.getenv("IMAGENS_DIR", "imagens")
+BUCKET = os.getenv("IMAGENS_BUCKET", "inventario-imagens")
+# Maior lado da miniatura, em pixels
+TAMANHO_MINIATURA = int(os.getenv("IMAGENS_TAMANHO_MINIATURA", "256"))
+# Maior lado da imagem guardada (fotos de celular são reduzidas na gravação)
+TAMANHO_MAXIMO = int(os.getenv("IMAGENS_TAMANHO_MAXIMO", "1600"))
+
+
+class ImagemInvalida(Exception):
+    """
+    Levantada quando o arquivo enviado não é uma imagem que o Pillow consiga abrir.
+    """
+
+
+###########################
+# Armazenamentos
+###########################
+
+class ArmazemLocal:
+    """
+    Guarda os arquivos em uma pasta local, em subpastas pelos dois primeiros
+    caracteres do hash (também usado nos testes e benchmarks).
+    """
+
+    def __init__(self, raiz=DIRETORIO):
+        self.raiz = raiz
+
+    def _caminho(self, nome):
+        return os.path.join(self.raiz, nome[:2], nome)
+
+    def existe(self, nome):
+        return os.path.exists(self._caminho(nome))
+
+    def gravar(self, nome, conteudo, tipo):
+        caminho = self._caminho(nome)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f"{caminho}.{threading.get_ident()}.tmp"
+        with open(temporario, "wb") as arquivo:
+            arquivo.write(conteudo)
+        # Troca atômica: uma leitura concorrente nunca vê o arquivo pela metade
+        os.replace(temporario, caminho)
+
+    def ler(self, nome):
+        with open(self._caminho(nome), "rb") as arquivo:
+            return arquivo.read()
+
+
+class ArmazemSupabase:
+    """
+    Guarda os arquivos em um bucket do Supabase Storage, pelo cliente compartilhado.
+    """
+
+    def __init__(self, bucket=BUCKET):
+        self.bucket = bucket
+
+    def _bucket(self):
+        from supabase_client import obter_cliente
+        return obter_cliente().storage.from_(self.bucket)
+
+    def existe(self, nome):
+        pasta, arquivo = nome[:2], nome
+        return any(item.get("name") == arquivo for item in self._bucket().list(pasta, {"search": arquivo}))
+
+    def gravar(self, nome, conteudo, tipo):
+        self._bucket().upload(f"{nome[:2]}/{nome}", conteudo, {"content-type": tipo, "upsert": "true"})
+
+    def ler(self, nome):
+        return self._bucket().download(f"{nome[:2]}/{nome}")
+
+
+_armazem = None
+_lock = threading.Lock()
+
+
+def obter_armazem():
+    """
+    Armazenamento configurado em IMAGENS_ARMAZENAMENTO, criado na primeira chamada.
+    """
+    global _armazem
+    if _armazem is None:
+        with _lock:
+            if _armazem is None:
+                _armazem = ArmazemLocal() if ARMAZENAMENTO == "local" else ArmazemSupabase()
+    return _armazem
+
+
+def definir_armazem(armazem):
+    """
+    Troca o armazenamento usado pelo app (ex.: ArmazemLocal em uma pasta temporária).
+    """
+    global _armazem
+    with _lock:
+        _armazem = armazem
+    _ler_miniatura.cache_clear()
+
+
+###########################
+# Gravação e leitura
+###########################
+
+def _nome_miniatura(hash_imagem):
+    return f"{hash_imagem}_miniatura.jpg"
+
+
+def _reduzir(imagem, tamanho, formato):
+    from PIL import Image
+
+    copia = imagem.copy()
+    copia.thumbnail((tamanho, tamanho), Image.LANCZOS)
+    if formato == "JPEG" and copia.mode not in ("RGB", "L"):
+        copia = copia.convert("RGB")
+    saida = io.BytesIO()
+    copia.save(saida, format=formato, quality=85, optimize=True)
+    return saida.getvalue()
+
+
+def salvar_imagem(conteudo):
+    """
+    Guarda a imagem 'conteudo' (bytes de PNG/JPEG) e a sua miniatura, se ainda
+    não existirem, e retorna o hash a ser gravado em inventario.imagem_hash.
+    Imagens maiores que TAMANHO_MAXIMO são reduzidas antes de guardar.
+    Levanta ImagemInvalida se o conteúdo não for uma imagem.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        imagem = Image.open(io.BytesIO(conteudo))
+        imagem.load()
+    except (UnidentifiedImageError, OSError) as e:
+        raise ImagemInvalida(f"Arquivo de imagem inválido: {e}")
+    # Fotos de celular: aplica a rotação indicada no EXIF antes de reduzir
+    imagem = ImageOps.exif_transpose(imagem)
+    formato = "PNG" if imagem.format == "PNG" or imagem.mode in ("RGBA", "LA", "P") else "JPEG"
+    if max(imagem.size) > TAMANHO_MAXIMO:
+        conteudo = _reduzir(imagem, TAMANHO_MAXIMO, formato)
+
+    hash_imagem = hashlib.sha256(conteudo).hexdigest()
+    armazem = obter_armazem()
+    if not armazem.existe(hash_imagem):
+        armazem.gravar(hash_imagem, conteudo, "image/png" if formato == "PNG" else "image/jpeg")
+    if not armazem.existe(_nome_miniatura(hash_imagem)):
+        armazem.gravar(_nome_miniatura(hash_imagem), _reduzir(imagem, TAMANHO_MINIATURA, "JPEG"), "image/jpeg")
+    return hash_imagem
+
+
+def ler_imagem(hash_imagem):
+    """
+    Bytes da imagem original. Retorna None se não for encontrada.
+    """
+    try:
+        return obter_armazem().ler(hash_imagem)
+    except Exception as e:
+        logger.warning("Imagem %s não encontrada: %s", hash_imagem, e)
+        return None
+
+
+@functools.lru_cache(maxsize=512)
+def _ler_miniatura(hash_imagem):
+    return obter_armazem().ler(_nome_miniatura(hash_imagem))
+
+
+def ler_miniatura(hash_imagem):
+    """
+    Bytes da miniatura JPEG. Como o conteúdo de um hash nunca muda, as
+    miniaturas lidas ficam em cache no processo. Retorna None se não for encontrada.
+    """
+    try:
+        return _ler_miniatura(hash_imagem)
+    except Exception as e:
+        logger.warning("Miniatura de %s não encontrada: %s", hash_imagem, e)
+        return None
+
+
+def ler_foto_antiga(id_item):
+    """
+    Bytes da foto de um item ainda não migrado, lida da coluna image_data
+    (base64). Retorna None se não houver foto ou se a coluna já tiver sido
+    removida (sql/009).
+    """
+    import base64
+    from supabase_client import supabase
+
+    try:
+        resp = supabase.table("inventario").select("image_data").eq("id", id_item).execute()
+    except Exception as e:
+        logger.debug("Coluna image_data indisponível: %s", e)
+        return None
+    if not resp.data or not resp.data[0].get("image_data"):
+        return None
+    return base64.b64decode(resp.data[0]["image_data"])
+
+
+###########################
+# Migração da coluna image_data
+###########################
+
+def migrar_image_data(tamanho_lote=20):
+    """
+    Copia as fotos em base64 da coluna inventario.image_data para o
+    armazenamento e preenche imagem_hash, em lotes pequenos (cada linha pode
+    ter alguns MB). image_data não é alterada: a coluna só deve ser removida
+    (sql/009) depois de conferir as fotos no armazenamento. Linhas que já têm
+    imagem_hash são puladas, então a migração pode ser repetida.
+    Retorna (migradas, com_erro).
+    """
+    import base64
+    from supabase_client import supabase
+
+    migradas = com_erro = 0
+    ultimo_id = 0
+    armazem = obter_armazem()
+    while True:
+        resp = (
+            supabase.table("inventario").select("id,image_data")
+            .not_.is_("image_data", None).is_("imagem_hash", None).gt("id", ultimo_id)
+            .order("id").limit(tamanho_lote).execute()
+        )
+        linhas = resp.data or []
+        for linha in linhas:
+            ultimo_id = linha["id"]
+            try:
+                hash_imagem = salvar_imagem(base64.b64decode(linha["image_data"]))
+                if not armazem.existe(hash_imagem):
+                    raise OSError(f"imagem {hash_imagem} não encontrada no armazenamento após a gravação")
+                supabase.table("inventario").update(
+                    {"imagem_hash": hash_imagem}
+                ).eq("id", linha["id"]).execute()
+                migradas += 1
+            except Exception as e:
+                logger.warning("Erro ao migrar a foto do item %s: %s", linha["id"], e)
+                com_erro += 1
+        if len(linhas) < tamanho_lote:
+            return migradas, com_erro
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if "IMAGENS_ARMAZENAMENTO" not in os.environ:
+        # O destino das fotos migradas tem de ser uma escolha explícita
+        raise SystemExit(
+            "Defina IMAGENS_ARMAZENAMENTO (supabase ou local, com IMAGENS_DIR) "
+            "antes de migrar as fotos."
+        )
+    migradas, com_erro = migrar_image_data()
+    print(f"Fotos migradas: {migradas}; com erro: {com_erro}")
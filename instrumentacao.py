@@ -0,0 +1,304 @@
+# instrumentacao.py
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Instrumentação das consultas ao Supabase (desative com INSTRUMENTACAO=0)
+INSTRUMENTACAO_ATIVA = os.getenv("INSTRUMENTACAO", "1") != "0"
+# Arquivo JSON-lines com uma linha por consulta (vazio = não grava)
+CAMINHO_LOG = os.getenv("INSTRUMENTACAO_LOG", "")
+# Consultas acima deste tempo são marcadas como lentas
+LIMITE_LENTO_MS = float(os.getenv("INSTRUMENTACAO_LIMITE_LENTO_MS", "500"))
+# Leituras sem filtro nem limite acima desta quantidade de linhas também são marcadas
+LIMITE_LINHAS_TABELA_INTEIRA = int(os.getenv("INSTRUMENTACAO_LIMITE_LINHAS", "500"))
+# Quantidade de consultas mantidas em memória para o painel
+TAMANHO_HISTORICO = int(os.getenv("INSTRUMENTACAO_HISTORICO", "2000"))
+# Respostas com mais linhas que isto têm o tamanho estimado por uma amostra
+AMOSTRA_BYTES = int(os.getenv("INSTRUMENTACAO_AMOSTRA_BYTES", "20"))
+
+OPERACOES = ("select", "insert", "update", "upsert", "delete")
+FILTROS = (
+    "eq", "neq", "gt", "gte", "lt", "lte", "like", "ilike", "is_", "in_",
+    "contains", "or_", "filter", "match", "text_search",
+)
+LIMITADORES = ("limit", "range", "single", "maybe_single")
+
+SEM_PAGINA = "(segundo plano)"
+
+_pagina = contextvars.ContextVar("pagina", default=SEM_PAGINA)
+_historico = deque(maxlen=TAMANHO_HISTORICO)
+_lock = threading.Lock()
+_arquivo = None
+
+
+def definir_pagina(nome):
+    """
+    Marca as consultas feitas a partir de agora (nesta thread) como vindas da
+    página 'nome'. O OS700 chama esta função antes de desenhar cada página.
+    """
+    _pagina.set(nome)
+
+
+def pagina_atual():
+    return _pagina.get()
+
+
+def _formatar_argumento(valor):
+    texto = repr(valor)
+    return texto if len(texto) <= 80 else texto[:77] + "..."
+
+
+class _Registro:
+    """
+    Dados de uma consulta em montagem: tabela, operação e filtros aplicados.
+    """
+
+    __slots__ = ("tabela", "operacao", "filtros", "limitada")
+
+    def __init__(self, tabela, operacao=None):
+        self.tabela = tabela
+        self.operacao = operacao
+        self.filtros = []
+        self.limitada = False
+
+    def anotar(self, metodo, args, kwargs):
+        if metodo in OPERACOES and self.operacao is None:
+            self.operacao = metodo
+        elif metodo in FILTROS or metodo in LIMITADORES or metodo == "order":
+            partes = [_formatar_argumento(a) for a in args]
+            partes += [f"{k}={_formatar_argumento(v)}" for k, v in kwargs.items()]
+            self.filtros.append(f"{metodo}({', '.join(partes)})")
+            if metodo in LIMITADORES:
+                self.limitada = True
+        elif metodo == "not_":
+            self.filtros.append("not")
+
+
+class ConsultaInstrumentada:
+    """
+    Envolve um construtor de consulta do supabase-py. Cada método encadeado é
+    anotado (operação, filtros) e execute() mede latência, linhas e bytes.
+    """
+
+    def __init__(self, construtor, registro):
+        self._construtor = construtor
+        self._registro = registro
+
+    def __getattr__(self, nome):
+        atributo = getattr(self._construtor, nome)
+        if hasattr(atributo, "execute"):
+            # Propriedades que devolvem o construtor, como .not_
+            self._registro.anotar(nome, (), {})
+            return ConsultaInstrumentada(atributo, self._registro)
+        if not callable(atributo):
+            return atributo
+
+        def chamar(*args, **kwargs):
+            self._registro.anotar(nome, args, kwargs)
+            resultado = atributo(*args, **kwargs)
+            if hasattr(resultado, "execute"):
+                return ConsultaInstrumentada(resultado, self._registro)
+            return resultado
+
+        return chamar
+
+    def execute(self):
+        inicio = time.perf_counter()
+        try:
+            resposta = self._construtor.execute()
+        except Exception as e:
+            registrar(self._registro, (time.perf_counter() - inicio) * 1000, erro=str(e))
+            raise
+        registrar(self._registro, (time.perf_counter() - inicio) * 1000, resposta=resposta)
+        return resposta
+
+
+class ClienteInstrumentado:
+    """
+    Cliente do Supabase com table()/from_()/rpc() instrumentados; os demais
+    atributos (auth, storage...) são repassados ao cliente original.
+    O cliente original fica em 'cliente' e pode ser trocado (ver
+    supabase_client.definir_cliente). Com ativo=False apenas repassa as chamadas.
+    """
+
+    def __init__(self, cliente, ativo=True):
+        self.cliente = cliente
+        self.ativo = ativo
+
+    def table(self, nome):
+        if not self.ativo:
+            return self.cliente.table(nome)
+        return ConsultaInstrumentada(self.cliente.table(nome), _Registro(nome))
+
+    from_ = table
+
+    def rpc(self, funcao, params=None, *args, **kwargs):
+        construtor = self.cliente.rpc(funcao, params or {}, *args, **kwargs)
+        if not self.ativo:
+            return construtor
+        return ConsultaInstrumentada(construtor, _Registro(f"rpc:{funcao}", "rpc"))
+
+    def __getattr__(self, nome):
+        return getattr(self.cliente, nome)
+
+
+def instrumentar(cliente):
+    """
+    Retorna o cliente envolvido pela instrumentação (que só repassa as chamadas, se desativada).
+    """
+    return ClienteInstrumentado(cliente, ativo=INSTRUMENTACAO_ATIVA)
+
+
+def _bytes_json(dados):
+    return len(json.dumps(dados, default=str).encode("utf-8"))
+
+
+def _tamanho(resposta, dados):
+    """
+    Bytes da resposta: o Content-Length, se a resposta o trouxer; senão o
+    tamanho do JSON dos dados, estimado por AMOSTRA_BYTES linhas espaçadas
+    quando a lista é maior (serializar toda leitura grande custaria caro).
+    """
+    cabecalhos = getattr(resposta, "headers", None)
+    if cabecalhos and cabecalhos.get("content-length"):
+        return int(cabecalhos["content-length"])
+    try:
+        if isinstance(dados, list) and len(dados) > AMOSTRA_BYTES:
+            passo = len(dados) / AMOSTRA_BYTES
+            amostra = [dados[int(i * passo)] for i in range(AMOSTRA_BYTES)]
+            return round(_bytes_json(amostra) * len(dados) / AMOSTRA_BYTES)
+        return _bytes_json(dados)
+    except Exception:
+        return None
+
+
+def registrar(registro, duracao_ms, resposta=None, erro=None):
+    """
+    Guarda a consulta no histórico em memória e, se configurado, no arquivo JSON-lines.
+    """
+    dados = getattr(resposta, "data", None)
+    linhas = len(dados) if isinstance(dados, list) else (1 if dados else 0)
+    motivos = []
+    if duracao_ms >= LIMITE_LENTO_MS:
+        motivos.append(f"acima de {LIMITE_LENTO_MS:.0f} ms")
+    if (
+        registro.operacao == "select"
+        and not registro.limitada
+        and not any(not f.startswith("order(") for f in registro.filtros)
+        and linhas >= LIMITE_LINHAS_TABELA_INTEIRA
+    ):
+        motivos.append("tabela inteira sem filtro")
+
+    consulta = {
+        "momento": datetime.now().isoformat(timespec="milliseconds"),
+        "pagina": _pagina.get(),
+        "tabela": registro.tabela,
+        "operacao": registro.operacao or "?",
+        "filtros": registro.filtros,
+        "linhas": linhas,
+        "bytes": _tamanho(resposta, dados) if dados is not None else 0,
+        "ms": round(duracao_ms, 1),
+        "lenta": bool(motivos),
+        "motivo": "; ".join(motivos),
+        "erro": erro,
+    }
+    with _lock:
+        _historico.append(consulta)
+        if CAMINHO_LOG:
+            _gravar(consulta)
+    if motivos:
+        logger.warning(
+            "Consulta lenta em %s: %s %s (%s linhas, %.0f ms) - %s",
+            consulta["pagina"], consulta["operacao"], consulta["tabela"],
+            linhas, duracao_ms, consulta["motivo"],
+        )
+
+
+def _gravar(consulta):
+    global _arquivo
+    try:
+        if _arquivo is None:
+            _arquivo = open(CAMINHO_LOG, "a", encoding="utf-8", buffering=1)
+        _arquivo.write(json.dumps(consulta, ensure_ascii=False) + "\n")
+    except Exception as e:
+        logger.warning("Erro ao gravar log de consultas: %s", e)
+
+
+def consultas_recentes(pagina=None, limite=None):
+    """
+    Consultas do histórico em memória, da mais recente para a mais antiga.
+    """
+    with _lock:
+        consultas = list(_historico)
+    consultas.reverse()
+    if pagina is not None:
+        consultas = [c for c in consultas if c["pagina"] == pagina]
+    return consultas[:limite] if limite else consultas
+
+
+def resumo_por_pagina():
+    """
+    Totais por página e tabela: consultas, linhas, bytes, tempo total e máximo, lentas.
+    """
+    resumo = {}
+    for c in consultas_recentes():
+        item = resumo.setdefault((c["pagina"], c["tabela"], c["operacao"]), {
+            "pagina": c["pagina"], "tabela": c["tabela"], "operacao": c["operacao"],
+            "consultas": 0, "linhas": 0, "bytes": 0, "ms_total": 0.0, "ms_max": 0.0, "lentas": 0,
+        })
+        item["consultas"] += 1
+        item["linhas"] += c["linhas"]
+        item["bytes"] += c["bytes"] or 0
+        item["ms_total"] = round(item["ms_total"] + c["ms"], 1)
+        item["ms_max"] = max(item["ms_max"], c["ms"])
+        item["lentas"] += c["lenta"]
+    return sorted(resumo.values(), key=lambda i: i["ms_total"], reverse=True)
+
+
+def limpar_historico():
+    with _lock:
+        _historico.clear()
+
+
+def painel_consultas(pagina=None):
+    """
+    Painel de depuração do Streamlit com as consultas registradas
+    (apenas da 'pagina' informada, ou o resumo de todas).
+    """
+    import pandas as pd
+    import streamlit as st
+
+    if pagina is not None:
+        consultas = consultas_recentes(pagina=pagina, limite=50)
+        with st.expander(f"Consultas ao banco ({len(consultas)} recentes desta página)"):
+            if consultas:
+                st.dataframe(pd.DataFrame(consultas))
+            else:
+                st.write("Nenhuma consulta registrada.")
+        return
+
+    resumo = resumo_por_pagina()
+    if not resumo:
+        st.write("Nenhuma consulta registrada.")
+        return
+    consultas = consultas_recentes()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Consultas", len(consultas))
+    col2.metric("Lentas", sum(c["lenta"] for c in consultas))
+    col3.metric("Tempo Total", f"{sum(c['ms'] for c in consultas) / 1000:.1f} s")
+    st.markdown("**Por página e tabela**")
+    st.dataframe(pd.DataFrame(resumo))
+    lentas = [c for c in consultas if c["lenta"]]
+    if lentas:
+        st.markdown("**Consultas lentas**")
+        st.dataframe(pd.DataFrame(lentas))
+    if st.button("Limpar Histórico de Consultas"):
+        limpar_historico()
+        st.success("Histórico limpo.")
@@ -1,14 +1,16 @@
 import streamlit as st
 import pandas as pd
-import base64
 import pytz
 from datetime import datetime
 from st_aggrid import AgGrid, GridOptionsBuilder
-import matplotlib.pyplot as plt
-from fpdf import FPDF
-import os
+import io
 
 from supabase_client import supabase
+import espelho
+from busca import IndiceBusca
+from graficos import grafico_barras, grafico_barras_agrupadas
+from relatorio_pdf import RelatorioPDF, linhas_dataframe
+from imagens import ImagemInvalida, ler_foto_antiga, ler_imagem, ler_miniatura, salvar_imagem
 from setores import get_setores_list
 from ubs import get_ubs_list
 
@@ -18,12 +20,38 @@ FORTALEZA_TZ = pytz.timezone("America/Fortaleza")
 # 1. Funções Básicas
 ###########################
 
+TAMANHO_PAGINA_INVENTARIO = 1000
+COLUNAS_INVENTARIO = "id,numero_patrimonio,tipo,marca,modelo,numero_serie,status,localizacao,propria_locada,setor,data_aquisicao,data_garantia_fim,imagem_hash"
+
+# Índice de busca do inventário, compartilhado pelas sessões do processo e
+# atualizado incrementalmente (só itens novos, editados ou excluídos) a cada listagem
+CAMPOS_BUSCA_INVENTARIO = ("numero_patrimonio", "marca", "modelo", "numero_serie", "tipo", "localizacao", "setor")
+INDICE_INVENTARIO = IndiceBusca(CAMPOS_BUSCA_INVENTARIO)
+
+def buscar_no_inventario(machines, texto):
+    """
+    Retorna os itens de 'machines' que contêm todos os termos de 'texto' em
+    algum dos CAMPOS_BUSCA_INVENTARIO (sem diferenciar maiúsculas nem acentos).
+    """
+    INDICE_INVENTARIO.sincronizar(machines)
+    ids = INDICE_INVENTARIO.buscar(texto)
+    return [m for m in machines if m["id"] in ids]
+
 def get_machines_from_inventory():
     try:
-        resp = supabase.table("inventario").select(
-            "id,numero_patrimonio,tipo,marca,modelo,numero_serie,status,localizacao,propria_locada,setor,data_aquisicao,data_garantia_fim"
-        ).execute()
-        return resp.data if resp.data else []
+        if espelho.disponivel("inventario"):
+            return espelho.consultar("inventario", COLUNAS_INVENTARIO)
+        # O PostgREST devolve no máximo TAMANHO_PAGINA_INVENTARIO linhas por requisição
+        machines, inicio = [], 0
+        while True:
+            resp = (
+                supabase.table("inventario").select(COLUNAS_INVENTARIO).order("id")
+                .range(inicio, inicio + TAMANHO_PAGINA_INVENTARIO - 1).execute()
+            )
+            machines.extend(resp.data or [])
+            if len(resp.data or []) < TAMANHO_PAGINA_INVENTARIO:
+                return machines
+            inicio += TAMANHO_PAGINA_INVENTARIO
     except Exception as e:
         st.error("Erro ao recuperar inventário.")
         print(f"Erro: {e}")
@@ -32,6 +60,7 @@ def get_machines_from_inventory():
 def edit_inventory_item(patrimonio, new_values):
     try:
         supabase.table("inventario").update(new_values).eq("numero_patrimonio", patrimonio).execute()
+        espelho.sincronizar_apos_escrita("inventario")
         st.success("Item atualizado com sucesso!")
     except Exception as e:
         st.error("Erro ao atualizar o item do inventário.")
@@ -40,7 +69,7 @@ def edit_inventory_item(patrimonio, new_values):
 def add_machine_to_inventory(
     tipo, marca, modelo, numero_serie, status, localizacao,
     propria_locada, patrimonio, setor,
-    data_aquisicao=None, data_garantia_fim=None
+    data_aquisicao=None, data_garantia_fim=None, imagem_hash=None
 ):
     try:
         resp = supabase.table("inventario").select("numero_patrimonio").eq("numero_patrimonio", patrimonio).execute()
@@ -59,8 +88,10 @@ def add_machine_to_inventory(
             "setor": setor,
             "data_aquisicao": data_aquisicao,
             "data_garantia_fim": data_garantia_fim,
+            "imagem_hash": imagem_hash,
         }
         supabase.table("inventario").insert(data).execute()
+        espelho.sincronizar_apos_escrita("inventario")
         st.success("Máquina adicionada ao inventário com sucesso!")
     except Exception as e:
         st.error("Erro ao adicionar máquina ao inventário.")
@@ -69,6 +100,7 @@ def add_machine_to_inventory(
 def delete_inventory_item(patrimonio):
     try:
         supabase.table("inventario").delete().eq("numero_patrimonio", patrimonio).execute()
+        espelho.sincronizar_apos_escrita("inventario")
         st.success("Item excluído com sucesso!")
     except Exception as e:
         st.error("Erro ao excluir item do inventário.")
@@ -92,6 +124,8 @@ def get_pecas_usadas_por_patrimonio(patrimonio):
         return []
     chamado_ids = [ch["id"] for ch in chamados if "id" in ch]
     try:
+        if espelho.disponivel("pecas_usadas"):
+            return espelho.consultar("pecas_usadas", filtros=[("chamado_id", "in", chamado_ids)])
         resp = supabase.table("pecas_usadas").select("*").in_("chamado_id", chamado_ids).execute()
         return resp.data if resp.data else []
     except Exception as e:
@@ -106,6 +140,8 @@ def get_pecas_usadas_por_patrimonio(patrimonio):
 
 def get_historico_manutencao_por_patrimonio(patrimonio):
     try:
+        if espelho.disponivel("historico_manutencao"):
+            return espelho.consultar("historico_manutencao", filtros=[("numero_patrimonio", "eq", patrimonio)])
         resp = supabase.table("historico_manutencao").select("*").eq("numero_patrimonio", patrimonio).execute()
         return resp.data if resp.data else []
     except Exception as e:
@@ -145,10 +181,16 @@ def cadastro_maquina():
     uploaded_file = st.file_uploader("Foto opcional da máquina", type=["png","jpg","jpeg"])
 
     if st.button("Cadastrar Máquina"):
-        image_data = None
+        imagem_hash = None
         if uploaded_file is not None:
-            file_content = uploaded_file.read()
-            image_data = base64.b64encode(file_content).decode("utf-8")
+            try:
+                imagem_hash = salvar_imagem(uploaded_file.getvalue())
+            except ImagemInvalida as e:
+                st.error(str(e))
+                return
+            except Exception as e:
+                st.error(f"Erro ao salvar a foto: {e}")
+                return
 
         try:
             add_machine_to_inventory(
@@ -161,6 +203,7 @@ def cadastro_maquina():
                 propria_locada=propria_locada,
                 patrimonio=patrimonio,
                 setor=setor,
+                imagem_hash=imagem_hash,
             )
         except Exception as e:
             st.error("Erro ao cadastrar máquina.")
@@ -192,12 +235,10 @@ def show_inventory_list():
         st.info("Nenhum item encontrado no inventário.")
         return
 
-    df = pd.DataFrame(machines)
-
     # Aplica filtros
     if filtro_texto:
-        filtro_lower = filtro_texto.lower()
-        df = df[df.apply(lambda row: filtro_lower in str(row).lower(), axis=1)]
+        machines = buscar_no_inventario(machines, filtro_texto)
+    df = pd.DataFrame(machines, columns=COLUNAS_INVENTARIO.split(","))
 
     if status_filtro != "Todos":
         df = df[df["status"] == status_filtro]
@@ -254,9 +295,21 @@ def show_inventory_list():
         item = df[df["numero_patrimonio"] == selected_patrimonio].fillna("").iloc[0]
 
         st.markdown("### Foto Atual da Máquina")
-        if item.get("image_data") not in [None, "", "null"]:
-            current_image = base64.b64decode(item["image_data"])
-            st.image(current_image, caption=f"Foto da máquina {selected_patrimonio}")
+        # Itens ainda não migrados (python -m imagens) têm a foto em image_data
+        foto_antiga = None if item.get("imagem_hash") else ler_foto_antiga(int(item["id"]))
+        if item.get("imagem_hash"):
+            # A listagem só traz o hash: a miniatura vem do cache e a foto
+            # original só é baixada quando pedida
+            if st.checkbox("Mostrar foto em tamanho original", key=f"foto_original_{selected_patrimonio}"):
+                foto = ler_imagem(item["imagem_hash"])
+            else:
+                foto = ler_miniatura(item["imagem_hash"])
+            if foto:
+                st.image(foto, caption=f"Foto da máquina {selected_patrimonio}")
+            else:
+                st.warning("Foto cadastrada, mas não encontrada no armazenamento.")
+        elif foto_antiga:
+            st.image(foto_antiga, caption=f"Foto da máquina {selected_patrimonio}")
         else:
             st.info("Nenhuma foto cadastrada para esta máquina.")
 
@@ -317,15 +370,21 @@ def show_inventory_list():
                         "propria_locada": propria_locada
                     }
 
+                    foto_ok = True
                     if remove_foto:
-                        new_values["image_data"] = None
+                        new_values["imagem_hash"] = None
+                        if foto_antiga:
+                            new_values["image_data"] = None
                     else:
                         if uploaded_file is not None:
-                            file_content = uploaded_file.read()
-                            encoded = base64.b64encode(file_content).decode("utf-8")
-                            new_values["image_data"] = encoded
+                            try:
+                                new_values["imagem_hash"] = salvar_imagem(uploaded_file.getvalue())
+                            except Exception as e:
+                                st.error(f"Erro ao salvar a foto: {e}")
+                                foto_ok = False
 
-                    edit_inventory_item(selected_patrimonio, new_values)
+                    if foto_ok:
+                        edit_inventory_item(selected_patrimonio, new_values)
 
         with st.expander("Excluir Máquina do Inventário"):
             if st.button("Excluir esta máquina"):
@@ -382,7 +441,7 @@ def dashboard_inventario():
     df = pd.DataFrame(data)
 
     from chamados import list_chamados
-    chamados = list_chamados() or []
+    chamados = list_chamados(colunas="patrimonio") or []
     df_chamados = pd.DataFrame(chamados)
 
     # 1) Distribuição por Status
@@ -393,12 +452,10 @@ def dashboard_inventario():
         st.markdown("### 1) Distribuição por Status")
         st.table(status_count)
 
-        fig, ax = plt.subplots()
-        ax.bar(status_count["status"], status_count["quantidade"], color="green")
-        ax.set_xlabel("Status")
-        ax.set_ylabel("Quantidade")
-        ax.set_title("Distribuição de Status no Inventário")
-        st.pyplot(fig)
+        st.image(grafico_barras(
+            status_count["status"], status_count["quantidade"], "Distribuição de Status no Inventário",
+            "Status", "Quantidade", cor="green",
+        ))
     else:
         st.warning("Coluna 'status' não encontrada no inventário.")
 
@@ -409,13 +466,10 @@ def dashboard_inventario():
         type_count.columns = ["tipo", "quantidade"]
         st.table(type_count)
 
-        fig2, ax2 = plt.subplots()
-        ax2.bar(type_count["tipo"], type_count["quantidade"], color="blue")
-        ax2.set_xlabel("Tipo de Equipamento")
-        ax2.set_ylabel("Quantidade")
-        ax2.set_title("Distribuição por Tipo de Equipamento")
-        plt.xticks(rotation=45)
-        st.pyplot(fig2)
+        st.image(grafico_barras(
+            type_count["tipo"], type_count["quantidade"], "Distribuição por Tipo de Equipamento",
+            "Tipo de Equipamento", "Quantidade", cor="blue", rotacao=45,
+        ))
     else:
         st.warning("Coluna 'tipo' não encontrada no inventário.")
 
@@ -432,13 +486,10 @@ def dashboard_inventario():
             st.markdown("#### Tabela por UBS e Tipo ")
             st.table(pivot_ubs)
 
-            fig3, ax3 = plt.subplots()
-            pivot_ubs.plot(kind="bar", ax=ax3, stacked=False)
-            ax3.set_xlabel("UBS (Localização)")
-            ax3.set_ylabel("Quantidade")
-            ax3.set_title("Computadores e Impressoras por UBS")
-            plt.xticks(rotation=45, ha="right")
-            st.pyplot(fig3)
+            st.image(grafico_barras_agrupadas(
+                pivot_ubs.index, {tipo: pivot_ubs[tipo] for tipo in pivot_ubs.columns},
+                "Computadores e Impressoras por UBS", "UBS (Localização)", "Quantidade", rotacao=45,
+            ))
     else:
         st.warning("Coluna 'localizacao' ou 'tipo' não encontrada no inventário.")
 
@@ -449,12 +500,10 @@ def dashboard_inventario():
         setor_count.columns = ["setor", "quantidade"]
         st.table(setor_count)
 
-        fig4, ax4 = plt.subplots()
-        ax4.barh(setor_count["setor"], setor_count["quantidade"], color="purple")
-        ax4.set_xlabel("Quantidade")
-        ax4.set_ylabel("Setor")
-        ax4.set_title("Distribuição por Setor")
-        st.pyplot(fig4)
+        st.image(grafico_barras(
+            setor_count["setor"], setor_count["quantidade"], "Distribuição por Setor",
+            "Quantidade", "Setor", cor="purple", horizontal=True,
+        ))
     else:
         st.warning("Coluna 'setor' não encontrada no inventário.")
 
@@ -472,107 +521,52 @@ def dashboard_inventario():
 
         st.dataframe(top_10[["numero_patrimonio", "tipo", "marca", "modelo", "qtd_chamados"]])
 
-        fig5, ax5 = plt.subplots()
-        ax5.barh(top_10["numero_patrimonio"].astype(str), top_10["qtd_chamados"], color="red")
-        ax5.set_xlabel("Quantidade de Chamados")
-        ax5.set_ylabel("Patrimônio")
-        ax5.set_title("Top 10 Máquinas com Mais Chamados")
-        ax5.invert_yaxis()
-        st.pyplot(fig5)
+        st.image(grafico_barras(
+            top_10["numero_patrimonio"], top_10["qtd_chamados"], "Top 10 Máquinas com Mais Chamados",
+            "Quantidade de Chamados", "Patrimônio", cor="red", horizontal=True,
+        ))
 
 
 ###########################
 # 7. Geração de Relatório em PDF (com logo + gráficos)
 ###########################
 
-class PDF(FPDF):
-    def __init__(self, orientation="L", unit="mm", format="A4", logo_path="infocustec.png"):
-        super().__init__(orientation, unit, format)
-        self.logo_path = logo_path
-
-    def header(self):
-        # Tenta inserir logotipo no canto esquerdo, se existir
-        if os.path.exists(self.logo_path):
-            self.image(self.logo_path, x=10, y=8, w=30)
-            self.set_xy(45, 10)
-        else:
-            self.set_xy(10, 10)
-
-        self.set_font("Arial", "B", 14)
-        self.cell(0, 10, "Relatório de Inventário", ln=True, align="L")
-        self.ln(5)
-
-    def footer(self):
-        self.set_y(-15)
-        self.set_font("Arial", "I", 10)
-        self.cell(0, 10, f"Página {self.page_no()}", 0, 0, "C")
+# Colunas do relatório de inventário: (campo, rótulo, largura relativa)
+COLUNAS_RELATORIO_INVENTARIO = [
+    ("numero_patrimonio", "Patrimônio", 1),
+    ("tipo", "Tipo", 1),
+    ("marca", "Marca", 1),
+    ("modelo", "Modelo", 1.3),
+    ("status", "Status", 1),
+    ("localizacao", "Localização", 1.3),
+    ("setor", "Setor", 1.2),
+]
 
 
 def gerar_relatorio_inventario_pdf(df_inventario):
     """
     Gera um PDF com:
-      - Logotipo no header (se existir 'logo.png')
-      - Tabela do inventário (colunas mais largas para caber melhor)
-      - Exemplo de salvamento de um gráfico
+      - Logotipo e título no topo de cada página
+      - Tabela do inventário, desenhada linha a linha (relatorio_pdf)
+      - Gráfico da distribuição do status
     """
 
     # Modo Paisagem (L) para dar mais espaço e evitar sobreposição
-    pdf = PDF(orientation="L", format="A4", logo_path="infocustec.png")
-    pdf.add_page()
-    pdf.set_font("Arial", "", 10)
-
-    # Ajusta as colunas
-    columns = ["numero_patrimonio", "tipo", "marca", "modelo", "status", "localizacao", "setor"]
-    headers = ["Patrimônio", "Tipo", "Marca", "Modelo", "Status", "Localização", "Setor"]
-    col_widths = [40, 40, 40, 40, 40, 40, 40]  # Ajuste conforme necessidade
-
-    # Cabeçalho da tabela
-    for i, header_text in enumerate(headers):
-        pdf.cell(col_widths[i], 8, header_text, border=1, ln=0, align="C")
-    pdf.ln(8)
-
-    # Linhas
-    for _, row in df_inventario.iterrows():
-        pdf.cell(col_widths[0], 8, str(row["numero_patrimonio"]), border=1, ln=0)
-        pdf.cell(col_widths[1], 8, str(row["tipo"]), border=1, ln=0)
-        pdf.cell(col_widths[2], 8, str(row["marca"]), border=1, ln=0)
-        pdf.cell(col_widths[3], 8, str(row["modelo"]), border=1, ln=0)
-        pdf.cell(col_widths[4], 8, str(row["status"]), border=1, ln=0)
-        pdf.cell(col_widths[5], 8, str(row["localizacao"]), border=1, ln=0)
-        pdf.cell(col_widths[6], 8, str(row["setor"]), border=1, ln=0)
-        pdf.ln(8)
-
-    # (Opcional) Exemplo: inserir gráfico de distribuição do status
-    # 1) Cria um plot no matplotlib
+    pdf = RelatorioPDF("Relatório de Inventário", orientacao="L")
+    pdf.tabela(
+        COLUNAS_RELATORIO_INVENTARIO,
+        linhas_dataframe(df_inventario, [coluna[0] for coluna in COLUNAS_RELATORIO_INVENTARIO]),
+    )
+
+    # Gráfico da distribuição do status, renderizado em memória (e em cache)
     try:
-        status_count = df_inventario["status"].value_counts().reset_index()
-        fig, ax = plt.subplots(figsize=(4, 3))
-        ax.bar(status_count["index"], status_count["status"])
-        ax.set_title("Distribuição de Status")
-        # 2) Salva em arquivo temporário
-        temp_chart = "chart_temp.png"
-        plt.savefig(temp_chart, dpi=100)
-        plt.close(fig)
-        # 3) Insere no PDF
+        status_count = df_inventario["status"].value_counts()
+        grafico = grafico_barras(
+            status_count.index, status_count.values, "Distribuição de Status", tamanho=(4, 3)
+        )
         pdf.add_page()  # nova página para o gráfico
-        pdf.set_xy(10, 20)
-        pdf.image(temp_chart, x=10, y=20, w=120)
-        # 4) Remove o arquivo temporário
-        if os.path.exists(temp_chart):
-            os.remove(temp_chart)
+        pdf.image(io.BytesIO(grafico), x=10, y=30, w=120)
     except Exception as e:
         print("Erro ao gerar gráfico de status:", e)
 
-    # pdf.output(dest="S") pode retornar str, bytes ou bytearray
-    pdf_stream = pdf.output(dest="S")
-
-    if hasattr(pdf_stream, "getvalue"):
-        pdf_stream = pdf_stream.getvalue()
-    if isinstance(pdf_stream, str):
-        pdf_stream = pdf_stream.encode("latin-1")
-    if isinstance(pdf_stream, bytearray):
-        pdf_stream = bytes(pdf_stream)
-    if not isinstance(pdf_stream, (bytes, bytearray)):
-        pdf_stream = bytes(pdf_stream)
-
-    return pdf_stream
+    return pdf.saida()
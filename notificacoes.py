@@ -0,0 +1,285 @@
+# notificacoes.py
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Fila persistente das notificações de WhatsApp (sobrevive a reinícios do app)
+CAMINHO_FILA = os.getenv("NOTIFICACOES_PATH", "notificacoes.db")
+MAX_TENTATIVAS = int(os.getenv("NOTIFICACOES_MAX_TENTATIVAS", "6"))
+ESPERA_BASE = float(os.getenv("NOTIFICACOES_ESPERA_BASE_SEGUNDOS", "2"))
+ENVIOS_SIMULTANEOS = int(os.getenv("NOTIFICACOES_ENVIOS_SIMULTANEOS", "8"))
+# Prazo da reserva de uma mensagem em envio: depois dele, se o processo que a
+# reservou não registrou o resultado (parou no meio), outro processo a reenvia
+PRAZO_RESERVA = float(os.getenv("NOTIFICACOES_PRAZO_RESERVA_SEGUNDOS", "300"))
+TAMANHO_LOTE = 50
+
+
+###########################
+# Transportes
+###########################
+
+class TransporteTwilio:
+    """
+    Envia mensagens pelo Twilio reutilizando um único Client (e sua conexão HTTP).
+    """
+
+    def __init__(self, account_sid, auth_token, remetente):
+        from twilio.rest import Client
+
+        self.client = Client(account_sid, auth_token)
+        self.remetente = remetente
+
+    def enviar(self, destino, corpo):
+        self.client.messages.create(body=corpo, from_=self.remetente, to=destino)
+
+
+class TransporteMemoria:
+    """
+    Transporte de teste: guarda as mensagens em memória em vez de chamar o Twilio.
+    'falhas' indica quantas chamadas iniciais devem falhar (para exercitar as retentativas).
+    """
+
+    def __init__(self, falhas=0):
+        self.enviadas = []
+        self.falhas = falhas
+        self._lock = threading.Lock()
+
+    def enviar(self, destino, corpo):
+        with self._lock:
+            if self.falhas > 0:
+                self.falhas -= 1
+                raise RuntimeError("Falha simulada de envio")
+            self.enviadas.append((destino, corpo))
+
+
+def transporte_do_ambiente():
+    """
+    Cria o transporte Twilio a partir das variáveis de ambiente, ou None se
+    TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN ou TWILIO_WHATSAPP_NUMBER faltarem.
+    """
+    account_sid = os.getenv("TWILIO_ACCOUNT_SID")
+    auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+    remetente = os.getenv("TWILIO_WHATSAPP_NUMBER")
+    if not all([account_sid, auth_token, remetente]):
+        return None
+    return TransporteTwilio(account_sid, auth_token, remetente)
+
+
+def destinos_tecnicos():
+    """
+    Números da variável TECHNICIAN_WHATSAPP_NUMBER (separados por vírgula),
+    no formato "whatsapp:+...".
+    """
+    numeros = os.getenv("TECHNICIAN_WHATSAPP_NUMBER", "")
+    return [
+        n if n.startswith("whatsapp:") else f"whatsapp:{n}"
+        for n in (num.strip() for num in numeros.split(","))
+        if n
+    ]
+
+
+###########################
+# Fila persistente
+###########################
+
+_local = threading.local()
+_transporte = None
+_lock_transporte = threading.Lock()
+_lock_worker = threading.Lock()
+_worker = None
+_acordar = threading.Event()
+
+
+def _conexao():
+    con = getattr(_local, "con", None)
+    if con is None:
+        con = sqlite3.connect(CAMINHO_FILA, timeout=30)
+        con.execute("pragma journal_mode=wal")
+        with con:
+            con.execute(
+                "create table if not exists fila ("
+                " id integer primary key autoincrement,"
+                " destino text not null,"
+                " corpo text not null,"
+                " status text not null default 'pendente',"
+                " tentativas integer not null default 0,"
+                " proxima_tentativa real not null,"
+                " erro text,"
+                " criado_em real not null,"
+                " reservado_ate real)"
+            )
+            colunas = {linha[1] for linha in con.execute("pragma table_info(fila)")}
+            if "reservado_ate" not in colunas:
+                # Filas criadas antes da reserva com prazo
+                con.execute("alter table fila add column reservado_ate real")
+            con.execute("create index if not exists fila_pendentes on fila (status, proxima_tentativa)")
+        _local.con = con
+    return con
+
+
+def configurar_transporte(transporte):
+    """
+    Define o transporte usado pelo worker (ex.: TransporteMemoria em testes).
+    """
+    global _transporte
+    with _lock_transporte:
+        _transporte = transporte
+
+
+def _obter_transporte():
+    global _transporte
+    with _lock_transporte:
+        if _transporte is None:
+            _transporte = transporte_do_ambiente()
+        return _transporte
+
+
+def enfileirar(corpo, destinos):
+    """
+    Grava uma mensagem por destino na fila e acorda o worker.
+    Retorna a quantidade de mensagens enfileiradas.
+    """
+    agora = time.time()
+    con = _conexao()
+    with con:
+        con.executemany(
+            "insert into fila (destino, corpo, proxima_tentativa, criado_em) values (?, ?, ?, ?)",
+            [(destino, corpo, agora, agora) for destino in destinos],
+        )
+    iniciar_worker()
+    _acordar.set()
+    return len(destinos)
+
+
+def enfileirar_whatsapp_tecnicos(corpo):
+    """
+    Enfileira 'corpo' para todos os técnicos de TECHNICIAN_WHATSAPP_NUMBER.
+    Retorna a quantidade enfileirada (0 se não houver números configurados).
+    """
+    destinos = destinos_tecnicos()
+    if not destinos:
+        return 0
+    return enfileirar(corpo, destinos)
+
+
+def _reservar_lote(con):
+    """
+    Marca como 'enviando', com reserva válida por PRAZO_RESERVA segundos, até
+    TAMANHO_LOTE mensagens vencidas e as retorna. Também retoma as mensagens
+    'enviando' cuja reserva expirou (processo parado durante o envio); as
+    reservadas por outro processo ainda em andamento não são tocadas.
+    A transação imediata impede que outro processo reserve as mesmas mensagens.
+    """
+    agora = time.time()
+    con.execute("begin immediate")
+    try:
+        linhas = con.execute(
+            "select id, destino, corpo, tentativas from fila"
+            " where (status = 'pendente' and proxima_tentativa <= ?)"
+            " or (status = 'enviando' and coalesce(reservado_ate, 0) <= ?)"
+            " order by proxima_tentativa limit ?",
+            (agora, agora, TAMANHO_LOTE),
+        ).fetchall()
+        con.executemany(
+            "update fila set status = 'enviando', reservado_ate = ? where id = ?",
+            [(agora + PRAZO_RESERVA, l[0]) for l in linhas],
+        )
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    return linhas
+
+
+def processar_pendentes(transporte=None):
+    """
+    Envia, em paralelo, as mensagens vencidas da fila. Falhas são reagendadas
+    com espera exponencial (com variação aleatória) até MAX_TENTATIVAS.
+    Retorna (enviadas, reagendadas).
+    """
+    transporte = transporte or _obter_transporte()
+    if transporte is None:
+        logger.error("Variáveis de ambiente do Twilio não configuradas corretamente.")
+        return 0, 0
+    con = _conexao()
+    enviadas = reagendadas = 0
+    with ThreadPoolExecutor(max_workers=ENVIOS_SIMULTANEOS) as executor:
+        while True:
+            lote = _reservar_lote(con)
+            if not lote:
+                break
+            futuros = [executor.submit(transporte.enviar, destino, corpo) for _, destino, corpo, _ in lote]
+            for (id_msg, destino, _, tentativas), futuro in zip(lote, futuros):
+                try:
+                    futuro.result()
+                    with con:
+                        con.execute("update fila set status = 'enviada', erro = null where id = ?", (id_msg,))
+                    enviadas += 1
+                except Exception as e:
+                    tentativas += 1
+                    status = "pendente" if tentativas < MAX_TENTATIVAS else "falhou"
+                    espera = ESPERA_BASE * (2 ** (tentativas - 1)) * random.uniform(0.5, 1.5)
+                    with con:
+                        con.execute(
+                            "update fila set status = ?, tentativas = ?, proxima_tentativa = ?, erro = ? where id = ?",
+                            (status, tentativas, time.time() + espera, str(e), id_msg),
+                        )
+                    logger.warning("Erro ao enviar mensagem para %s (tentativa %s): %s", destino, tentativas, e)
+                    reagendadas += 1
+    return enviadas, reagendadas
+
+
+def _proxima_espera(con):
+    linha = con.execute(
+        "select min(case when status = 'pendente' then proxima_tentativa"
+        " else coalesce(reservado_ate, 0) end)"
+        " from fila where status in ('pendente', 'enviando')"
+    ).fetchone()
+    if not linha or linha[0] is None:
+        return None
+    return max(0.0, linha[0] - time.time())
+
+
+def _laco_worker():
+    # Mensagens que estavam sendo enviadas quando um processo parou são
+    # retomadas por _reservar_lote quando a reserva delas expira
+    con = _conexao()
+    while True:
+        _acordar.clear()
+        try:
+            if _obter_transporte() is None:
+                logger.error("Variáveis de ambiente do Twilio não configuradas corretamente.")
+                espera = 60
+            else:
+                processar_pendentes()
+                espera = _proxima_espera(con)
+        except Exception as e:
+            logger.warning("Erro no worker de notificações: %s", e)
+            espera = ESPERA_BASE
+        _acordar.wait(timeout=espera if espera is not None else 60)
+
+
+def iniciar_worker():
+    """
+    Inicia (uma única vez por processo) a thread que esvazia a fila.
+    """
+    global _worker
+    with _lock_worker:
+        if _worker is not None and _worker.is_alive():
+            return
+        _worker = threading.Thread(target=_laco_worker, name="notificacoes", daemon=True)
+        _worker.start()
+
+
+def estatisticas_fila():
+    """
+    Quantidade de mensagens por status na fila.
+    """
+    linhas = _conexao().execute("select status, count(*) from fila group by status").fetchall()
+    return dict(linhas)
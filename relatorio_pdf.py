@@ -0,0 +1,297 @@
+# relatorio_pdf.py
+import functools
+import logging
+import os
+import threading
+
+from fpdf import FPDF
+
+logger = logging.getLogger(__name__)
+# O fontTools registra em INFO cada tabela da fonte ao gerar o subconjunto
+logging.getLogger("fontTools").setLevel(logging.WARNING)
+
+# Motor dos relatórios em PDF: as linhas chegam de um iterável (gerador de
+# dicionários ou tuplas) e são desenhadas uma a uma em uma tabela, com o
+# cabeçalho repetido em cada página. Nenhuma lista ou DataFrame com todas as
+# linhas é montado, e a largura de cada texto vem de uma tabela de métricas
+# por caractere calculada uma única vez por fonte e tamanho.
+
+# Pasta com as fontes DejaVu (padrão: as que acompanham o matplotlib)
+FONTES_DIR = os.getenv("RELATORIO_FONTES_DIR", "")
+LOGO = os.getenv("RELATORIO_LOGO", "infocustec.png")
+# Máximo de linhas de texto de uma célula (o restante é cortado com "…")
+MAX_LINHAS_CELULA = int(os.getenv("RELATORIO_MAX_LINHAS_CELULA", "4"))
+
+TAMANHO_FONTE = 8
+ALTURA_LINHA_TEXTO = 3.6  # mm por linha de texto em uma célula
+RECUO_CELULA = 1.0        # mm entre a borda e o texto
+FAMILIA = "DejaVu"
+
+
+@functools.lru_cache(maxsize=1)
+def _arquivos_fonte():
+    """
+    Caminhos (normal, negrito) da DejaVu Sans, ou None se não forem encontrados
+    (os relatórios usam então a Helvetica, sem os caracteres fora do latin-1).
+    """
+    pasta = FONTES_DIR
+    if not pasta:
+        try:
+            import matplotlib
+            pasta = os.path.join(matplotlib.get_data_path(), "fonts", "ttf")
+        except ImportError:
+            return None
+    normal = os.path.join(pasta, "DejaVuSans.ttf")
+    negrito = os.path.join(pasta, "DejaVuSans-Bold.ttf")
+    if os.path.exists(normal) and os.path.exists(negrito):
+        return normal, negrito
+    logger.warning("Fontes DejaVu não encontradas em %s: usando Helvetica", pasta)
+    return None
+
+
+class _Metricas:
+    """
+    Larguras (mm) dos caracteres de uma fonte em um tamanho, lidas da tabela
+    de larguras da própria fonte (não da fonte "atual" de um documento) e
+    guardadas: medir um texto vira uma soma de consultas ao dicionário.
+    """
+
+    def __init__(self, fonte, tamanho_pt, escala):
+        # TTF: larguras por código do caractere; fontes padrão: pelo caractere
+        self._tabela_fonte = fonte.cw
+        self._por_codigo = fonte.type == "TTF"
+        self._fator = tamanho_pt * 0.001 / escala
+        self._larguras = {}
+
+    def _largura_caractere(self, caractere):
+        if self._por_codigo:
+            unidades = self._tabela_fonte[ord(caractere)]
+        else:
+            unidades = self._tabela_fonte.get(caractere, self._tabela_fonte["?"])
+        largura = self._larguras[caractere] = unidades * self._fator
+        return largura
+
+    def largura(self, texto):
+        larguras = self._larguras
+        total = 0.0
+        for caractere in texto:
+            largura = larguras.get(caractere)
+            if largura is None:
+                largura = self._largura_caractere(caractere)
+            total += largura
+        return total
+
+
+# Métricas compartilhadas entre relatórios: (família, estilo, tamanho) -> _Metricas.
+# Dependem só do arquivo da fonte, igual em todos os documentos.
+_metricas = {}
+_lock_metricas = threading.Lock()
+
+
+def _quebrar_palavra(palavra, largura, metricas):
+    pedacos, atual = [], ""
+    for caractere in palavra:
+        if atual and metricas.largura(atual + caractere) > largura:
+            pedacos.append(atual)
+            atual = caractere
+        else:
+            atual += caractere
+    return pedacos + [atual]
+
+
+def quebrar_texto(texto, largura, metricas, max_linhas=MAX_LINHAS_CELULA, reticencias="…"):
+    """
+    Divide 'texto' em linhas que cabem em 'largura' (mm), quebrando entre
+    palavras (ou dentro de palavras maiores que a linha). Acima de
+    'max_linhas', a última linha termina em 'reticencias'.
+    """
+    if metricas.largura(texto) <= largura and "\n" not in texto:
+        return [texto]
+    espaco = metricas.largura(" ")
+    linhas = []
+    for paragrafo in texto.split("\n"):
+        atual, largura_atual = "", 0.0
+        for palavra in paragrafo.split():
+            largura_palavra = metricas.largura(palavra)
+            if largura_palavra > largura:
+                pedacos = _quebrar_palavra(palavra, largura, metricas)
+                if atual:
+                    linhas.append(atual)
+                linhas.extend(pedacos[:-1])
+                atual, largura_atual = pedacos[-1], metricas.largura(pedacos[-1])
+            elif not atual:
+                atual, largura_atual = palavra, largura_palavra
+            elif largura_atual + espaco + largura_palavra <= largura:
+                atual += " " + palavra
+                largura_atual += espaco + largura_palavra
+            else:
+                linhas.append(atual)
+                atual, largura_atual = palavra, largura_palavra
+            if len(linhas) > max_linhas:
+                break
+        linhas.append(atual)
+        if len(linhas) > max_linhas:
+            break
+    if len(linhas) > max_linhas:
+        linhas = linhas[:max_linhas]
+        ultima = linhas[-1]
+        while ultima and metricas.largura(ultima + reticencias) > largura:
+            ultima = ultima[:-1]
+        linhas[-1] = ultima + reticencias
+    return linhas
+
+
+class RelatorioPDF(FPDF):
+    """
+    Documento com o logotipo e o título no topo e o número da página no
+    rodapé de cada página. tabela() desenha as linhas de um iterável em uma
+    tabela paginada; saida() retorna os bytes do PDF.
+    """
+
+    def __init__(self, titulo, orientacao="L", logo=LOGO):
+        super().__init__(orientation=orientacao, unit="mm", format="A4")
+        self.titulo = titulo
+        self.logo = logo if logo and os.path.exists(logo) else None
+        self.set_auto_page_break(False, margin=15)
+        self.set_margins(10, 10, 10)
+        fontes = _arquivos_fonte()
+        if fontes:
+            self.add_font(FAMILIA, "", fontes[0])
+            self.add_font(FAMILIA, "B", fontes[1])
+            self.familia = FAMILIA
+            self.reticencias = "…"
+        else:
+            self.familia = "Helvetica"
+            # "…" não existe no latin-1 das fontes padrão
+            self.reticencias = "..."
+        self._cabecalho_tabela = None
+
+    def texto(self, valor):
+        """
+        Converte 'valor' em texto para o PDF (vazio para None/NaN). Sem as
+        fontes DejaVu, troca os caracteres fora do latin-1.
+        """
+        if valor is None or valor != valor:
+            return ""
+        if isinstance(valor, float) and valor.is_integer():
+            # Colunas inteiras com vazios viram float no pandas (protocolo 12.0)
+            valor = int(valor)
+        texto = str(valor)
+        if self.familia != FAMILIA:
+            texto = texto.encode("latin-1", "replace").decode("latin-1")
+        return texto
+
+    def metricas(self, estilo=""):
+        """
+        Métricas da fonte do relatório no 'estilo' e em TAMANHO_FONTE.
+        """
+        chave = (self.familia, estilo, TAMANHO_FONTE)
+        metricas = _metricas.get(chave)
+        if metricas is None:
+            fonte = self.fonts.get(self.familia.lower() + estilo)
+            if fonte is None:
+                # Fontes padrão só são carregadas no primeiro set_font()
+                familia, estilo_atual, tamanho = self.font_family, self.font_style, self.font_size_pt
+                self.set_font(self.familia, estilo, TAMANHO_FONTE)
+                fonte = self.current_font
+                if familia:
+                    self.set_font(familia, estilo_atual, tamanho)
+            with _lock_metricas:
+                metricas = _metricas.setdefault(chave, _Metricas(fonte, TAMANHO_FONTE, self.k))
+        return metricas
+
+    def header(self):
+        if self.logo:
+            self.image(self.logo, x=10, y=8, w=30)
+            self.set_xy(45, 10)
+        else:
+            self.set_xy(10, 10)
+        self.set_font(self.familia, "B", 14)
+        self.cell(0, 10, self.texto(self.titulo), new_x="LMARGIN", new_y="NEXT")
+        self.set_y(max(self.get_y(), 25))
+        if self._cabecalho_tabela:
+            self._desenhar_cabecalho(*self._cabecalho_tabela)
+
+    def footer(self):
+        self.set_y(-12)
+        self.set_font(self.familia, "", 8)
+        self.cell(0, 8, f"Página {self.page_no()}", align="C")
+
+    def _larguras(self, colunas):
+        larguras = [coluna[2] for coluna in colunas]
+        disponivel = self.w - self.l_margin - self.r_margin
+        fator = disponivel / sum(larguras)
+        return [largura * fator for largura in larguras]
+
+    def _desenhar_linha(self, textos, larguras, estilo, preenchimento=False):
+        """
+        Desenha uma linha da tabela na posição atual e avança o cursor.
+        Quebra a página antes, se a linha não couber.
+        """
+        metricas = self.metricas(estilo)
+        celulas = [
+            quebrar_texto(texto, largura - 2 * RECUO_CELULA, metricas, reticencias=self.reticencias)
+            for texto, largura in zip(textos, larguras)
+        ]
+        altura = max(len(linhas) for linhas in celulas) * ALTURA_LINHA_TEXTO + 2 * RECUO_CELULA
+        if self.get_y() + altura > self.page_break_trigger:
+            self.add_page()
+            self.set_font(self.familia, estilo, TAMANHO_FONTE)
+        x, y = self.l_margin, self.get_y()
+        for linhas, largura in zip(celulas, larguras):
+            self.rect(x, y, largura, altura, style="DF" if preenchimento else "D")
+            base = y + RECUO_CELULA + ALTURA_LINHA_TEXTO * 0.75
+            for numero, linha in enumerate(linhas):
+                if linha:
+                    self.text(x + RECUO_CELULA, base + numero * ALTURA_LINHA_TEXTO, linha)
+            x += largura
+        self.set_y(y + altura)
+
+    def _desenhar_cabecalho(self, rotulos, larguras):
+        self.set_font(self.familia, "B", TAMANHO_FONTE)
+        self.set_fill_color(220, 220, 220)
+        self._desenhar_linha(rotulos, larguras, "B", preenchimento=True)
+        self.set_font(self.familia, "", TAMANHO_FONTE)
+
+    def tabela(self, colunas, linhas):
+        """
+        Desenha uma tabela a partir de um iterável, consumido uma linha por vez.
+        'colunas' é uma lista de (campo, rótulo, largura relativa); cada item
+        de 'linhas' é um dicionário (lido pelos campos) ou uma sequência na
+        ordem das colunas. O cabeçalho se repete em cada página e textos longos
+        quebram em até MAX_LINHAS_CELULA linhas. Retorna o número de linhas.
+        """
+        larguras = self._larguras(colunas)
+        campos = [coluna[0] for coluna in colunas]
+        rotulos = [self.texto(coluna[1]) for coluna in colunas]
+        if self.page == 0:
+            self.add_page()
+        self._desenhar_cabecalho(rotulos, larguras)
+        self._cabecalho_tabela = (rotulos, larguras)
+        total = 0
+        try:
+            for linha in linhas:
+                if isinstance(linha, dict):
+                    linha = [linha.get(campo) for campo in campos]
+                self._desenhar_linha([self.texto(valor) for valor in linha], larguras, "")
+                total += 1
+        finally:
+            self._cabecalho_tabela = None
+        return total
+
+    def saida(self):
+        """
+        Bytes do PDF (pdf.output() retorna bytearray no fpdf2).
+        """
+        return bytes(self.output())
+
+
+def linhas_dataframe(df, campos):
+    """
+    Gera as linhas de 'df' como tuplas na ordem de 'campos' (colunas
+    ausentes ficam vazias), sem copiar o DataFrame nem usar iterrows().
+    """
+    presentes = [campo for campo in campos if campo in df.columns]
+    posicoes = [presentes.index(campo) if campo in presentes else None for campo in campos]
+    for valores in df[presentes].itertuples(index=False, name=None):
+        yield [valores[posicao] if posicao is not None else None for posicao in posicoes]
@@ -0,0 +1,136 @@
+# senhas.py
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+# O bcrypt libera o GIL durante o cálculo: as threads do pool usam outros
+# núcleos enquanto a thread do script do Streamlit fica livre para as demais sessões.
+CONCORRENCIA = int(os.getenv("SENHAS_CONCORRENCIA", str(min(4, os.cpu_count() or 1))))
+# Máximo de operações aguardando na fila além das que estão em execução
+FILA_MAXIMA = int(os.getenv("SENHAS_FILA_MAXIMA", "64"))
+# Tempo máximo de espera por uma vaga na fila antes de desistir
+ESPERA_MAXIMA = float(os.getenv("SENHAS_ESPERA_MAXIMA_SEGUNDOS", "30"))
+
+_executor = None
+_lock = threading.Lock()
+_vagas = threading.BoundedSemaphore(CONCORRENCIA + FILA_MAXIMA)
+
+_metricas = {
+    "operacoes": 0,
+    "rejeitadas": 0,
+    "em_andamento": 0,
+    "espera_total_s": 0.0,
+    "espera_maxima_s": 0.0,
+    "execucao_total_s": 0.0,
+}
+
+
+class FilaSenhasCheia(Exception):
+    """
+    Levantada quando a fila do pool de senhas não libera vaga em ESPERA_MAXIMA segundos.
+    """
+
+
+def _obter_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=CONCORRENCIA, thread_name_prefix="senhas")
+    return _executor
+
+
+def _executar_medido(funcao, enfileirado_em, *args):
+    inicio = time.perf_counter()
+    try:
+        return funcao(*args)
+    finally:
+        fim = time.perf_counter()
+        espera = inicio - enfileirado_em
+        with _lock:
+            _metricas["operacoes"] += 1
+            _metricas["em_andamento"] -= 1
+            _metricas["espera_total_s"] += espera
+            _metricas["espera_maxima_s"] = max(_metricas["espera_maxima_s"], espera)
+            _metricas["execucao_total_s"] += fim - inicio
+        _vagas.release()
+
+
+def _enviar(funcao, *args):
+    """
+    Coloca 'funcao(*args)' no pool e retorna o Future. Bloqueia enquanto a
+    fila estiver cheia, até ESPERA_MAXIMA segundos.
+    """
+    if not _vagas.acquire(timeout=ESPERA_MAXIMA):
+        with _lock:
+            _metricas["rejeitadas"] += 1
+        logger.warning("Fila de senhas cheia: operação rejeitada após %.0f s", ESPERA_MAXIMA)
+        raise FilaSenhasCheia("Servidor ocupado processando senhas. Tente novamente.")
+    with _lock:
+        _metricas["em_andamento"] += 1
+    try:
+        return _obter_executor().submit(_executar_medido, funcao, time.perf_counter(), *args)
+    except Exception:
+        with _lock:
+            _metricas["em_andamento"] -= 1
+        _vagas.release()
+        raise
+
+
+def _gerar_hash(senha):
+    return bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def _verificar(senha, armazenado):
+    if isinstance(armazenado, str):
+        armazenado = armazenado.encode('utf-8')
+    return bcrypt.checkpw(senha.encode('utf-8'), armazenado)
+
+
+def gerar_hash(senha):
+    """
+    Retorna o hash bcrypt (string) de 'senha', calculado no pool de senhas.
+    """
+    return _enviar(_gerar_hash, senha).result()
+
+
+def verificar_senha(senha, armazenado):
+    """
+    Retorna True se 'senha' confere com o hash bcrypt 'armazenado' (str ou bytes).
+    """
+    return _enviar(_verificar, senha, armazenado).result()
+
+
+def gerar_hashes(senhas):
+    """
+    Calcula em paralelo os hashes de uma lista de senhas (importação de
+    usuários em lote). Retorna os hashes na mesma ordem.
+    """
+    futuros = [_enviar(_gerar_hash, senha) for senha in senhas]
+    return [futuro.result() for futuro in futuros]
+
+
+def estatisticas_senhas():
+    """
+    Retorna um dicionário com as operações concluídas e rejeitadas, as em
+    andamento (executando ou na fila) e os tempos médios de fila e de execução.
+    """
+    with _lock:
+        metricas = dict(_metricas)
+    operacoes = metricas["operacoes"]
+    return {
+        "concorrencia": CONCORRENCIA,
+        "fila_maxima": FILA_MAXIMA,
+        "operacoes": operacoes,
+        "rejeitadas": metricas["rejeitadas"],
+        "em_andamento": metricas["em_andamento"],
+        "espera_media_s": round(metricas["espera_total_s"] / operacoes, 4) if operacoes else 0.0,
+        "espera_maxima_s": round(metricas["espera_maxima_s"], 4),
+        "execucao_media_s": round(metricas["execucao_total_s"] / operacoes, 4) if operacoes else 0.0,
+    }
@@ -1,11 +1,15 @@
 # setores.py
 import streamlit as st
 from supabase_client import supabase
+from cache_dados import CACHE_REFERENCIA
+
+def _carregar_setores():
+    resp = supabase.table("setores").select("nome_setor").execute()
+    return [s["nome_setor"] for s in resp.data] if resp.data else []
 
 def get_setores_list():
     try:
-        resp = supabase.table("setores").select("nome_setor").execute()
-        return [s["nome_setor"] for s in resp.data] if resp.data else []
+        return CACHE_REFERENCIA.obter("setores", _carregar_setores)
     except Exception as e:
         st.error("Erro ao recuperar setores.")
         print(f"Erro: {e}")
@@ -15,6 +19,7 @@ def add_setor(nome_setor):
     try:
         # Tenta inserir; se já existir, ignora
         supabase.table("setores").insert({"nome_setor": nome_setor}).execute()
+        CACHE_REFERENCIA.invalidar("setores")
         return True
     except Exception as e:
         print(f"Erro ao adicionar setor: {e}")
@@ -23,6 +28,7 @@ def add_setor(nome_setor):
 def remove_setor(nome_setor):
     try:
         supabase.table("setores").delete().eq("nome_setor", nome_setor).execute()
+        CACHE_REFERENCIA.invalidar("setores")
         return True
     except Exception as e:
         print(f"Erro ao remover setor: {e}")
@@ -31,6 +37,7 @@ def remove_setor(nome_setor):
 def update_setor(old_name, new_name):
     try:
         supabase.table("setores").update({"nome_setor": new_name}).eq("nome_setor", old_name).execute()
+        CACHE_REFERENCIA.invalidar("setores")
         return True
     except Exception as e:
         print(f"Erro ao atualizar setor: {e}")
@@ -0,0 +1,31 @@
+-- 001_protocolo_contador.sql
+-- Contador atômico para os protocolos dos chamados.
+-- Executar uma vez no SQL Editor do Supabase.
+
+create table if not exists protocolo_contador (
+    id smallint primary key default 1 check (id = 1),
+    ultimo bigint not null
+);
+
+-- Inicia o contador a partir do maior protocolo já existente
+insert into protocolo_contador (id, ultimo)
+select 1, coalesce(max(protocolo), 0) from chamados
+on conflict (id) do nothing;
+
+-- Reserva 'quantidade' protocolos consecutivos e retorna o primeiro.
+-- O UPDATE trava a linha do contador, então chamadas concorrentes recebem
+-- faixas disjuntas, sempre em uma única ida ao banco.
+create or replace function reservar_protocolos(quantidade integer default 1)
+returns bigint
+language sql
+as $$
+    update protocolo_contador
+       set ultimo = ultimo + greatest(quantidade, 1)
+     where id = 1
+    returning ultimo - greatest(quantidade, 1) + 1;
+$$;
+
+grant execute on function reservar_protocolos(integer) to anon, authenticated;
+
+-- Garante a unicidade mesmo para inserções feitas fora do alocador
+create unique index if not exists chamados_protocolo_key on chamados (protocolo);
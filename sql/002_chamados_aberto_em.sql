@@ -0,0 +1,39 @@
+-- 002_chamados_aberto_em.sql
+-- Coluna timestamptz indexada com a hora de abertura, para filtrar períodos
+-- no servidor (hora_abertura é texto 'dd/mm/aaaa hh:mm:ss' e não ordena).
+
+alter table chamados add column if not exists aberto_em timestamptz;
+
+-- Converte o texto (horário de Fortaleza) em timestamptz
+create or replace function chamados_texto_para_timestamptz(texto text)
+returns timestamptz
+language sql
+stable
+as $$
+    select to_timestamp(texto, 'DD/MM/YYYY HH24:MI:SS')::timestamp at time zone 'America/Fortaleza';
+$$;
+
+update chamados
+   set aberto_em = chamados_texto_para_timestamptz(hora_abertura)
+ where aberto_em is null and hora_abertura is not null;
+
+-- Preenche aberto_em em inserções que não o informem
+create or replace function chamados_preencher_aberto_em()
+returns trigger
+language plpgsql
+as $$
+begin
+    if new.aberto_em is null and new.hora_abertura is not null then
+        new.aberto_em := chamados_texto_para_timestamptz(new.hora_abertura);
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists chamados_aberto_em on chamados;
+create trigger chamados_aberto_em
+    before insert or update of hora_abertura on chamados
+    for each row execute function chamados_preencher_aberto_em();
+
+create index if not exists chamados_aberto_em_idx on chamados (aberto_em);
+create index if not exists chamados_ubs_aberto_em_idx on chamados (ubs, aberto_em);
@@ -0,0 +1,50 @@
+-- 003_espelho_delta.sql
+-- Suporte à sincronização incremental do espelho local (espelho.py):
+--   - coluna updated_at mantida por trigger em cada tabela espelhada;
+--   - tabela registros_excluidos com as exclusões (tombstones).
+
+create table if not exists registros_excluidos (
+    id bigserial primary key,
+    tabela text not null,
+    registro_id bigint not null,
+    excluido_em timestamptz not null default now()
+);
+create index if not exists registros_excluidos_tabela_idx
+    on registros_excluidos (tabela, excluido_em);
+
+create or replace function espelho_marcar_atualizacao()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+create or replace function espelho_registrar_exclusao()
+returns trigger
+language plpgsql
+as $$
+begin
+    insert into registros_excluidos (tabela, registro_id) values (tg_table_name, old.id);
+    return old;
+end;
+$$;
+
+do $$
+declare
+    t text;
+begin
+    foreach t in array array['chamados', 'inventario', 'pecas_usadas', 'historico_manutencao'] loop
+        execute format('alter table %I add column if not exists updated_at timestamptz not null default now()', t);
+        execute format('create index if not exists %I on %I (updated_at, id)', t || '_updated_at_idx', t);
+        execute format('drop trigger if exists espelho_atualizacao on %I', t);
+        execute format('create trigger espelho_atualizacao before update on %I
+                        for each row execute function espelho_marcar_atualizacao()', t);
+        execute format('drop trigger if exists espelho_exclusao on %I', t);
+        execute format('create trigger espelho_exclusao after delete on %I
+                        for each row execute function espelho_registrar_exclusao()', t);
+    end loop;
+end;
+$$;
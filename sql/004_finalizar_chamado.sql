@@ -0,0 +1,52 @@
+-- 004_finalizar_chamado.sql
+-- Finaliza um chamado em uma única transação: fecha o chamado, registra as
+-- peças usadas em um só INSERT, dá baixa no estoque de forma atômica e grava
+-- o histórico de manutenção do patrimônio.
+
+create or replace function finalizar_chamado(
+    p_chamado_id bigint,
+    p_solucao text,
+    p_pecas text[],
+    p_hora_fechamento text
+)
+returns void
+language plpgsql
+as $$
+declare
+    v_patrimonio text;
+begin
+    update chamados
+       set solucao = p_solucao,
+           hora_fechamento = p_hora_fechamento
+     where id = p_chamado_id
+    returning patrimonio into v_patrimonio;
+
+    if not found then
+        raise exception 'Chamado % não encontrado', p_chamado_id;
+    end if;
+
+    insert into pecas_usadas (chamado_id, peca_nome, data_uso)
+    select p_chamado_id, peca, p_hora_fechamento
+      from unnest(coalesce(p_pecas, '{}')) as peca;
+
+    -- Uma unidade por peça usada; o UPDATE relativo não perde baixas concorrentes
+    update estoque e
+       set quantidade = greatest(e.quantidade - u.qtd, 0)
+      from (select peca, count(*) as qtd
+              from unnest(coalesce(p_pecas, '{}')) as peca
+             group by peca) u
+     where e.id = (select min(id) from estoque where nome = u.peca);
+
+    if nullif(v_patrimonio, '') is not null then
+        insert into historico_manutencao (numero_patrimonio, descricao, data_manutencao)
+        values (
+            v_patrimonio,
+            format('Manutenção: %s. Peças utilizadas: %s.', p_solucao,
+                   coalesce(nullif(array_to_string(p_pecas, ', '), ''), 'Nenhuma')),
+            p_hora_fechamento
+        );
+    end if;
+end;
+$$;
+
+grant execute on function finalizar_chamado(bigint, text, text[], text) to anon, authenticated;
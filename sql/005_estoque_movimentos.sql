@@ -0,0 +1,189 @@
+-- 005_estoque_movimentos.sql
+-- Livro de movimentações do estoque (somente inserções) com saldos consolidados.
+-- A coluna estoque.quantidade deixa de ser atualizada: o saldo de cada peça é
+-- o último saldo consolidado mais os movimentos posteriores a ele.
+
+create table if not exists estoque_movimentos (
+    id bigserial primary key,
+    peca_id bigint not null references estoque (id) on delete cascade,
+    tipo text not null check (tipo in ('entrada', 'saida', 'ajuste')),
+    quantidade integer not null,  -- com sinal: entradas positivas, saídas negativas
+    chamado_id bigint,
+    criado_em timestamptz not null default now()
+);
+create index if not exists estoque_movimentos_peca_idx on estoque_movimentos (peca_id, id);
+
+create table if not exists estoque_saldos (
+    peca_id bigint primary key references estoque (id) on delete cascade,
+    saldo integer not null,
+    ultimo_movimento_id bigint not null,
+    consolidado_em timestamptz not null default now()
+);
+
+-- As quantidades atuais viram o ajuste inicial de cada peça
+insert into estoque_movimentos (peca_id, tipo, quantidade)
+select id, 'ajuste', quantidade
+  from estoque
+ where coalesce(quantidade, 0) <> 0
+   and not exists (select 1 from estoque_movimentos);
+
+-- Peças com o saldo atual na coluna 'quantidade' (lida por estoque.get_estoque)
+create or replace view estoque_com_saldo as
+select e.id,
+       e.nome,
+       coalesce(s.saldo, 0) + coalesce((
+           select sum(m.quantidade)
+             from estoque_movimentos m
+            where m.peca_id = e.id
+              and m.id > coalesce(s.ultimo_movimento_id, 0)
+       ), 0) as quantidade,
+       e.descricao,
+       e.nota_fiscal,
+       e.data_adicao
+  from estoque e
+  left join estoque_saldos s on s.peca_id = e.id;
+
+-- Consolida os movimentos em estoque_saldos. Só entram movimentos com mais de
+-- 5 minutos, para que uma transação ainda aberta (com id menor) não seja pulada.
+create or replace function consolidar_saldos_estoque()
+returns integer
+language plpgsql
+as $$
+declare
+    v_limite bigint;
+    v_pecas integer;
+begin
+    perform pg_advisory_xact_lock(hashtext('consolidar_saldos_estoque'));
+
+    select max(id) into v_limite
+      from estoque_movimentos
+     where criado_em < now() - interval '5 minutes';
+    if v_limite is null then
+        return 0;
+    end if;
+
+    insert into estoque_saldos (peca_id, saldo, ultimo_movimento_id, consolidado_em)
+    select m.peca_id, coalesce(s.saldo, 0) + sum(m.quantidade), v_limite, now()
+      from estoque_movimentos m
+      left join estoque_saldos s on s.peca_id = m.peca_id
+     where m.id > coalesce(s.ultimo_movimento_id, 0)
+       and m.id <= v_limite
+     group by m.peca_id, s.saldo
+    on conflict (peca_id) do update
+       set saldo = excluded.saldo,
+           ultimo_movimento_id = excluded.ultimo_movimento_id,
+           consolidado_em = excluded.consolidado_em;
+
+    get diagnostics v_pecas = row_count;
+    return v_pecas;
+end;
+$$;
+
+-- Toda movimentação de uma peça espera as transações que já movimentam a
+-- mesma peça (mesma trava de ajustar_saldo_estoque): um ajuste nunca calcula a
+-- diferença sobre um saldo ao qual falta uma saída ainda não confirmada. Cobre
+-- também as inserções feitas pelo app (estoque.registrar_movimento).
+create or replace function travar_peca_movimento()
+returns trigger
+language plpgsql
+as $$
+begin
+    perform pg_advisory_xact_lock(new.peca_id);
+    return new;
+end;
+$$;
+
+drop trigger if exists estoque_movimentos_travar_peca on estoque_movimentos;
+create trigger estoque_movimentos_travar_peca
+    before insert on estoque_movimentos
+    for each row execute function travar_peca_movimento();
+
+-- Ajusta o saldo de uma peça para um valor absoluto (inventário físico),
+-- registrando a diferença como movimento de ajuste.
+create or replace function ajustar_saldo_estoque(p_peca_id bigint, p_saldo integer)
+returns integer
+language plpgsql
+as $$
+declare
+    v_atual integer;
+begin
+    perform pg_advisory_xact_lock(p_peca_id);
+    select quantidade into v_atual from estoque_com_saldo where id = p_peca_id;
+    if p_saldo <> coalesce(v_atual, 0) then
+        insert into estoque_movimentos (peca_id, tipo, quantidade)
+        values (p_peca_id, 'ajuste', p_saldo - coalesce(v_atual, 0));
+    end if;
+    return p_saldo;
+end;
+$$;
+
+-- Finalização de chamados passa a registrar saídas no livro (substitui a de 004)
+drop function if exists finalizar_chamado(bigint, text, text[], text);
+
+create or replace function finalizar_chamado(
+    p_chamado_id bigint,
+    p_solucao text,
+    p_pecas text[],
+    p_hora_fechamento text,
+    p_pecas_ids bigint[] default null
+)
+returns void
+language plpgsql
+as $$
+declare
+    v_patrimonio text;
+    v_peca_id bigint;
+begin
+    -- Trava as peças usadas em ordem crescente antes das saídas, para que
+    -- duas finalizações com as mesmas peças não se bloqueiem mutuamente
+    for v_peca_id in
+        select distinct coalesce(u.peca_id, (select min(e.id) from estoque e where e.nome = u.peca))
+          from unnest(coalesce(p_pecas, '{}'), coalesce(p_pecas_ids, '{}')) as u (peca, peca_id)
+         where u.peca is not null
+         order by 1
+    loop
+        if v_peca_id is not null then
+            perform pg_advisory_xact_lock(v_peca_id);
+        end if;
+    end loop;
+
+    update chamados
+       set solucao = p_solucao,
+           hora_fechamento = p_hora_fechamento
+     where id = p_chamado_id
+    returning patrimonio into v_patrimonio;
+
+    if not found then
+        raise exception 'Chamado % não encontrado', p_chamado_id;
+    end if;
+
+    insert into pecas_usadas (chamado_id, peca_nome, data_uso)
+    select p_chamado_id, peca, p_hora_fechamento
+      from unnest(coalesce(p_pecas, '{}')) as peca;
+
+    -- Uma saída por peça usada; peças sem id são localizadas pelo nome
+    insert into estoque_movimentos (peca_id, tipo, quantidade, chamado_id)
+    select coalesce(u.peca_id, (select min(e.id) from estoque e where e.nome = u.peca)),
+           'saida', -1, p_chamado_id
+      from unnest(coalesce(p_pecas, '{}'), coalesce(p_pecas_ids, '{}')) as u (peca, peca_id)
+     where u.peca is not null
+       and coalesce(u.peca_id, (select min(e.id) from estoque e where e.nome = u.peca)) is not null;
+
+    if nullif(v_patrimonio, '') is not null then
+        insert into historico_manutencao (numero_patrimonio, descricao, data_manutencao)
+        values (
+            v_patrimonio,
+            format('Manutenção: %s. Peças utilizadas: %s.', p_solucao,
+                   coalesce(nullif(array_to_string(p_pecas, ', '), ''), 'Nenhuma')),
+            p_hora_fechamento
+        );
+    end if;
+end;
+$$;
+
+grant execute on function consolidar_saldos_estoque() to anon, authenticated;
+grant execute on function ajustar_saldo_estoque(bigint, integer) to anon, authenticated;
+grant execute on function finalizar_chamado(bigint, text, text[], text, bigint[]) to anon, authenticated;
+
+-- Opcional (extensão pg_cron): consolidar os saldos de hora em hora
+-- select cron.schedule('consolidar-saldos-estoque', '0 * * * *', 'select consolidar_saldos_estoque()');
@@ -0,0 +1,11 @@
+-- 006_chat_mensagens_indices.sql
+-- Índices para a leitura incremental do chat (chat.ler_mensagens): as
+-- consultas filtram por remetente ou destinatario e percorrem o id a partir
+-- de um cursor (id > último carregado ou id < mais antigo carregado).
+-- Com o OR entre as duas colunas o Postgres combina os dois índices (BitmapOr).
+
+create index if not exists chat_messages_remetente_id_idx
+    on chat_messages (remetente, id);
+
+create index if not exists chat_messages_destinatario_id_idx
+    on chat_messages (destinatario, id);
@@ -0,0 +1,71 @@
+-- 007_chat_caixa_entrada.sql
+-- Caixa de entrada do chat dos administradores (chat.caixa_entrada): uma
+-- linha por conversa com a última mensagem e a quantidade de mensagens não
+-- lidas desde o cursor de leitura de cada administrador, calculada no banco
+-- (usa os índices de 006_chat_mensagens_indices.sql).
+
+-- Cursor de leitura: última mensagem lida por 'leitor' na conversa com 'usuario'
+create table if not exists chat_leituras (
+    leitor text not null,
+    usuario text not null,
+    ultimo_id_lido bigint not null default 0,
+    lido_em timestamptz not null default now(),
+    primary key (leitor, usuario)
+);
+
+create or replace function caixa_entrada_chat(
+    p_leitor text,
+    p_caixa text default 'admin'
+)
+returns table (
+    usuario text,
+    ultimo_id bigint,
+    ultimo_remetente text,
+    ultima_mensagem text,
+    ultimo_timestamp text,
+    nao_lidas bigint
+)
+language sql
+stable
+as $$
+    with mensagens as (
+        select case when m.remetente = p_caixa then m.destinatario else m.remetente end as usuario,
+               m.id, m.remetente, m.mensagem, m."timestamp"
+          from chat_messages m
+         where m.remetente = p_caixa or m.destinatario = p_caixa
+    ),
+    ultimas as (
+        select distinct on (usuario) usuario, id, remetente, mensagem, "timestamp"
+          from mensagens
+         order by usuario, id desc
+    ),
+    pendentes as (
+        select ms.usuario, count(*) as nao_lidas
+          from mensagens ms
+          left join chat_leituras l
+            on l.leitor = p_leitor and l.usuario = ms.usuario
+         where ms.remetente <> p_caixa
+           and ms.id > coalesce(l.ultimo_id_lido, 0)
+         group by ms.usuario
+    )
+    select u.usuario, u.id, u.remetente, u.mensagem, u."timestamp", coalesce(p.nao_lidas, 0)
+      from ultimas u
+      left join pendentes p on p.usuario = u.usuario
+     order by coalesce(p.nao_lidas, 0) > 0 desc, u.id desc;
+$$;
+
+-- Avança o cursor de leitura (nunca retrocede)
+create or replace function marcar_chat_lido(
+    p_leitor text,
+    p_usuario text,
+    p_ultimo_id bigint
+)
+returns void
+language sql
+as $$
+    insert into chat_leituras (leitor, usuario, ultimo_id_lido, lido_em)
+    values (p_leitor, p_usuario, p_ultimo_id, now())
+    on conflict (leitor, usuario) do update
+       set ultimo_id_lido = greatest(chat_leituras.ultimo_id_lido, excluded.ultimo_id_lido),
+           lido_em = now();
+$$;
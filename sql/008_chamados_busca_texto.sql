@@ -0,0 +1,94 @@
+-- 008_chamados_busca_texto.sql
+-- Busca textual com relevância nos chamados (chamados.buscar_chamados_texto):
+-- índice GIN sobre o tsvector de tipo_defeito, patrimonio, problema e solucao
+-- (sem acentos), e a função buscar_chamados, que aplica os filtros, ordena por
+-- relevância e pagina no banco. O tsvector não é guardado em uma coluna: os
+-- select * do app e do espelho local continuam trazendo só os campos do chamado.
+
+create extension if not exists unaccent;
+
+-- unaccent() não é imutável (depende do dicionário padrão); a versão com o
+-- dicionário explícito pode ser usada em índices
+create or replace function chamados_sem_acento(texto text)
+returns text
+language sql
+immutable
+parallel safe
+as $$
+    select public.unaccent('public.unaccent'::regdictionary, coalesce(texto, ''));
+$$;
+
+-- Documento de busca de um chamado. O índice e buscar_chamados usam a mesma
+-- expressão, para que o planejador use o índice.
+create or replace function chamados_documento_busca(
+    tipo_defeito text,
+    patrimonio text,
+    problema text,
+    solucao text
+)
+returns tsvector
+language sql
+immutable
+parallel safe
+as $$
+    select setweight(to_tsvector('portuguese', chamados_sem_acento(tipo_defeito)), 'A') ||
+           setweight(to_tsvector('simple', coalesce(patrimonio, '')), 'A') ||
+           setweight(to_tsvector('portuguese', chamados_sem_acento(problema)), 'B') ||
+           setweight(to_tsvector('portuguese', chamados_sem_acento(solucao)), 'C');
+$$;
+
+-- Versão anterior deste script guardava o tsvector na coluna 'busca'
+drop index if exists chamados_busca_idx;
+alter table chamados drop column if exists busca;
+
+create index if not exists chamados_busca_idx on chamados using gin (
+    chamados_documento_busca(tipo_defeito, patrimonio::text, problema, solucao)
+);
+
+-- p_consulta aceita a sintaxe de busca web: "tela azul" (frase), -palavra, or.
+-- p_situacao: 'abertos', 'finalizados' ou null (todos).
+-- Cada linha traz o chamado (jsonb), a relevância, um trecho com os termos
+-- destacados e o total de resultados (para a paginação).
+create or replace function buscar_chamados(
+    p_consulta text,
+    p_ubs text[] default null,
+    p_situacao text default null,
+    p_inicio timestamptz default null,
+    p_fim timestamptz default null,
+    p_limite int default 20,
+    p_offset int default 0
+)
+returns table (chamado jsonb, relevancia real, trecho text, total bigint)
+language sql
+stable
+as $$
+    with consulta as (
+        select websearch_to_tsquery('portuguese', chamados_sem_acento(p_consulta)) as q
+    ),
+    encontrados as (
+        select c.id,
+               ts_rank_cd(chamados_documento_busca(c.tipo_defeito, c.patrimonio::text, c.problema, c.solucao),
+                          consulta.q) as relevancia,
+               consulta.q
+          from chamados c, consulta
+         where chamados_documento_busca(c.tipo_defeito, c.patrimonio::text, c.problema, c.solucao) @@ consulta.q
+           and (p_ubs is null or c.ubs = any(p_ubs))
+           and (p_situacao is null or (p_situacao = 'abertos') = (c.hora_fechamento is null))
+           and (p_inicio is null or c.aberto_em >= p_inicio)
+           and (p_fim is null or c.aberto_em <= p_fim)
+    ),
+    pagina as (
+        select e.*, count(*) over () as total
+          from encontrados e
+         order by e.relevancia desc, e.id desc
+         limit p_limite offset p_offset
+    )
+    select to_jsonb(c),
+           p.relevancia,
+           ts_headline('portuguese', coalesce(c.problema, '') || ' ' || coalesce(c.solucao, ''), p.q,
+                       'StartSel=**, StopSel=**, MaxWords=30, MinWords=10'),
+           p.total
+      from pagina p
+      join chamados c on c.id = p.id
+     order by p.relevancia desc, p.id desc;
+$$;
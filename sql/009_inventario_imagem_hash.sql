@@ -0,0 +1,17 @@
+-- 009_inventario_imagem_hash.sql
+-- Fotos do inventário fora da linha da tabela (imagens.py): a coluna
+-- imagem_hash guarda só o SHA-256 da imagem no armazenamento (pasta local ou
+-- bucket do Supabase Storage). As listagens do inventário deixam de trafegar
+-- o base64 de image_data, que é migrado por "python -m imagens" e pode ser
+-- removido depois.
+
+alter table inventario add column if not exists imagem_hash text;
+
+-- Para o armazenamento no Supabase Storage (IMAGENS_ARMAZENAMENTO=supabase):
+insert into storage.buckets (id, name, public)
+values ('inventario-imagens', 'inventario-imagens', false)
+on conflict (id) do nothing;
+
+-- Depois da migração (python -m imagens copia as fotos e não limpa image_data),
+-- conferidas as fotos no armazenamento:
+-- alter table inventario drop column image_data;
@@ -1,11 +1,145 @@
 # supabase_client.py
+import logging
 import os
-from supabase import create_client, Client
+import random
+import threading
+import time
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+from instrumentacao import instrumentar
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise Exception("Configure SUPABASE_URL e SUPABASE_KEY nas variáveis de ambiente.")
+logger = logging.getLogger(__name__)
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Configuração da conexão HTTP com o Supabase (todas opcionais)
+TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT_SEGUNDOS", "15"))
+TIMEOUT_CONEXAO = float(os.getenv("SUPABASE_TIMEOUT_CONEXAO_SEGUNDOS", "5"))
+MAX_CONEXOES = int(os.getenv("SUPABASE_MAX_CONEXOES", "20"))
+CONEXOES_OCIOSAS = int(os.getenv("SUPABASE_CONEXOES_OCIOSAS", "10"))
+EXPIRACAO_OCIOSA = float(os.getenv("SUPABASE_EXPIRACAO_OCIOSA_SEGUNDOS", "60"))
+MAX_TENTATIVAS = int(os.getenv("SUPABASE_MAX_TENTATIVAS", "3"))
+ESPERA_BASE = float(os.getenv("SUPABASE_ESPERA_BASE_SEGUNDOS", "0.3"))
+ESPERA_MAXIMA = 5.0
+
+# Métodos que podem ser repetidos mesmo que o servidor já tenha recebido a requisição
+METODOS_IDEMPOTENTES = ("GET", "HEAD", "OPTIONS")
+# Respostas transitórias (503 e 520 já são repetidos pelo próprio postgrest-py)
+STATUS_TRANSITORIOS = (429, 502, 504)
+
+_cliente = None
+_lock = threading.Lock()
+
+
+def _criar_transporte():
+    import httpx
+
+    class TransporteComRetentativas(httpx.HTTPTransport):
+        """
+        Transporte HTTP com pool de conexões keep-alive que repete, com espera
+        exponencial e variação aleatória, as falhas transitórias:
+          - erros ao conectar (a requisição não chegou ao servidor), em qualquer método;
+          - conexão reaproveitada fechada pelo servidor, tempo de leitura esgotado
+            e respostas 429/502/504, apenas em métodos idempotentes.
+        """
+
+        def handle_request(self, request):
+            tentativa = 0
+            while True:
+                idempotente = request.method in METODOS_IDEMPOTENTES
+                try:
+                    resposta = super().handle_request(request)
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                    erro = e
+                except (httpx.RemoteProtocolError, httpx.ReadError, httpx.ReadTimeout) as e:
+                    if not idempotente:
+                        raise
+                    erro = e
+                else:
+                    if not (idempotente and resposta.status_code in STATUS_TRANSITORIOS):
+                        return resposta
+                    erro = None
+                    if tentativa + 1 < MAX_TENTATIVAS:
+                        resposta.close()
+
+                tentativa += 1
+                if tentativa >= MAX_TENTATIVAS:
+                    if erro is not None:
+                        raise erro
+                    return resposta
+                espera = random.uniform(0, min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** tentativa))
+                logger.warning(
+                    "Falha transitória em %s %s (%s); nova tentativa em %.2f s",
+                    request.method, request.url.path,
+                    erro or f"HTTP {resposta.status_code}", espera,
+                )
+                time.sleep(espera)
+
+    return TransporteComRetentativas(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=MAX_CONEXOES,
+            max_keepalive_connections=CONEXOES_OCIOSAS,
+            keepalive_expiry=EXPIRACAO_OCIOSA,
+        ),
+    )
+
+
+def _criar_cliente():
+    import httpx
+    from supabase import ClientOptions, create_client
+
+    url = os.getenv("SUPABASE_URL")
+    chave = os.getenv("SUPABASE_KEY")
+    if not url or not chave:
+        raise Exception("Configure SUPABASE_URL e SUPABASE_KEY nas variáveis de ambiente.")
+
+    http = httpx.Client(
+        transport=_criar_transporte(),
+        timeout=httpx.Timeout(TIMEOUT, connect=TIMEOUT_CONEXAO),
+        follow_redirects=True,
+    )
+    try:
+        opcoes = ClientOptions(httpx_client=http)
+    except TypeError:
+        # supabase-py sem a opção httpx_client: cada módulo do cliente usa o próprio pool
+        logger.warning("Versão do supabase-py sem httpx_client; usando o cliente HTTP padrão.")
+        http.close()
+        opcoes = ClientOptions(postgrest_client_timeout=TIMEOUT)
+    return create_client(url, chave, options=opcoes)
+
+
+def obter_cliente():
+    """
+    Retorna o cliente do Supabase do processo, criado na primeira chamada e
+    compartilhado por todos os módulos e sessões. As requisições usam um único
+    pool de conexões keep-alive (sem novo handshake TLS a cada consulta).
+    """
+    global _cliente
+    if _cliente is None:
+        with _lock:
+            if _cliente is None:
+                _cliente = _criar_cliente()
+    return _cliente
+
+
+def definir_cliente(cliente):
+    """
+    Troca o cliente usado por todos os módulos, que importam 'supabase' daqui
+    (ex.: o banco em memória de benchmarks/banco_memoria.py).
+    """
+    global _cliente
+    with _lock:
+        _cliente = cliente
+
+
+class _ClienteSobDemanda:
+    """
+    Repassa os atributos ao cliente de obter_cliente(): importar este módulo
+    não cria o cliente nem importa o supabase-py.
+    """
+
+    def __getattr__(self, nome):
+        return getattr(obter_cliente(), nome)
+
+
+# Cliente compartilhado por todos os módulos; cada .execute() é medido
+# e atribuído à página que o disparou (ver instrumentacao.py)
+supabase = instrumentar(_ClienteSobDemanda())
@@ -0,0 +1,73 @@
+# tempo_real.py
+import inspect
+import os
+
+import streamlit as st
+
+# Intervalos (segundos) de atualização automática das áreas ao vivo
+INTERVALO_CHAT = float(os.getenv("TEMPO_REAL_CHAT_SEGUNDOS", "3"))
+INTERVALO_PAINEL = float(os.getenv("TEMPO_REAL_PAINEL_SEGUNDOS", "5"))
+
+# st.fragment (Streamlit >= 1.37) ou a versão experimental (>= 1.33)
+_fragmento = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+# st.rerun(scope=...) só existe junto com st.fragment (>= 1.37); antes, um
+# rerun pedido dentro de um fragmento já reexecuta a página inteira
+_rerun = getattr(st, "rerun", None) or getattr(st, "experimental_rerun", None)
+_rerun_com_escopo = _rerun is not None and "scope" in inspect.signature(_rerun).parameters
+
+
+def fragmento_periodico(intervalo):
+    """
+    Decorador que transforma a função em um fragmento do Streamlit reexecutado
+    sozinho a cada 'intervalo' segundos: só a área desenhada por ela é
+    atualizada, sem rodar de novo o script inteiro (e as consultas da página).
+    Em versões do Streamlit sem fragmentos, desenha um botão "Atualizar".
+    """
+    def decorador(funcao):
+        if _fragmento is not None:
+            return _fragmento(run_every=intervalo)(funcao)
+
+        def sem_fragmento(*args, **kwargs):
+            resultado = funcao(*args, **kwargs)
+            st.button("Atualizar", key=f"atualizar_{funcao.__name__}")
+            return resultado
+        return sem_fragmento
+    return decorador
+
+
+def recarregar_pagina():
+    """
+    Reexecuta a página inteira a partir de um fragmento, para redesenhar as
+    áreas fora dele que dependem do que mudou dentro. Sem fragmentos a página
+    já é sempre executada inteira, então não faz nada.
+    """
+    if _fragmento is None:
+        return
+    if _rerun_com_escopo:
+        _rerun(scope="app")
+    else:
+        _rerun()
+
+
+def parametro_url(nome):
+    """
+    Valor do parâmetro 'nome' da URL (?nome=valor), ou None. Usa st.query_params
+    (Streamlit >= 1.30) ou, antes dele, st.experimental_get_query_params().
+    """
+    if hasattr(st, "query_params"):
+        return st.query_params.get(nome)
+    valores = st.experimental_get_query_params().get(nome)
+    return valores[0] if valores else None
+
+
+def houve_alteracao(chave, versao):
+    """
+    Compara 'versao' (resultado de uma sonda barata, como o maior id da tabela)
+    com a última vista nesta sessão para 'chave'. Retorna True na primeira
+    chamada e sempre que a versão mudar.
+    """
+    versoes = st.session_state.setdefault("tempo_real_versoes", {})
+    if versoes.get(chave, object()) == versao:
+        return False
+    versoes[chave] = versao
+    return True
@@ -0,0 +1,41 @@
+from cache_dados import CacheReferencia
+
+
+def _carregar_com_invalidacao(cache, *chaves):
+    # Simula uma escrita (e a sua invalidação) enquanto a carga está em andamento
+    def carregar():
+        cache.invalidar(*chaves)
+        return ["valor antigo"]
+    return carregar
+
+
+def test_valor_em_cache_e_copiado():
+    cache = CacheReferencia(ttl=60)
+    cargas = []
+
+    def carregar():
+        cargas.append(1)
+        return ["UBS Centro"]
+
+    cache.obter("ubs", carregar).append("alterado")
+
+    assert cache.obter("ubs", carregar) == ["UBS Centro"]
+    assert len(cargas) == 1
+
+
+def test_invalidar_chave_durante_carga_nao_guarda_valor_velho():
+    cache = CacheReferencia(ttl=60)
+
+    assert cache.obter("ubs", _carregar_com_invalidacao(cache, "ubs")) == ["valor antigo"]
+
+    assert cache.estatisticas()["chaves"] == []
+
+
+def test_invalidar_tudo_durante_carga_nao_guarda_valor_velho():
+    cache = CacheReferencia(ttl=60)
+
+    # Nenhuma chave está em cache quando invalidar() é chamado sem chaves
+    assert cache.obter("ubs", _carregar_com_invalidacao(cache)) == ["valor antigo"]
+
+    assert cache.estatisticas()["chaves"] == []
+    assert cache.obter("ubs", lambda: ["valor novo"]) == ["valor novo"]
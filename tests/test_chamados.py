@@ -0,0 +1,48 @@
+import pytest
+
+import chamados
+import supabase_client
+from benchmarks.dados_sinteticos import criar_banco
+
+
+@pytest.fixture
+def banco():
+    banco = criar_banco(tamanhos={"chamados": 5})
+    supabase_client.definir_cliente(banco)
+    yield banco
+    supabase_client.definir_cliente(None)
+
+
+def test_reservar_protocolos_consecutivos(banco):
+    primeira = chamados.reservar_protocolos(3)
+    segunda = chamados.reservar_protocolos(1)
+
+    assert len(primeira) == 3
+    assert segunda[0] == primeira[-1] + 1
+
+
+@pytest.mark.parametrize("quantidade", [0, -1])
+def test_reservar_protocolos_rejeita_quantidade_menor_que_um(banco, quantidade):
+    ultimo = banco.tabelas["protocolo_contador"][0]["ultimo"]
+
+    with pytest.raises(ValueError):
+        chamados.reservar_protocolos(quantidade)
+
+    assert banco.tabelas["protocolo_contador"][0]["ultimo"] == ultimo
+
+
+def test_finalizar_em_lote_registra_as_saidas_em_uma_insercao(banco):
+    chamado = banco.tabelas["chamados"][0]
+    estoque = banco.tabelas["estoque"]
+    movimentos = len(banco.tabelas["estoque_movimentos"])
+    pecas = [estoque[0]["nome"], estoque[1]["nome"], estoque[1]["nome"], "Peça inexistente"]
+    pecas_ids = [None, estoque[1]["id"], None, None]
+    requisicoes = banco.requisicoes
+
+    chamados._finalizar_chamado_em_lote(chamado["id"], "Troca de peças", pecas, "01/02/2024 10:00:00", pecas_ids)
+
+    # UPDATE do chamado, peças usadas, consulta dos nomes, saídas e histórico
+    assert banco.requisicoes - requisicoes == 5
+    saidas = banco.tabelas["estoque_movimentos"][movimentos:]
+    assert sorted(m["peca_id"] for m in saidas) == [estoque[0]["id"], estoque[1]["id"], estoque[1]["id"]]
+    assert all(m["tipo"] == "saida" and m["quantidade"] == -1 and m["chamado_id"] == chamado["id"] for m in saidas)
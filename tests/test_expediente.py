@@ -0,0 +1,82 @@
+from datetime import date, datetime, timedelta
+
+from expediente import CalendarioExpediente
+
+
+def _tempo_util_dia_a_dia(calendario, inicio, fim):
+    """
+    Referência lenta: soma o expediente de cada dia entre 'inicio' e 'fim'.
+    """
+    total = timedelta(0)
+    dia = inicio.date()
+    while dia <= fim.date():
+        if calendario.eh_dia_util(dia):
+            for abertura, fechamento in ((8, 12), (13, 17)):
+                janela_inicio = max(datetime.combine(dia, datetime.min.time()) + timedelta(hours=abertura), inicio)
+                janela_fim = min(datetime.combine(dia, datetime.min.time()) + timedelta(hours=fechamento), fim)
+                if janela_fim > janela_inicio:
+                    total += janela_fim - janela_inicio
+        dia += timedelta(days=1)
+    return total
+
+
+def test_tempo_util_com_inicio_antes_da_base_da_tabela():
+    calendario = CalendarioExpediente()
+    inicio = datetime(2012, 1, 5, 9, 0)
+    fim = datetime(2024, 1, 5, 9, 0)
+    assert inicio.date() < calendario._tabela[0]
+
+    resultado = calendario.tempo_util(inicio, fim)
+
+    assert resultado == timedelta(days=1043, hours=16)
+    assert resultado == _tempo_util_dia_a_dia(calendario, inicio, fim)
+
+
+def test_tempo_util_com_fim_depois_do_fim_da_tabela():
+    calendario = CalendarioExpediente()
+    base, _, util = calendario._tabela
+    inicio = datetime.combine(base + timedelta(days=10), datetime.min.time()) + timedelta(hours=10)
+    fim = datetime.combine(base + timedelta(days=len(util) + 400), datetime.min.time()) + timedelta(hours=15)
+
+    assert calendario.tempo_util(inicio, fim) == _tempo_util_dia_a_dia(calendario, inicio, fim)
+
+
+def test_tempo_util_respeita_feriados_e_intervalo():
+    calendario = CalendarioExpediente(feriados=[date(2024, 1, 2)])
+    # Segunda 11:00 até quarta 14:00, com a terça como feriado
+    inicio = datetime(2024, 1, 1, 11, 0)
+    fim = datetime(2024, 1, 3, 14, 0)
+
+    assert calendario.tempo_util(inicio, fim) == timedelta(hours=1 + 4 + 4 + 1)
+    assert calendario.tempo_util(fim, inicio) == timedelta(0)
+
+
+def test_tempo_util_vetorizado_com_aberturas_antes_da_base_da_tabela():
+    import pandas as pd
+
+    from expediente import tempo_util_vetorizado
+
+    calendario = CalendarioExpediente()
+    aberturas = pd.Series(["05/01/2012 09:00:00", "10/03/2015 14:30:00", "02/01/2024 08:00:00"])
+    fechamentos = pd.Series(["05/01/2024 09:00:00", "10/03/2024 10:00:00", None])
+    assert datetime(2012, 1, 5).date() < calendario._tabela[0]
+
+    resultado = tempo_util_vetorizado(aberturas, fechamentos, calendario=calendario)
+
+    for i in range(2):
+        inicio = datetime.strptime(aberturas[i], "%d/%m/%Y %H:%M:%S")
+        fim = datetime.strptime(fechamentos[i], "%d/%m/%Y %H:%M:%S")
+        esperado = _tempo_util_dia_a_dia(calendario, inicio, fim).total_seconds()
+        assert resultado[i] == esperado
+        assert resultado[i] == calendario.tempo_util(inicio, fim).total_seconds()
+    assert pd.isna(resultado[2])
+
+
+def test_tempos_uteis_zero_quando_fim_nao_e_posterior():
+    import numpy as np
+
+    calendario = CalendarioExpediente()
+    inicios = np.array(["2013-05-06T09:00", "2024-01-02T10:00"], dtype="datetime64[us]")
+    fins = np.array(["2013-05-06T08:00", "2024-01-02T11:00"], dtype="datetime64[us]")
+
+    assert calendario.tempos_uteis(inicios, fins).tolist() == [0, 3600 * 1_000_000]
@@ -0,0 +1,115 @@
+import sqlite3
+import time
+
+import pytest
+
+import notificacoes
+from notificacoes import TransporteMemoria, enfileirar, estatisticas_fila, processar_pendentes
+
+
+@pytest.fixture(autouse=True)
+def fila_temporaria(tmp_path, monkeypatch):
+    # Fila em um arquivo próprio e sem o worker em segundo plano (os testes chamam processar_pendentes)
+    monkeypatch.setattr(notificacoes, "CAMINHO_FILA", str(tmp_path / "notificacoes.db"))
+    monkeypatch.setattr(notificacoes, "iniciar_worker", lambda: None)
+    notificacoes._local.con = None
+    yield
+    notificacoes._local.con.close()
+    notificacoes._local.con = None
+
+
+def _linhas():
+    return notificacoes._conexao().execute(
+        "select status, tentativas, proxima_tentativa, erro from fila order by id"
+    ).fetchall()
+
+
+def _vencer_retentativas():
+    with notificacoes._conexao() as con:
+        con.execute("update fila set proxima_tentativa = 0 where status = 'pendente'")
+
+
+def test_enfileirar_e_enviar():
+    transporte = TransporteMemoria()
+
+    assert enfileirar("Novo chamado", ["whatsapp:+1", "whatsapp:+2"]) == 2
+    assert processar_pendentes(transporte) == (2, 0)
+
+    assert sorted(transporte.enviadas) == [("whatsapp:+1", "Novo chamado"), ("whatsapp:+2", "Novo chamado")]
+    assert estatisticas_fila() == {"enviada": 2}
+    # Mensagens enviadas não são enviadas de novo
+    assert processar_pendentes(transporte) == (0, 0)
+
+
+def test_falha_reagenda_com_espera_exponencial():
+    transporte = TransporteMemoria(falhas=2)
+    enfileirar("Novo chamado", ["whatsapp:+1"])
+
+    antes = time.time()
+    assert processar_pendentes(transporte) == (0, 1)
+    status, tentativas, proxima, erro = _linhas()[0]
+    assert (status, tentativas, erro) == ("pendente", 1, "Falha simulada de envio")
+    assert antes + notificacoes.ESPERA_BASE * 0.5 <= proxima <= time.time() + notificacoes.ESPERA_BASE * 1.5
+    # Antes da espera a mensagem não é tentada de novo
+    assert processar_pendentes(transporte) == (0, 0)
+
+    _vencer_retentativas()
+    antes = time.time()
+    assert processar_pendentes(transporte) == (0, 1)
+    status, tentativas, proxima, _ = _linhas()[0]
+    assert (status, tentativas) == ("pendente", 2)
+    assert proxima >= antes + notificacoes.ESPERA_BASE * 2 * 0.5
+
+    _vencer_retentativas()
+    assert processar_pendentes(transporte) == (1, 0)
+    assert transporte.enviadas == [("whatsapp:+1", "Novo chamado")]
+    assert estatisticas_fila() == {"enviada": 1}
+
+
+def test_falhou_apos_max_tentativas():
+    transporte = TransporteMemoria(falhas=100)
+    enfileirar("Novo chamado", ["whatsapp:+1"])
+
+    for _ in range(notificacoes.MAX_TENTATIVAS):
+        assert processar_pendentes(transporte) == (0, 1)
+        _vencer_retentativas()
+
+    status, tentativas, _, _ = _linhas()[0]
+    assert (status, tentativas) == ("falhou", notificacoes.MAX_TENTATIVAS)
+    assert processar_pendentes(transporte) == (0, 0)
+    assert transporte.enviadas == []
+
+
+def test_so_retoma_envios_com_reserva_expirada():
+    enfileirar("Em envio por outro processo", ["whatsapp:+1"])
+    enfileirar("Processo parou no meio do envio", ["whatsapp:+2"])
+    agora = time.time()
+    with notificacoes._conexao() as con:
+        con.execute("update fila set status = 'enviando', reservado_ate = ? where destino = 'whatsapp:+1'", (agora + 60,))
+        con.execute("update fila set status = 'enviando', reservado_ate = ? where destino = 'whatsapp:+2'", (agora - 1,))
+    transporte = TransporteMemoria()
+
+    assert processar_pendentes(transporte) == (1, 0)
+
+    assert transporte.enviadas == [("whatsapp:+2", "Processo parou no meio do envio")]
+    assert estatisticas_fila() == {"enviada": 1, "enviando": 1}
+
+
+def test_fila_antiga_ganha_coluna_da_reserva():
+    with sqlite3.connect(notificacoes.CAMINHO_FILA) as con:
+        con.execute(
+            "create table fila (id integer primary key autoincrement, destino text not null,"
+            " corpo text not null, status text not null default 'pendente',"
+            " tentativas integer not null default 0, proxima_tentativa real not null,"
+            " erro text, criado_em real not null)"
+        )
+        con.execute(
+            "insert into fila (destino, corpo, status, proxima_tentativa, criado_em)"
+            " values ('whatsapp:+1', 'Antiga', 'enviando', 0, 0)"
+        )
+    con.close()
+    transporte = TransporteMemoria()
+
+    # Sem reserva registrada, a mensagem 'enviando' de antes da atualização é retomada
+    assert processar_pendentes(transporte) == (1, 0)
+    assert transporte.enviadas == [("whatsapp:+1", "Antiga")]
@@ -0,0 +1,40 @@
+import relatorio_pdf
+from relatorio_pdf import RelatorioPDF, quebrar_texto
+
+TEXTO_LONGO = "Impressora da recepção não imprime, já troquei o cabo e reinstalei o driver. " * 10
+
+
+def test_helvetica_corta_celula_com_reticencias_latin1(monkeypatch):
+    monkeypatch.setattr(relatorio_pdf, "_arquivos_fonte", lambda: None)
+    relatorio = RelatorioPDF("Relatório de teste", logo=None)
+
+    total = relatorio.tabela([("problema", "Problema", 1), ("ubs", "UBS", 1)], [{"problema": TEXTO_LONGO, "ubs": "Centro"}])
+
+    assert total == 1
+    assert relatorio.saida().startswith(b"%PDF")
+
+
+def test_metricas_nao_dependem_da_fonte_atual_do_documento():
+    relatorio = RelatorioPDF("Relatório de teste", logo=None)
+    relatorio.add_page()
+    relatorio.set_font(relatorio.familia, "", relatorio_pdf.TAMANHO_FONTE)
+    esperado = relatorio.get_string_width("Manutenção WWW")
+
+    # Outro documento no meio do cabeçalho (negrito 14) não altera as larguras
+    outro = RelatorioPDF("Outro", logo=None)
+    outro.add_page()
+    outro.set_font(outro.familia, "B", 14)
+    metricas = outro.metricas("")
+
+    assert abs(metricas.largura("Manutenção WWW") - esperado) < 1e-9
+
+
+def test_quebrar_texto_respeita_maximo_de_linhas():
+    relatorio = RelatorioPDF("Relatório de teste", logo=None)
+    metricas = relatorio.metricas("")
+
+    linhas = quebrar_texto(TEXTO_LONGO, 40, metricas, max_linhas=3, reticencias="...")
+
+    assert len(linhas) == 3
+    assert linhas[-1].endswith("...")
+    assert all(metricas.largura(linha) <= 40 for linha in linhas)
@@ -1,11 +1,17 @@
 import streamlit as st
 import pandas as pd
 from supabase_client import supabase
+import espelho
+from cache_dados import CACHE_REFERENCIA
+from imagens import ler_foto_antiga, ler_miniatura
+
+def _carregar_ubs():
+    resp = supabase.table("ubs").select("nome_ubs").execute()
+    return [u["nome_ubs"] for u in resp.data] if resp.data else []
 
 def get_ubs_list():
     try:
-        resp = supabase.table("ubs").select("nome_ubs").execute()
-        return [u["nome_ubs"] for u in resp.data] if resp.data else []
+        return CACHE_REFERENCIA.obter("ubs", _carregar_ubs)
     except Exception as e:
         st.error("Erro ao recuperar UBSs.")
         print(f"Erro: {e}")
@@ -14,6 +20,7 @@ def get_ubs_list():
 def add_ubs(nome_ubs):
     try:
         supabase.table("ubs").insert({"nome_ubs": nome_ubs}).execute()
+        CACHE_REFERENCIA.invalidar("ubs")
         return True
     except Exception as e:
         st.error("Erro ao adicionar UBS.")
@@ -23,6 +30,7 @@ def add_ubs(nome_ubs):
 def remove_ubs(nome_ubs):
     try:
         supabase.table("ubs").delete().eq("nome_ubs", nome_ubs).execute()
+        CACHE_REFERENCIA.invalidar("ubs")
         return True
     except Exception as e:
         st.error("Erro ao remover UBS.")
@@ -32,6 +40,7 @@ def remove_ubs(nome_ubs):
 def update_ubs(old_name, new_name):
     try:
         supabase.table("ubs").update({"nome_ubs": new_name}).eq("nome_ubs", old_name).execute()
+        CACHE_REFERENCIA.invalidar("ubs")
         return True
     except Exception as e:
         st.error("Erro ao atualizar UBS.")
@@ -39,22 +48,65 @@ def update_ubs(old_name, new_name):
         return False
 
 def get_inventario_por_ubs(ubs):
+    """
+    Itens do inventário de uma UBS, sem a coluna de imagem.
+    """
+    from inventario import COLUNAS_INVENTARIO
     try:
-        resp = supabase.table("inventario").select("*").eq("localizacao", ubs).execute()
+        if espelho.disponivel("inventario"):
+            return espelho.consultar("inventario", COLUNAS_INVENTARIO, [("localizacao", "eq", ubs)])
+        resp = supabase.table("inventario").select(COLUNAS_INVENTARIO).eq("localizacao", ubs).execute()
         return resp.data if resp.data else []
     except Exception as e:
         st.error("Erro ao recuperar inventário.")
         print(f"Erro: {e}")
         return []
 
-def get_chamados_por_ubs(ubs):
+def get_fotos_inventario_por_ubs(ubs):
+    """
+    Id, patrimônio e hash da foto (imagens.py) dos itens com foto de uma UBS.
+    Itens com a foto ainda em image_data (não migrados) vêm com imagem_hash None.
+    Carregado apenas quando o usuário pede para ver as fotos.
+    """
     try:
-        resp = supabase.table("chamados").select("*").eq("ubs", ubs).execute()
-        return resp.data if resp.data else []
+        resp = supabase.table("inventario").select("id,numero_patrimonio,imagem_hash") \
+            .eq("localizacao", ubs).not_.is_("imagem_hash", None).execute()
+        fotos = resp.data if resp.data else []
     except Exception as e:
-        st.error("Erro ao recuperar chamados técnicos.")
+        st.error("Erro ao recuperar fotos do inventário.")
         print(f"Erro: {e}")
         return []
+    try:
+        resp = supabase.table("inventario").select("id,numero_patrimonio,imagem_hash") \
+            .eq("localizacao", ubs).is_("imagem_hash", None).not_.is_("image_data", None).execute()
+        fotos += resp.data or []
+    except Exception:
+        # Coluna image_data já removida (sql/009)
+        pass
+    return fotos
+
+def get_chamados_por_ubs(ubs):
+    from chamados import list_chamados
+    return list_chamados(filtros=[("ubs", "eq", ubs)])
+
+def get_resumo_por_ubs(ubs_list):
+    """
+    Monta o resumo de todas as UBSs com uma consulta por tabela (apenas as
+    colunas necessárias), agrupando em memória por localizacao/ubs.
+    """
+    from chamados import list_chamados
+    from inventario import get_machines_from_inventory
+
+    resumo = pd.DataFrame({"UBS": ubs_list}).set_index("UBS")
+    df_inv = pd.DataFrame(get_machines_from_inventory(), columns=["localizacao", "tipo"])
+    df_cham = pd.DataFrame(list_chamados(colunas="ubs,hora_fechamento"), columns=["ubs", "hora_fechamento"])
+
+    resumo["Itens no Inventário"] = df_inv.groupby("localizacao").size()
+    resumo["Computadores"] = df_inv[df_inv["tipo"] == "Computador"].groupby("localizacao").size()
+    resumo["Impressoras"] = df_inv[df_inv["tipo"] == "Impressora"].groupby("localizacao").size()
+    resumo["Chamados"] = df_cham.groupby("ubs").size()
+    resumo["Chamados em Aberto"] = df_cham[df_cham["hora_fechamento"].isnull()].groupby("ubs").size()
+    return resumo.fillna(0).astype(int).reset_index()
 
 def manage_ubs():
     st.subheader("Gerenciar UBSs")
@@ -63,26 +115,39 @@ def manage_ubs():
     if action == "Listar":
         ubs = get_ubs_list()
         if ubs:
-            # Exibe cada UBS em um expander para que o usuário possa clicar e visualizar os detalhes
-            for ubs_item in ubs:
-                with st.expander(f"{ubs_item}"):
-                    # Consulta e exibe informações do inventário associadas à UBS
-                    inventario = get_inventario_por_ubs(ubs_item)
-                    if inventario:
-                        st.markdown("**Inventário:**")
-                        df_inv = pd.DataFrame(inventario)
-                        st.dataframe(df_inv)
-                    else:
-                        st.write("Nenhum item de inventário encontrado.")
-                    
-                    # Consulta e exibe os chamados técnicos associados à UBS
-                    chamados = get_chamados_por_ubs(ubs_item)
-                    if chamados:
-                        st.markdown("**Chamados Técnicos:**")
-                        df_chamados = pd.DataFrame(chamados)
-                        st.dataframe(df_chamados)
-                    else:
-                        st.write("Nenhum chamado técnico encontrado.")
+            st.dataframe(get_resumo_por_ubs(ubs))
+
+            # Os detalhes só são consultados para a UBS escolhida
+            ubs_item = st.selectbox("Ver detalhes da UBS", ["Selecione..."] + ubs)
+            if ubs_item != "Selecione...":
+                # Consulta e exibe informações do inventário associadas à UBS
+                inventario = get_inventario_por_ubs(ubs_item)
+                if inventario:
+                    st.markdown("**Inventário:**")
+                    df_inv = pd.DataFrame(inventario)
+                    st.dataframe(df_inv)
+                    if st.checkbox("Mostrar fotos dos equipamentos"):
+                        fotos = get_fotos_inventario_por_ubs(ubs_item)
+                        for foto in fotos:
+                            if foto["imagem_hash"]:
+                                miniatura = ler_miniatura(foto["imagem_hash"])
+                            else:
+                                miniatura = ler_foto_antiga(foto["id"])
+                            if miniatura:
+                                st.image(miniatura, caption=foto["numero_patrimonio"], width=200)
+                        if not fotos:
+                            st.write("Nenhuma foto cadastrada nesta UBS.")
+                else:
+                    st.write("Nenhum item de inventário encontrado.")
+
+                # Consulta e exibe os chamados técnicos associados à UBS
+                chamados = get_chamados_por_ubs(ubs_item)
+                if chamados:
+                    st.markdown("**Chamados Técnicos:**")
+                    df_chamados = pd.DataFrame(chamados)
+                    st.dataframe(df_chamados)
+                else:
+                    st.write("Nenhum chamado técnico encontrado.")
         else:
             st.write("Nenhuma UBS cadastrada.")
     